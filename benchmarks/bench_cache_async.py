@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cache hits served through the sync and async cache APIs.
+
+Simulates a busy server answering many concurrent get_trail_details and
+search_trails calls from a warm cache:
+
+- sync: each lookup opens its own connection on the event loop thread, one
+  after another (how tool handlers used the cache before the async API)
+- async: lookups are awaited concurrently and run on the cache thread, which
+  batches queued reads into shared transactions on one long-lived connection
+
+Usage:
+    python benchmarks/bench_cache_async.py
+    python benchmarks/bench_cache_async.py --calls 2000 --trails 200
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from alltrails_mcp.cache import TrailCache  # noqa: E402
+from alltrails_mcp.models import Trail, TrailDetail  # noqa: E402
+
+PARK = "us/california/bench-national-park"
+
+
+def populate(cache: TrailCache, count: int):
+    trails = [
+        Trail(
+            name=f"Trail {i}",
+            url=f"https://www.alltrails.com/trail/us/california/trail-{i}",
+            summary="A bench trail " * 10,
+            difficulty_text=("Easy", "Moderate", "Hard")[i % 3],
+            length=f"{1 + i % 12}.{i % 10} mi",
+            rating_text=f"{3 + (i % 20) / 10:.1f}",
+        )
+        for i in range(count)
+    ]
+    cache.save_trails(PARK, trails, complete=True)
+    for i, trail in enumerate(trails):
+        cache.save_trail_details(f"us/california/trail-{i}", TrailDetail(
+            title=trail.name,
+            url=trail.url,
+            summary="A longer description " * 40,
+            difficulty_text=trail.difficulty_text,
+            length=trail.length,
+            elevation_gain=f"{100 + i} ft",
+            route_type="Loop",
+            rating_text=trail.rating_text,
+        ))
+
+
+async def run_sync(cache: TrailCache, slugs, queries: int) -> float:
+    start = time.perf_counter()
+    for slug in slugs:
+        cache.get_cached_trail_details_json(slug)
+    for _ in range(queries):
+        cache.query_trails_json(PARK, sort_by="rating", limit=21)
+    return time.perf_counter() - start
+
+
+async def run_async(cache: TrailCache, slugs, queries: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(cache.aget_cached_trail_details_json(slug) for slug in slugs),
+        *(cache.aquery_trails_json(PARK, sort_by="rating", limit=21) for _ in range(queries)),
+    )
+    return time.perf_counter() - start
+
+
+async def run(calls: int, trail_count: int):
+    cache = TrailCache(db_path=Path(tempfile.mkdtemp()) / "bench.db")
+    populate(cache, trail_count)
+
+    slugs = [f"us/california/trail-{i % trail_count}" for i in range(calls)]
+    queries = max(1, calls // 10)
+
+    # Warm up both paths (and start the cache thread)
+    await run_sync(cache, slugs[:50], 5)
+    await run_async(cache, slugs[:50], 5)
+
+    sync_elapsed = await run_sync(cache, slugs, queries)
+    async_elapsed = await run_async(cache, slugs, queries)
+    total = calls + queries
+
+    print(f"{calls} detail lookups + {queries} trail queries, all cache hits\n")
+    print(f"{'API':<8} {'Total ms':>10} {'us/call':>10}")
+    print(f"{'sync':<8} {sync_elapsed * 1000:>10.1f} {sync_elapsed / total * 1e6:>10.1f}")
+    print(f"{'async':<8} {async_elapsed * 1000:>10.1f} {async_elapsed / total * 1e6:>10.1f}")
+    print(f"\nSpeedup: {sync_elapsed / async_elapsed:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async cache hits")
+    parser.add_argument("--calls", type=int, default=1000, help="Concurrent detail lookups")
+    parser.add_argument("--trails", type=int, default=100, help="Trails in the benchmark cache")
+    args = parser.parse_args()
+
+    # The cache logs every hit; don't measure the terminal
+    logging.disable(logging.INFO)
+    asyncio.run(run(args.calls, args.trails))
+
+
+if __name__ == "__main__":
+    main()
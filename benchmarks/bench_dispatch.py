@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: MCP tool-dispatch overhead for the static tools.
+
+Calls the server's registered request handlers in-process (no transport), so
+the numbers include the MCP SDK's argument validation and result wrapping but
+no I/O. list_parks is measured both as served (memoized) and with rendering
+forced on every call, to show what the precomputed responses save.
+
+Usage:
+    python benchmarks/bench_dispatch.py
+    python benchmarks/bench_dispatch.py --calls 20000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+async def measure(handler, request, calls: int) -> float:
+    """Return the mean time per call in microseconds."""
+    for _ in range(100):
+        await handler(request)
+    start = time.perf_counter()
+    for _ in range(calls):
+        await handler(request)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def run(calls: int):
+    import mcp.types as types
+    from alltrails_mcp import server as alltrails_server
+
+    handlers = alltrails_server.server.request_handlers
+    list_tools = handlers[types.ListToolsRequest]
+    call_tool = handlers[types.CallToolRequest]
+
+    list_tools_request = types.ListToolsRequest(method="tools/list")
+
+    def call_request(name: str, arguments: dict) -> types.CallToolRequest:
+        return types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name=name, arguments=arguments)
+        )
+
+    # The call handler looks tool definitions up in the cache list_tools fills
+    await list_tools(list_tools_request)
+
+    cases = [
+        ("tools/list", list_tools, list_tools_request),
+        ("list_parks", call_tool, call_request("list_parks", {})),
+        ("list_parks json", call_tool, call_request("list_parks", {"format": "json"})),
+        ("list_parks page", call_tool, call_request("list_parks", {"offset": 20, "page_size": 10})),
+    ]
+
+    print(f"{'Call':<28} {'us/call':>10}")
+    for label, handler, request in cases:
+        print(f"{label:<28} {await measure(handler, request, calls):>10.1f}")
+
+    # Same call with the memoized response bypassed
+    memoized = alltrails_server.park_list_response
+    alltrails_server.park_list_response = memoized.__wrapped__
+    try:
+        elapsed = await measure(call_tool, call_request("list_parks", {}), calls)
+        print(f"{'list_parks (no memo)':<28} {elapsed:>10.1f}")
+    finally:
+        alltrails_server.park_list_response = memoized
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MCP tool-dispatch overhead")
+    parser.add_argument("--calls", type=int, default=5000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    # Keep the benchmark away from the user's real cache
+    os.environ["HOME"] = tempfile.mkdtemp()
+
+    # The server logs every call to stderr; don't measure the terminal
+    with contextlib.redirect_stderr(io.StringIO()):
+        asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end throughput and latency against a local AllTrails stand-in.
+
+Starts the stand-in server from benchmarks/standin.py (recorded fixtures,
+configurable latency, bandwidth and injected 403 / 429 / timeout errors),
+points the scraper at it and measures, with N requests in flight at once:
+
+- scraper: search_trails_in_park (two listing pages) and get_trail_by_slug
+- MCP tools, cache misses: search_trails and get_trail_details (JSON output)
+  through handle_call_tool, each call for a park or trail not yet cached
+- cached paths: search_trails_with_cache and get_trail_details_with_cache
+- MCP tools, cache hits: the same tool calls again
+
+For each it reports throughput, p50 / p99 latency, failed calls and the
+requests the stand-in answered. Results are appended to
+benchmarks/results/e2e_history.jsonl (local to each checkout, not committed)
+with the git commit and compared with the last run on this machine that used
+the same settings; --check exits with status 1 if any
+measurement got more than --threshold worse, e.g. in a pre-release check.
+
+The upstream rate limit is off by default (--rate-limit), so the numbers
+show the package's own overhead rather than the configured pacing.
+
+Usage:
+    python benchmarks/bench_end_to_end.py
+    python benchmarks/bench_end_to_end.py --requests 400 --concurrency 16
+    python benchmarks/bench_end_to_end.py --latency 0.2 --bandwidth 500000 --error-429 0.05
+    python benchmarks/bench_end_to_end.py --check --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import standin  # noqa: E402
+
+HISTORY_FILE = Path(__file__).parent / "results" / "e2e_history.jsonl"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(latencies: List[float], failures: int, elapsed: float, upstream: Dict) -> Dict:
+    return {
+        "ops_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "failed": failures,
+        "upstream": dict(upstream),
+    }
+
+
+def run_threaded(op: Callable[[int], bool], requests: int, concurrency: int):
+    """Run op(0..requests-1) on a thread pool; return (latencies, failures, elapsed)."""
+    def timed(i: int):
+        start = time.perf_counter()
+        try:
+            ok = op(i)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return [latency for latency, _ in results], sum(not ok for _, ok in results), elapsed
+
+
+async def run_async(op: Callable, requests: int, concurrency: int):
+    """Await op(0..requests-1) with at most concurrency in flight; return (latencies, failures, elapsed)."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int):
+        async with slots:
+            start = time.perf_counter()
+            try:
+                ok = await op(i)
+            except Exception:
+                ok = False
+            return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(timed(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return [latency for latency, _ in results], sum(not ok for _, ok in results), elapsed
+
+
+async def run(args, server: standin.StandIn) -> Dict[str, Dict]:
+    from alltrails_mcp import scraper
+    from alltrails_mcp import server as mcp_server
+    from alltrails_mcp.cache import get_trail_details_with_cache, search_trails_with_cache
+
+    scraper.BASE_URL = server.url
+    # Requests the stand-in leaves unanswered time out after this long
+    scraper.REQUEST_TIMEOUT_SECONDS = args.request_timeout
+    cache = mcp_server.get_cache()
+    loop = asyncio.get_running_loop()
+    requests, concurrency = args.requests, args.concurrency
+    # Hits cycle through as many parks and trails as there are requests in flight
+    hot = max(1, concurrency)
+
+    def park(prefix: str, i: int) -> str:
+        return f"us/california/{prefix}-park-{i}"
+
+    def trail(prefix: str, i: int) -> str:
+        return f"us/california/{prefix}-trail-{i}"
+
+    async def tool(name: str, arguments: dict) -> bool:
+        # JSON output tells results from errors, which are plain text
+        result = await mcp_server.handle_call_tool(name, dict(arguments, format="json"))
+        if isinstance(result, mcp_server.types.CallToolResult):
+            if result.isError:
+                return False
+            result = result.content
+        try:
+            response = json.loads(result[0].text)
+        except ValueError:
+            return False
+        return bool(response.get("trails") or response.get("title"))
+
+    # (label, whether op is a coroutine function, op); op(i) returns whether call i succeeded
+    scenarios = [
+        ("scraper search", False, lambda i: bool(scraper.search_trails_in_park(park("scrape", i), max_pages=2))),
+        ("scraper details", False, lambda i: bool(scraper.get_trail_by_slug(trail("scrape", i)).title)),
+        ("tool search miss", True, lambda i: tool("search_trails", {"park": park("miss", i)})),
+        ("tool details miss", True, lambda i: tool("get_trail_details", {"slug": trail("miss", i)})),
+        ("cached search", False, lambda i: bool(search_trails_with_cache(park("hot", i % hot), cache=cache))),
+        ("cached details", False,
+         lambda i: bool(get_trail_details_with_cache(trail("hot", i % hot), cache=cache).title)),
+        ("tool search hit", True, lambda i: tool("search_trails", {"park": park("hot", i % hot)})),
+        ("tool details hit", True, lambda i: tool("get_trail_details", {"slug": trail("hot", i % hot)})),
+    ]
+
+    # Fill the cache for the hit measurements, without injected errors
+    with server.without_errors():
+        for i in range(hot):
+            await loop.run_in_executor(None, search_trails_with_cache, park("hot", i), cache)
+            await loop.run_in_executor(None, get_trail_details_with_cache, trail("hot", i), cache)
+    server.reset_counts()
+
+    results = {}
+    for label, asynchronous, op in scenarios:
+        if asynchronous:
+            latencies, failures, elapsed = await run_async(op, requests, concurrency)
+        else:
+            latencies, failures, elapsed = await loop.run_in_executor(
+                None, run_threaded, op, requests, concurrency
+            )
+        results[label] = summarize(latencies, failures, elapsed, server.reset_counts())
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _previous_record(settings: Dict) -> Optional[Dict]:
+    """Last recorded run with the same settings and Python version."""
+    if not HISTORY_FILE.exists():
+        return None
+    for line in reversed(HISTORY_FILE.read_text().splitlines()):
+        record = json.loads(line)
+        if record.get("settings") == settings and record.get("python") == platform.python_version():
+            return record
+    return None
+
+
+def compare(results: Dict[str, Dict], previous: Optional[Dict], threshold: float) -> List[str]:
+    """Print the results next to the previous run; return the measurements that regressed."""
+    before = previous["results"] if previous else {}
+    regressions = []
+    print(f"\n{'Measurement':<20} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'failed':>7}  {'prev p50':>9} {'prev p99':>9}  upstream")
+    for label, result in results.items():
+        old = before.get(label)
+        flags = []
+        if old:
+            if result["p50_ms"] > old["p50_ms"] * (1 + threshold):
+                flags.append("p50")
+            if result["p99_ms"] > old["p99_ms"] * (1 + threshold):
+                flags.append("p99")
+            if result["ops_per_s"] < old["ops_per_s"] / (1 + threshold):
+                flags.append("ops/s")
+        if flags:
+            regressions.append(f"{label} ({', '.join(flags)})")
+        upstream = ", ".join(f"{status}: {count}" for status, count in sorted(result["upstream"].items())) or "-"
+        print(
+            f"{label:<20} {result['ops_per_s']:>9.1f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+            f"{result['failed']:>7}  {old['p50_ms'] if old else '-':>9} {old['p99_ms'] if old else '-':>9}  "
+            f"{upstream}{'  <- slower' if flags else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper, cache and MCP tools against a local stand-in")
+    parser.add_argument("--requests", type=int, default=200, help="Calls per measurement (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight at once (default: 8)")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0,
+        help="ALLTRAILS_RATE_LIMIT for the run (default: 0, no limit)"
+    )
+    parser.add_argument(
+        "--request-timeout", type=float, default=2.0,
+        help="Seconds before an unanswered upstream request times out (default: 2)"
+    )
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown counted as a regression")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a measurement regressed")
+    parser.add_argument("--no-record", action="store_true", help="Do not append to the history file")
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+
+    # Configure the package before importing it, and keep it away from the user's real cache
+    os.environ["HOME"] = tempfile.mkdtemp()
+    os.environ["ALLTRAILS_RATE_LIMIT"] = str(args.rate_limit)
+    os.environ["ALLTRAILS_MAX_CONCURRENCY"] = str(max(4, args.concurrency))
+    for name in ("ALLTRAILS_PREFETCH", "ALLTRAILS_REFRESH_INTERVAL", "ALLTRAILS_TRACE", "ALLTRAILS_ARCHIVE"):
+        os.environ.pop(name, None)
+    logging.disable(logging.CRITICAL)
+
+    settings = {
+        key: getattr(args, key)
+        for key in (
+            "requests", "concurrency", "rate_limit", "request_timeout", "latency", "jitter",
+            "bandwidth", "error_403", "error_429", "timeout_rate", "seed",
+        )
+    }
+    print("Running:", ", ".join(f"{key}={value}" for key, value in settings.items()))
+
+    server = standin.from_arguments(args, hang_seconds=args.request_timeout + 1).start()
+    try:
+        # The server logs every call to stderr; don't measure the terminal
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = asyncio.run(run(args, server))
+    finally:
+        server.stop()
+
+    previous = _previous_record(settings)
+    regressions = compare(results, previous, args.threshold)
+    if previous:
+        print(f"\nCompared with {previous['commit']} ({previous['timestamp']})")
+
+    if not args.no_record:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "settings": settings,
+            "results": results,
+        }
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {HISTORY_FILE}")
+
+    if regressions:
+        print(f"\nSlower than the previous run by more than {args.threshold:.0%}: {'; '.join(regressions)}")
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
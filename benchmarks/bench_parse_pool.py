@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial parsing vs. the process-pool parsing stage.
+
+Parses a corpus built from the recorded HTML fixtures in benchmarks/fixtures/
+once in the current process and then through ParserPool with an increasing
+number of workers, reporting pages per second and the speedup over serial.
+
+Usage:
+    python benchmarks/bench_parse_pool.py
+    python benchmarks/bench_parse_pool.py --pages 400 --workers 1 2 4 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from alltrails_mcp.parallel import ParserPool
+from alltrails_mcp.scraper import parse_park_page, parse_trail_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_URL = "https://www.alltrails.com/parks/us/california/benchmark-national-park"
+
+
+def load_corpus(pages: int):
+    """Build a corpus of (kind, html) pairs by cycling through the fixtures."""
+    fixtures = [
+        ("park", (FIXTURES_DIR / "park_page_1.html").read_text()),
+        ("park", (FIXTURES_DIR / "park_page_2.html").read_text()),
+        ("trail", (FIXTURES_DIR / "trail_page.html").read_text()),
+    ]
+    return [fixtures[i % len(fixtures)] for i in range(pages)]
+
+
+def run_serial(corpus) -> float:
+    start = time.perf_counter()
+    for kind, html in corpus:
+        if kind == "park":
+            parse_park_page(html, FIXTURE_URL)
+        else:
+            parse_trail_page(html, FIXTURE_URL, "benchmark-trail")
+    return time.perf_counter() - start
+
+
+def run_pool(corpus, workers: int) -> float:
+    with ParserPool(workers) as pool:
+        # Warm the workers up so process start-up is not part of the measurement
+        for future in [pool.submit_trail_page("<html></html>", FIXTURE_URL, "warmup")
+                       for _ in range(workers)]:
+            future.result()
+
+        start = time.perf_counter()
+        futures = [
+            pool.submit_park_page(html, FIXTURE_URL) if kind == "park"
+            else pool.submit_trail_page(html, FIXTURE_URL, "benchmark-trail")
+            for kind, html in corpus
+        ]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - start
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark the process-pool parsing stage")
+    parser.add_argument("--pages", type=int, default=120, help="Number of pages to parse")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, cpu_count}),
+        help="Worker counts to measure"
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    corpus = load_corpus(args.pages)
+    total_kb = sum(len(html) for _, html in corpus) / 1024
+
+    print(f"Corpus: {len(corpus)} pages ({total_kb:.0f} KiB), {cpu_count} CPUs\n")
+    print(f"{'Mode':<14} {'Seconds':>9} {'Pages/s':>9} {'Speedup':>9}")
+
+    serial = run_serial(corpus)
+    print(f"{'serial':<14} {serial:>9.2f} {len(corpus) / serial:>9.1f} {1.0:>8.2f}x")
+
+    for workers in args.workers:
+        elapsed = run_pool(corpus, workers)
+        label = f"pool x{workers}"
+        print(f"{label:<14} {elapsed:>9.2f} {len(corpus) / elapsed:>9.1f} {serial / elapsed:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold-start latency of the package, CLI and MCP server.
+
+Every measurement runs in a fresh interpreter, like an MCP client spawning the
+server for a new session:
+
+- import time of alltrails_mcp, the CLI and the server module
+- time from spawning the stdio server to its first tools/list response
+
+Medians are printed and appended to benchmarks/results/startup_history.jsonl
+together with the git commit, so start-up time can be tracked over time on
+one machine. The history is local to each checkout and not committed.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --no-record
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+HISTORY_FILE = Path(__file__).parent / "results" / "startup_history.jsonl"
+
+IMPORTS = {
+    "import alltrails_mcp": "alltrails_mcp",
+    "import cli": "alltrails_mcp.cli",
+    "import server": "alltrails_mcp.server",
+}
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT / "src") + os.pathsep + env.get("PYTHONPATH", "")
+    # Keep the server away from the user's real cache
+    env["HOME"] = tempfile.mkdtemp()
+    return env
+
+
+def time_import(module: str, env: dict) -> float:
+    """Seconds to import a module in a fresh interpreter (excluding interpreter start-up)."""
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _send(proc: subprocess.Popen, message: dict):
+    proc.stdin.write(json.dumps(message) + "\n")
+    proc.stdin.flush()
+
+
+def _receive(proc: subprocess.Popen, request_id: int) -> dict:
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def time_first_list_tools(env: dict) -> float:
+    """Seconds from spawning the stdio server to its first tools/list response."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "alltrails_mcp.server"],
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+    try:
+        _send(proc, {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {},
+                "clientInfo": {"name": "bench-startup", "version": "0"},
+            },
+        })
+        _receive(proc, 1)
+        _send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        _send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = _receive(proc, 2)
+        elapsed = time.perf_counter() - start
+        if "result" not in response:
+            raise RuntimeError(f"tools/list failed: {response}")
+        return elapsed
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _last_record() -> dict:
+    if not HISTORY_FILE.exists():
+        return {}
+    lines = HISTORY_FILE.read_text().splitlines()
+    return json.loads(lines[-1]) if lines else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark package, CLI and server cold start")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per measurement")
+    parser.add_argument("--no-record", action="store_true", help="Do not append to the history file")
+    args = parser.parse_args()
+
+    env = _env()
+    samples = {label: [] for label in IMPORTS}
+    samples["first list_tools"] = []
+    for _ in range(args.runs):
+        for label, module in IMPORTS.items():
+            samples[label].append(time_import(module, env))
+        samples["first list_tools"].append(time_first_list_tools(env))
+
+    results = {label: round(statistics.median(values) * 1000, 1) for label, values in samples.items()}
+    previous = _last_record().get("results_ms", {})
+
+    print(f"{'Measurement':<20} {'Median ms':>10} {'Previous':>10}")
+    for label, value in results.items():
+        before = f"{previous[label]:.1f}" if label in previous else "-"
+        print(f"{label:<20} {value:>10.1f} {before:>10}")
+
+    if not args.no_record:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "runs": args.runs,
+            "results_ms": results,
+        }
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"\nRecorded in {HISTORY_FILE}")
+
+
+if __name__ == "__main__":
+    main()
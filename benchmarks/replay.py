@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Replay recorded MCP tool calls against a server and report latencies and cache hit ratios.
+
+Record real agent traffic by running the server with ALLTRAILS_RECORD set
+(see alltrails_mcp.recording), then fire the same calls at a server:
+
+- over stdio, at a server this script starts (python -m alltrails_mcp.server),
+  with --env settings to compare, e.g. ALLTRAILS_CACHE_DAYS=1
+- over HTTP, at a running server (alltrails-mcp --http :8000)
+
+Calls start at their recorded offsets divided by --speed (0 sends them as
+fast as --concurrency allows), with at most --concurrency calls in flight.
+The report has per-tool call counts, errors, p50/p90/p99/max latency next
+to the recorded p50, how far calls fell behind schedule, and the cache hit
+ratio per tool, read from the server's metrics endpoint before and after
+the replay (see alltrails_mcp.metrics).
+
+Usage:
+    ALLTRAILS_RECORD=calls.jsonl alltrails-mcp ...      # record
+    python benchmarks/replay.py calls.jsonl              # replay over stdio at 1x
+    python benchmarks/replay.py calls.jsonl --speed 10 --concurrency 16 --fresh-cache
+    python benchmarks/replay.py calls.jsonl --env ALLTRAILS_CACHE_DAYS=1 --env ALLTRAILS_PREFETCH=3
+    python benchmarks/replay.py calls.jsonl --http http://127.0.0.1:8000/mcp \\
+        --metrics-url http://127.0.0.1:9464/metrics
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.error import URLError
+from urllib.request import urlopen
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from alltrails_mcp.recording import load_recording  # noqa: E402
+
+CACHE_RESULT_PATTERN = re.compile(
+    r'^alltrails_tool_cache_results_total\{tool="([^"]*)",result="([^"]*)"\} (\S+)$', re.MULTILINE
+)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def read_cache_results(metrics_url: Optional[str]) -> Optional[Dict[Tuple[str, str], float]]:
+    """Read alltrails_tool_cache_results_total from a metrics endpoint (None if unavailable)."""
+    if metrics_url is None:
+        return None
+    try:
+        with urlopen(metrics_url, timeout=10) as response:
+            text = response.read().decode("utf-8")
+    except (URLError, OSError) as e:
+        print(f"Could not read metrics from {metrics_url}: {e}", file=sys.stderr)
+        return None
+    return {(tool, result): float(value) for tool, result, value in CACHE_RESULT_PATTERN.findall(text)}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def stdio_session(env: Dict[str, str]) -> AsyncIterator:
+    """Start the MCP server over stdio and open a client session with it."""
+    from mcp import ClientSession
+    from mcp.client.stdio import StdioServerParameters, stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=["-m", "alltrails_mcp.server"], env=env)
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+
+
+@asynccontextmanager
+async def http_session(url: str) -> AsyncIterator:
+    """Open a client session with a server over streamable HTTP."""
+    from mcp import ClientSession
+    from mcp.client import streamable_http
+
+    # Newer SDKs renamed the client; fall back for older ones
+    client = getattr(streamable_http, "streamable_http_client", None) or streamable_http.streamablehttp_client
+    async with client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            yield session
+
+
+async def replay(session, calls: List[Dict], speed: float, concurrency: int) -> List[Dict]:
+    """
+    Send the recorded calls on schedule.
+
+    Returns:
+        One result per call with its tool, latency, lag behind schedule and whether it failed
+    """
+    slots = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    async def send(call: Dict) -> Dict:
+        scheduled = call["offset"] / speed if speed else 0.0
+        delay = scheduled - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with slots:
+            sent = time.perf_counter()
+            try:
+                result = await session.call_tool(call["tool"], call.get("arguments") or {})
+                failed = bool(result.isError)
+            except Exception:
+                failed = True
+            done = time.perf_counter()
+        return {
+            "tool": call["tool"],
+            "latency": done - sent,
+            "lag": max(0.0, sent - start - scheduled),
+            "failed": failed,
+        }
+
+    return await asyncio.gather(*(send(call) for call in calls))
+
+
+def report(
+    calls: List[Dict],
+    results: List[Dict],
+    elapsed: float,
+    before: Optional[Dict],
+    after: Optional[Dict]
+):
+    by_tool = defaultdict(list)
+    for result in results:
+        by_tool[result["tool"]].append(result)
+    recorded = defaultdict(list)
+    for call in calls:
+        if call.get("duration_ms") is not None:
+            recorded[call["tool"]].append(call["duration_ms"])
+
+    span = calls[-1]["offset"] if calls else 0.0
+    print(f"\nReplayed {len(results)} calls in {elapsed:.1f}s (recorded over {span:.1f}s), "
+          f"{len(results) / elapsed:.1f} calls/s")
+    print(f"\n{'Tool':<26} {'Calls':>6} {'Errors':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'rec p50':>9} {'hit %':>6}")
+    for tool in sorted(by_tool):
+        latencies = [result["latency"] * 1000 for result in by_tool[tool]]
+        errors = sum(result["failed"] for result in by_tool[tool])
+        recorded_p50 = f"{statistics.median(recorded[tool]):.1f}" if recorded[tool] else "-"
+        hit_ratio = "-"
+        if before is not None and after is not None:
+            counts = {
+                result: after.get((tool, result), 0) - before.get((tool, result), 0)
+                for result in ("hit", "miss", "stale", "partial")
+            }
+            total = sum(counts.values())
+            if total:
+                hit_ratio = f"{counts['hit'] / total * 100:.0f}"
+        print(
+            f"{tool:<26} {len(latencies):>6} {errors:>6} {percentile(latencies, 0.5):>9.1f} "
+            f"{percentile(latencies, 0.9):>9.1f} {percentile(latencies, 0.99):>9.1f} "
+            f"{max(latencies):>9.1f} {recorded_p50:>9} {hit_ratio:>6}"
+        )
+
+    lags = [result["lag"] * 1000 for result in results]
+    print(f"\nBehind schedule: p50 {percentile(lags, 0.5):.1f} ms, p99 {percentile(lags, 0.99):.1f} ms, "
+          f"max {max(lags):.1f} ms")
+    if before is not None and after is not None:
+        totals = defaultdict(float)
+        for (_, result), value in after.items():
+            totals[result] += value
+        for (_, result), value in before.items():
+            totals[result] -= value
+        total = sum(totals.values())
+        if total:
+            print(f"Cache: {totals['hit']:.0f} hits, {totals['miss']:.0f} misses, {totals['stale']:.0f} stale, "
+                  f"{totals['partial']:.0f} partial ({totals['hit'] / total * 100:.0f}% hit ratio)")
+    else:
+        print("Cache hit ratios need the server's metrics endpoint (--metrics-url)")
+
+
+async def run(args, calls: List[Dict]) -> Tuple[List[Dict], float, Optional[Dict], Optional[Dict]]:
+    metrics_url = args.metrics_url
+    if args.http:
+        session_context = http_session(args.http)
+    else:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = str(ROOT / "src") + os.pathsep + env.get("PYTHONPATH", "")
+        env.pop("ALLTRAILS_RECORD", None)
+        if args.fresh_cache:
+            env["HOME"] = tempfile.mkdtemp()
+        if metrics_url is None:
+            port = _free_port()
+            env["ALLTRAILS_METRICS_PORT"] = str(port)
+            metrics_url = f"http://127.0.0.1:{port}/metrics"
+        for setting in args.env:
+            key, _, value = setting.partition("=")
+            env[key] = value
+        session_context = stdio_session(env)
+
+    async with session_context as session:
+        before = read_cache_results(metrics_url)
+        start = time.perf_counter()
+        results = await replay(session, calls, args.speed, args.concurrency)
+        elapsed = time.perf_counter() - start
+        after = read_cache_results(metrics_url)
+    return results, elapsed, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded MCP tool calls against a server")
+    parser.add_argument("recording", help="File recorded with ALLTRAILS_RECORD")
+    parser.add_argument("--http", metavar="URL", help="Streamable HTTP endpoint of a running server "
+                        "(default: start one over stdio)")
+    parser.add_argument("--metrics-url", help="Metrics endpoint of the server, for cache hit ratios "
+                        "(set up automatically for the stdio server)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up (default: 1, 0 for no pauses)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight at once (default: 8)")
+    parser.add_argument("--limit", type=int, help="Only replay the first N calls")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment setting for the stdio server (repeatable)")
+    parser.add_argument("--fresh-cache", action="store_true", help="Start the stdio server with an empty cache")
+    args = parser.parse_args()
+
+    calls = load_recording(args.recording)[:args.limit]
+    if not calls:
+        print(f"No tool calls in {args.recording}", file=sys.stderr)
+        return 1
+    if args.http and (args.env or args.fresh_cache):
+        print("--env and --fresh-cache only apply to the stdio server", file=sys.stderr)
+
+    print(f"Replaying {len(calls)} calls at {args.speed:g}x with up to {args.concurrency} in flight")
+    results, elapsed, before, after = asyncio.run(run(args, calls))
+    report(calls, results, elapsed, before, after)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for AllTrails serving the recorded HTML fixtures.
+
+Park listings (/parks/<slug>, page 2 with ?page=2) and trail pages
+(/trail/<slug>) are served from benchmarks/fixtures/ for any slug, with the
+fixture's park slug replaced by the requested one so every park crawls and
+caches separately. Slugs containing "missing" get a 404.
+
+Network conditions are configurable:
+
+- latency: seconds before each response, plus up to +/- jitter
+- bandwidth: bytes per second the body is sent at (0 for unlimited)
+- error rates: fractions of requests answered with 403, with 429, or left
+  hanging for hang_seconds and then closed without a response (a timeout)
+
+Injected errors come from a seeded random generator, so a run with the same
+settings and request sequence sees the same errors.
+
+The benchmarks start it in-process; to run the MCP server or CLI against it:
+
+    python benchmarks/standin.py --port 8800 --latency 0.1 --error-429 0.05
+    ALLTRAILS_BASE_URL=http://127.0.0.1:8800 ALLTRAILS_RATE_LIMIT=0 alltrails-mcp
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_PARK_SLUG = b"us/california/benchmark-national-park"
+CHUNK_SIZE = 16 * 1024
+
+
+class StandIn:
+    """
+    A stand-in AllTrails server running in a background thread.
+
+    Example:
+        >>> with StandIn(latency=0.05, error_429=0.1) as standin:
+        ...     scraper.BASE_URL = standin.url
+        ...     run_benchmark()
+        >>> standin.counts
+        Counter({'200': 412, '429': 44})
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: float = 0.0,
+        error_403: float = 0.0,
+        error_429: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 5.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the stand-in (call start() or use it as a context manager).
+
+        Args:
+            port: TCP port on 127.0.0.1 (0 picks a free one)
+            latency: Seconds before each response
+            jitter: Maximum seconds added to or taken from the latency
+            bandwidth: Body bytes per second (0 for unlimited)
+            error_403: Fraction of requests answered with 403 Forbidden
+            error_429: Fraction of requests answered with 429 Too Many Requests
+            timeout_rate: Fraction of requests left without a response
+            hang_seconds: How long requests without a response are held open
+            seed: Seed of the random generator behind jitter and injected errors
+        """
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_403 = error_403
+        self.error_429 = error_429
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.counts: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures: Dict[str, bytes] = {
+            name: (FIXTURES_DIR / f"{name}.html").read_bytes()
+            for name in ("park_page_1", "park_page_2", "trail_page")
+        }
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use in place of https://www.alltrails.com."""
+        return f"http://127.0.0.1:{self.port}"
+
+    def _draw(self):
+        """Pick this request's outcome ("403", "429", "timeout" or None) and delay."""
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        outcome = None
+        for name, rate in (("403", self.error_403), ("429", self.error_429), ("timeout", self.timeout_rate)):
+            if roll < rate:
+                outcome = name
+                break
+            roll -= rate
+        return outcome, max(0.0, delay)
+
+    def _body(self, path: str) -> bytes:
+        route, _, query = path.partition("?")
+        if route.startswith("/trail/"):
+            return self._fixtures["trail_page"]
+        park_slug = route[len("/parks/"):].strip("/").encode()
+        body = self._fixtures["park_page_2" if "page=2" in query else "park_page_1"]
+        return body.replace(FIXTURE_PARK_SLUG, park_slug)
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                outcome, delay = standin._draw()
+                if outcome == "timeout":
+                    standin._count("timeout")
+                    time.sleep(standin.hang_seconds)
+                    self.close_connection = True
+                    return
+                time.sleep(delay)
+
+                if outcome is not None:
+                    self._send(int(outcome), b"")
+                elif "missing" in self.path or not self.path.startswith(("/trail/", "/parks/")):
+                    self._send(404, b"")
+                else:
+                    self._send(200, standin._body(self.path))
+
+            def _send(self, status: int, body: bytes):
+                standin._count(str(status))
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if not standin.bandwidth:
+                        self.wfile.write(body)
+                        return
+                    for start in range(0, len(body), CHUNK_SIZE):
+                        chunk = body[start:start + CHUNK_SIZE]
+                        self.wfile.write(chunk)
+                        time.sleep(len(chunk) / standin.bandwidth)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def reset_counts(self) -> Counter:
+        """Return the responses counted so far by status (or "timeout") and start counting anew."""
+        with self._lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    @contextmanager
+    def without_errors(self) -> Iterator[None]:
+        """Context manager suspending error injection (e.g. while warming a cache)."""
+        rates = self.error_403, self.error_429, self.timeout_rate
+        self.error_403 = self.error_429 = self.timeout_rate = 0.0
+        try:
+            yield
+        finally:
+            self.error_403, self.error_429, self.timeout_rate = rates
+
+    def start(self) -> "StandIn":
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="standin", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add the stand-in's network condition options to a command-line parser."""
+    group = parser.add_argument_group("stand-in server")
+    group.add_argument("--latency", type=float, default=0.02, help="Seconds before each response (default: 0.02)")
+    group.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency")
+    group.add_argument("--bandwidth", type=float, default=0.0, help="Body bytes per second (default: 0, unlimited)")
+    group.add_argument("--error-403", type=float, default=0.0, help="Fraction of requests answered with 403")
+    group.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    group.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests never answered")
+    group.add_argument("--seed", type=int, default=0, help="Seed for jitter and injected errors (default: 0)")
+
+
+def from_arguments(args: argparse.Namespace, **kwargs) -> StandIn:
+    """Create a stand-in from the options added by add_arguments()."""
+    return StandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        bandwidth=args.bandwidth,
+        error_403=args.error_403,
+        error_429=args.error_429,
+        timeout_rate=args.timeout_rate,
+        seed=args.seed,
+        **kwargs
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the AllTrails HTML fixtures locally")
+    parser.add_argument("--port", type=int, default=8800, help="Port on 127.0.0.1 (default: 8800)")
+    parser.add_argument("--hang", type=float, default=30.0, help="Seconds unanswered requests are held open")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    standin = from_arguments(args, port=args.port, hang_seconds=args.hang).start()
+    print(f"Serving fixtures at {standin.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
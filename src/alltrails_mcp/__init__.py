@@ -12,18 +12,71 @@ __version__ = "0.1.0"
 __author__ = "Srinath Srinivasan, Danny Brown"
 __license__ = "MIT"
 
-from alltrails_mcp.scraper import search_trails_in_park, get_trail_by_slug
-from alltrails_mcp.parks import NationalPark, PARK_SLUGS, get_park_slug, list_parks
-from alltrails_mcp.cache import TrailCache, search_trails_with_cache
+from typing import TYPE_CHECKING
+
+# Public names and the submodules that define them. Submodules are imported on
+# first access (PEP 562), so `import alltrails_mcp` stays fast for the server
+# and CLI, which only need part of the package.
+_EXPORTS = {
+    "search_trails_in_park": "alltrails_mcp.scraper",
+    "get_trail_by_slug": "alltrails_mcp.scraper",
+    "Trail": "alltrails_mcp.models",
+    "TrailDetail": "alltrails_mcp.models",
+    "Difficulty": "alltrails_mcp.models",
+    "NationalPark": "alltrails_mcp.parks",
+    "PARK_SLUGS": "alltrails_mcp.parks",
+    "get_park_slug": "alltrails_mcp.parks",
+    "list_parks": "alltrails_mcp.parks",
+    "TrailCache": "alltrails_mcp.cache",
+    "search_trails_with_cache": "alltrails_mcp.cache",
+    "get_trail_details_with_cache": "alltrails_mcp.cache",
+    "get_trail_details_batch_with_cache": "alltrails_mcp.cache",
+    "iter_trail_details_with_cache": "alltrails_mcp.cache",
+    "iter_park_searches_with_cache": "alltrails_mcp.cache",
+}
+
+if TYPE_CHECKING:
+    from alltrails_mcp.scraper import search_trails_in_park, get_trail_by_slug
+    from alltrails_mcp.models import Trail, TrailDetail, Difficulty
+    from alltrails_mcp.parks import NationalPark, PARK_SLUGS, get_park_slug, list_parks
+    from alltrails_mcp.cache import (
+        TrailCache,
+        search_trails_with_cache,
+        get_trail_details_with_cache,
+        get_trail_details_batch_with_cache,
+        iter_trail_details_with_cache,
+        iter_park_searches_with_cache,
+    )
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
+
 
 __all__ = [
     "search_trails_in_park", 
     "get_trail_by_slug", 
+    "Trail",
+    "TrailDetail",
+    "Difficulty",
     "NationalPark",
     "PARK_SLUGS",
     "get_park_slug",
     "list_parks",
     "TrailCache",
     "search_trails_with_cache",
+    "get_trail_details_with_cache",
+    "get_trail_details_batch_with_cache",
+    "iter_trail_details_with_cache",
+    "iter_park_searches_with_cache",
     "__version__"
 ]
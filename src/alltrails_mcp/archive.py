@@ -0,0 +1,313 @@
+"""
+Raw-page archive for AllTrails HTML.
+
+The trail cache only keeps extracted fields, so a selector fix in the scraper
+normally means re-fetching every cached park from AllTrails. When the archive
+is enabled (ALLTRAILS_ARCHIVE=1 or `alltrails-search config --archive on`),
+every page the scraper downloads is also stored here, zlib-compressed and
+keyed by URL together with its fetch time and HTTP validators.
+
+`reparse_archive` re-runs the current extraction code over the archived pages
+to rebuild the cache without any network traffic.
+"""
+
+import logging
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+    from alltrails_mcp.cache import TrailCache
+
+logger = logging.getLogger(__name__)
+
+_default_archive: Optional["PageArchive"] = None
+_default_archive_lock = threading.Lock()
+
+
+class ArchivedPage(NamedTuple):
+    """A raw page stored in the archive."""
+    url: str
+    html: str
+    fetched_at: datetime
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class PageArchive:
+    """Stores compressed raw HTML pages in a SQLite database."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Initialize the page archive.
+
+        Args:
+            db_path: Path to SQLite database file. Defaults to pages_archive.db
+                     next to the trail cache database.
+        """
+        if db_path is None:
+            from alltrails_mcp.cache import _get_default_cache_dir
+            db_path = _get_default_cache_dir() / "pages_archive.db"
+
+        self.db_path = db_path
+        self._ensure_db_exists()
+
+    def _ensure_db_exists(self):
+        """Create database and tables if they don't exist."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS raw_pages (
+                    url TEXT PRIMARY KEY,
+                    fetched_at TIMESTAMP NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body BLOB NOT NULL
+                )
+            """)
+            conn.commit()
+
+    def store(
+        self,
+        url: str,
+        html: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: Optional[datetime] = None
+    ):
+        """
+        Store a raw page, replacing any previous copy of the same URL.
+
+        Args:
+            url: URL the page was requested from
+            html: Raw HTML body
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+            fetched_at: When the page was fetched (defaults to now)
+        """
+        body = zlib.compress(html.encode("utf-8"))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO raw_pages (url, fetched_at, etag, last_modified, body)
+                VALUES (?, ?, ?, ?, ?)
+            """, (url, (fetched_at or datetime.now()).isoformat(), etag, last_modified, body))
+            conn.commit()
+
+    def store_response(self, url: str, resp: "requests.Response"):
+        """
+        Store an HTTP response from the scraper.
+
+        Args:
+            url: URL the page was requested from
+            resp: Successful response
+        """
+        self.store(
+            url,
+            resp.text,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified")
+        )
+
+    @staticmethod
+    def _row_to_page(row) -> ArchivedPage:
+        url, fetched_at, etag, last_modified, body = row
+        return ArchivedPage(
+            url=url,
+            html=zlib.decompress(body).decode("utf-8"),
+            fetched_at=datetime.fromisoformat(fetched_at),
+            etag=etag,
+            last_modified=last_modified
+        )
+
+    def get(self, url: str) -> Optional[ArchivedPage]:
+        """
+        Get an archived page by URL.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            ArchivedPage if the URL is archived, None otherwise
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("""
+                SELECT url, fetched_at, etag, last_modified, body
+                FROM raw_pages
+                WHERE url = ?
+            """, (url,)).fetchone()
+        return self._row_to_page(row) if row else None
+
+    def iter_urls(self, prefix: str = "") -> Iterator[str]:
+        """
+        Iterate over archived URLs.
+
+        Args:
+            prefix: Only yield URLs starting with this prefix
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT url FROM raw_pages
+                WHERE substr(url, 1, ?) = ?
+                ORDER BY url
+            """, (len(prefix), prefix)).fetchall()
+        for (url,) in rows:
+            yield url
+
+    def get_archive_info(self) -> Dict:
+        """
+        Get information about the archive.
+
+        Returns:
+            Dictionary with archive statistics
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            total_pages, compressed_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM raw_pages"
+            ).fetchone()
+
+        return {
+            "db_path": str(self.db_path),
+            "total_pages": total_pages,
+            "compressed_bytes": compressed_bytes,
+        }
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """
+    Get the default page archive used by the scraper.
+
+    Returns:
+        PageArchive if archiving is enabled, None otherwise
+    """
+    global _default_archive
+    from alltrails_mcp.cache import is_archive_enabled
+
+    if not is_archive_enabled():
+        return None
+
+    if _default_archive is None:
+        with _default_archive_lock:
+            if _default_archive is None:
+                _default_archive = PageArchive()
+    return _default_archive
+
+
+def reparse_archive(
+    cache: Optional["TrailCache"] = None,
+    archive: Optional[PageArchive] = None,
+    park_slug: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Rebuild cached trails and trail details from archived pages.
+
+    Re-runs the current extraction code over the archive without touching the
+    network. Park listings are rebuilt by starting at each park's first page
+    and following the next-page links found by the parser through the archive.
+    Rebuilt rows keep the original fetch time and HTTP validators, so they
+    expire on schedule and can still be revalidated with a conditional request.
+
+    Args:
+        cache: TrailCache to rebuild (creates default if None)
+        archive: PageArchive to read (creates default if None)
+        park_slug: If provided, only rebuild this park
+
+    Returns:
+        Dictionary with the number of parks, pages and trail details rebuilt
+    """
+    from alltrails_mcp.cache import TrailCache
+    from alltrails_mcp.scraper import ParkPage, parse_park_page, parse_trail_page, park_url, trail_url
+
+    if cache is None:
+        cache = TrailCache()
+    if archive is None:
+        archive = PageArchive()
+
+    counts = {"parks": 0, "pages": 0, "details": 0}
+    parks_prefix = park_url("")
+
+    first_pages = [park_url(park_slug)] if park_slug else [
+        url for url in archive.iter_urls(parks_prefix) if "?" not in url
+    ]
+
+    continuation_urls = set()
+    rebuilt = []
+
+    for first_url in first_pages:
+        if first_url in continuation_urls:
+            continue
+
+        slug = first_url[len(parks_prefix):]
+        trails = []
+        trail_urls = set()
+        seen_urls = set()
+        url: Optional[str] = first_url
+        page_number = 1
+        fetched_at = None
+
+        while url and url not in seen_urls:
+            seen_urls.add(url)
+            archived = archive.get(url)
+            if archived is None:
+                break
+            if page_number > 1:
+                continuation_urls.add(url)
+
+            page_trails, next_url = parse_park_page(archived.html, url)
+            page = ParkPage(
+                number=page_number,
+                url=url,
+                trails=page_trails,
+                next_url=next_url,
+                etag=archived.etag,
+                last_modified=archived.last_modified
+            )
+            cache.save_page(slug, page, last_updated=archived.fetched_at)
+            counts["pages"] += 1
+
+            for trail in page_trails:
+                if trail["url"] not in trail_urls:
+                    trail_urls.add(trail["url"])
+                    trails.append(trail)
+            fetched_at = min(fetched_at or archived.fetched_at, archived.fetched_at)
+            url = next_url
+            page_number += 1
+
+        if trails:
+            # Only complete if the chain ended at a real last page, not an unarchived one
+            cache.save_trails(slug, trails, complete=url is None, last_updated=fetched_at)
+            counts["parks"] += 1
+            rebuilt.append((slug, first_url))
+            logger.info(f"Rebuilt {len(trails)} trails for {slug} from archive")
+
+    # A later listing page can sort before its park's first page and look like
+    # a park of its own; drop those once every chain has been followed
+    for slug, first_url in rebuilt:
+        if first_url in continuation_urls:
+            cache.clear_cache(slug)
+            counts["parks"] -= 1
+
+    if not park_slug:
+        trails_prefix = trail_url("")
+        for url in archive.iter_urls(trails_prefix):
+            archived = archive.get(url)
+            if archived is None:
+                continue
+            slug = url[len(trails_prefix):]
+            details = parse_trail_page(archived.html, url, slug)
+            if details.get("title"):
+                cache.save_trail_details(
+                    slug,
+                    details,
+                    last_updated=archived.fetched_at,
+                    etag=archived.etag,
+                    last_modified=archived.last_modified
+                )
+                counts["details"] += 1
+
+    return counts
@@ -3,57 +3,107 @@ Trail data caching module using SQLite.
 
 Caches trail search results to minimize requests to AllTrails and avoid rate limiting.
 Cache expires after 7 days by default (configurable via ALLTRAILS_CACHE_DAYS env var).
+
+Several processes (and threads) can share one cache database. The database
+runs in WAL mode, so readers never wait for a writer; writers are serialized
+by SQLite and wait for each other (up to BUSY_TIMEOUT_SECONDS) instead of
+failing with "database is locked". A fetch lease per park or trail makes
+sure only one worker scrapes it at a time; the others wait for the lease and
+then read the result from the cache.
+
+TrailCache also has an async API (aget_cached_trails, asave_trails, ...) for
+use from an event loop. Async calls run on one dedicated thread per cache
+with a long-lived connection; calls that queue up while it is busy run as a
+batch, and consecutive reads in a batch share a single transaction.
 """
 
 import sqlite3
 import json
+import hashlib
 import os
+import queue
+import threading
+import time
+import uuid
+from contextvars import copy_context
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Dict, Optional, Tuple, Union
 import logging
 
+from alltrails_mcp.metrics import CACHE_LOOKUPS, watch_cache
+from alltrails_mcp.models import Difficulty, Trail, TrailDetail
+from alltrails_mcp.scraper import ParkPage
+from alltrails_mcp.tracing import span, traced
+
+if TYPE_CHECKING:
+    import asyncio
+
 logger = logging.getLogger(__name__)
 
 # Default cache expiration in days (can be overridden by environment variable)
 DEFAULT_CACHE_DAYS = int(os.getenv('ALLTRAILS_CACHE_DAYS', '7'))
 
+# How long a connection waits for another process's write before giving up
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Fetch leases expire after this long, so a crashed worker cannot block a key forever
+LEASE_SECONDS = 120.0
+LEASE_POLL_SECONDS = 0.2
+
 # Default cache location - in user's home directory cache folder
-# This follows XDG Base Directory specification on Linux/macOS
+# This follows XDG Base Directory specification on Linux/macOS.
+# Resolved on first use (not at import) so importing the package stays cheap;
+# the directory itself is created when the database or config is first written.
+@lru_cache(maxsize=None)
 def _get_default_cache_dir() -> Path:
     """Get the default cache directory for the current platform."""
     if Path.home().joinpath(".cache").exists():
         # Linux/macOS with XDG
-        cache_dir = Path.home() / ".cache" / "alltrails-mcp"
-    else:
-        # Fallback for systems without .cache
-        cache_dir = Path.home() / ".alltrails_mcp"
-    
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir
+        return Path.home() / ".cache" / "alltrails-mcp"
+    # Fallback for systems without .cache
+    return Path.home() / ".alltrails_mcp"
+
 
-DEFAULT_CACHE_DB = _get_default_cache_dir() / "trails_cache.db"
-CONFIG_FILE = _get_default_cache_dir() / "config.json"
+def _default_cache_db() -> Path:
+    return _get_default_cache_dir() / "trails_cache.db"
+
+
+def _config_file() -> Path:
+    return _get_default_cache_dir() / "config.json"
+
+
+def __getattr__(name: str):
+    # DEFAULT_CACHE_DB and CONFIG_FILE are computed lazily (PEP 562)
+    if name == "DEFAULT_CACHE_DB":
+        return _default_cache_db()
+    if name == "CONFIG_FILE":
+        return _config_file()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _load_config() -> Dict:
     """Load configuration from config file."""
-    if CONFIG_FILE.exists():
+    config_file = _config_file()
+    if config_file.exists():
         try:
-            with open(CONFIG_FILE, 'r') as f:
+            with open(config_file, 'r') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError):
-            logger.warning(f"Failed to load config from {CONFIG_FILE}")
+            logger.warning(f"Failed to load config from {config_file}")
     return {}
 
 
 def _save_config(config: Dict) -> None:
     """Save configuration to config file."""
+    config_file = _config_file()
     try:
-        with open(CONFIG_FILE, 'w') as f:
+        config_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(config_file, 'w') as f:
             json.dump(config, f, indent=2)
     except IOError as e:
-        logger.error(f"Failed to save config to {CONFIG_FILE}: {e}")
+        logger.error(f"Failed to save config to {config_file}: {e}")
 
 
 def get_cache_days() -> int:
@@ -74,6 +124,210 @@ def set_cache_days(days: int) -> None:
     _save_config(config)
 
 
+def is_archive_enabled() -> bool:
+    """Check whether raw pages should be archived (ALLTRAILS_ARCHIVE env var or config file)."""
+    # Priority: 1. Environment variable, 2. Config file, 3. Disabled
+    env_archive = os.getenv('ALLTRAILS_ARCHIVE')
+    if env_archive:
+        return env_archive.lower() in ('1', 'true', 'yes', 'on')
+    
+    config = _load_config()
+    return bool(config.get('archive_pages', False))
+
+
+def set_archive_enabled(enabled: bool) -> None:
+    """Enable or disable the raw-page archive in the config file."""
+    config = _load_config()
+    config['archive_pages'] = enabled
+    _save_config(config)
+
+
+# Columns read back into Trail records (see _row_to_trail)
+_TRAIL_COLUMNS = """
+    name, url, summary, difficulty, length, rating, route_type,
+    difficulty_level, length_km, rating_value
+"""
+
+# Builds one trail object per row in SQLite (the shape of render.TRAIL_SCHEMA)
+_TRAIL_JSON_COLUMN = """
+    json_object(
+        'name', name, 'url', url, 'summary', COALESCE(summary, ''),
+        'difficulty', COALESCE(difficulty, ''), 'difficulty_level', COALESCE(difficulty_level, 0),
+        'length', COALESCE(length, ''), 'length_km', length_km,
+        'rating', rating_value, 'route_type', COALESCE(route_type, '')
+    )
+"""
+
+# Builds the trail details object in SQLite from the stored details JSON
+# (the shape of render.TRAIL_DETAIL_SCHEMA)
+_TRAIL_DETAIL_JSON_COLUMN = """
+    json_object(
+        'title', title, 'url', url,
+        'summary', COALESCE(json_extract(details, '$.summary'), ''),
+        'difficulty', COALESCE(json_extract(details, '$.difficulty'), ''),
+        'difficulty_level', COALESCE(json_extract(details, '$.difficulty_level'), 0),
+        'length', COALESCE(json_extract(details, '$.length'), ''),
+        'length_km', json_extract(details, '$.length_km'),
+        'elevation_gain', COALESCE(json_extract(details, '$.elevation_gain'), ''),
+        'elevation_gain_m', json_extract(details, '$.elevation_gain_m'),
+        'rating', json_extract(details, '$.rating_value'),
+        'route_type', COALESCE(json_extract(details, '$.route_type'), '')
+    )
+"""
+
+# Sort orders accepted by TrailCache.query_trails. Unknown values sort last
+# (SQLite already puts NULLs last in descending order), and both orders can
+# be read straight from the (park_slug, column) indexes.
+_SORT_ORDERS = {
+    "rating": "rating_value DESC",
+    "length": "length_km ASC NULLS LAST",
+}
+
+
+def _row_to_trail(row: Tuple) -> Trail:
+    """Build a Trail record from a row selected with _TRAIL_COLUMNS."""
+    (name, url, summary, difficulty, length, rating, route_type,
+     difficulty_level, length_km, rating_value) = row
+    return Trail(
+        name=name,
+        url=url,
+        summary=summary or "",
+        difficulty_text=difficulty or "",
+        length=length or "",
+        rating_text=rating or "",
+        route_type=route_type or "",
+        difficulty=Difficulty(difficulty_level) if difficulty_level is not None else None,
+        length_km=length_km,
+        rating=rating_value
+    )
+
+
+def _content_hash(data: Dict) -> str:
+    """Compute a stable hash of a trail's content for change detection."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _changed_fields(old: Dict, new: Dict) -> Dict:
+    """Get the fields that differ between two versions of a trail, with their new values."""
+    return {
+        key: new.get(key)
+        for key in sorted(set(old) | set(new))
+        if old.get(key) != new.get(key)
+    }
+
+
+class _SharedConnection:
+    """
+    A connection shared by a batch of reads on the cache thread.
+    
+    `with` blocks on it neither commit nor close, so every read in the batch
+    runs in the batch's transaction.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+    
+    def __enter__(self) -> "_SharedConnection":
+        return self
+    
+    def __exit__(self, *exc_info) -> bool:
+        return False
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+
+class _CacheThread:
+    """
+    Dedicated thread running TrailCache calls for the async API.
+    
+    The thread keeps one connection open. Calls queued while it is busy run
+    as one batch, in order; consecutive reads share one transaction, and each
+    write runs in a transaction of its own.
+    """
+    
+    MAX_BATCH = 64
+    
+    def __init__(self, cache: "TrailCache"):
+        self.cache = cache
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="alltrails-cache", daemon=True)
+        self._thread.start()
+    
+    def submit(self, read: bool, func: Callable, args: Tuple, kwargs: Dict) -> "asyncio.Future":
+        """Queue a call and return a future for its result in the running event loop."""
+        import asyncio
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # The call runs in the caller's context, so it is traced as part of the caller's trace
+        self._queue.put((read, func, args, kwargs, loop, future, copy_context()))
+        return future
+    
+    def _run(self):
+        conn = self.cache._open_connection()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            reads = []
+            for call in batch:
+                if call[0]:
+                    reads.append(call)
+                    continue
+                self._run_reads(conn, reads)
+                reads = []
+                self._run_write(conn, call)
+            self._run_reads(conn, reads)
+    
+    def _run_reads(self, conn: sqlite3.Connection, calls: List[Tuple]):
+        if not calls:
+            return
+        self.cache._local.conn = _SharedConnection(conn)
+        try:
+            conn.execute("BEGIN")
+            for call in calls:
+                self._call(call)
+        finally:
+            self.cache._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+    
+    def _run_write(self, conn: sqlite3.Connection, call: Tuple):
+        self.cache._local.conn = conn
+        try:
+            self._call(call)
+        finally:
+            self.cache._local.conn = None
+    
+    @staticmethod
+    def _call(call: Tuple):
+        _, func, args, kwargs, loop, future, context = call
+        try:
+            outcome = (_set_future_result, future, context.run(func, *args, **kwargs))
+        except Exception as e:
+            outcome = (_set_future_exception, future, e)
+        try:
+            loop.call_soon_threadsafe(*outcome)
+        except RuntimeError:
+            # The event loop was closed while the call was queued
+            pass
+
+
+def _set_future_result(future: "asyncio.Future", result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_future_exception(future: "asyncio.Future", exception: Exception):
+    if not future.done():
+        future.set_exception(exception)
+
+
 class TrailCache:
     """Manages cached trail data in SQLite database."""
     
@@ -88,18 +342,40 @@ class TrailCache:
             cache_days: Number of days before cache expires. 
                        Defaults to saved config, ALLTRAILS_CACHE_DAYS env var, or 7 days.
         """
-        self.db_path = db_path or DEFAULT_CACHE_DB
+        self.db_path = db_path or _default_cache_db()
         self.cache_days = cache_days if cache_days is not None else get_cache_days()
+        # Connection of the async API's cache thread while it runs a call
+        self._local = threading.local()
+        self._cache_thread: Optional[_CacheThread] = None
+        self._cache_thread_lock = threading.Lock()
         self._ensure_db_exists()
+        watch_cache(self)
+    
+    def _connect(self) -> Union[sqlite3.Connection, _SharedConnection]:
+        """Get a connection for one operation (the cache thread's own, when on it)."""
+        conn = getattr(self._local, "conn", None)
+        return conn if conn is not None else self._open_connection()
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a connection that waits for other writers instead of failing."""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        # Safe in WAL mode (a crash can lose the last commits, not corrupt the database)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
     
     def _ensure_db_exists(self):
         """Create database and tables if they don't exist."""
         # Create directory if it doesn't exist
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
+            # Readers never block on (or block) a writer; persists in the database file
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Other processes may be creating or migrating the same database
+            cursor.execute("BEGIN IMMEDIATE")
+            
             # Create parks table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS parks (
@@ -131,10 +407,168 @@ class TrailCache:
                 ON trails(park_slug)
             """)
             
+            # Create park pages table (one row per crawled listing page)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS park_pages (
+                    park_slug TEXT NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    next_url TEXT,
+                    last_updated TIMESTAMP NOT NULL,
+                    trails JSON NOT NULL,
+                    PRIMARY KEY (park_slug, page_number)
+                )
+            """)
+            
+            # Create trail details table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trail_details (
+                    slug TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    last_updated TIMESTAMP NOT NULL,
+                    details JSON NOT NULL
+                )
+            """)
+            
+            # Create change log table (additions, removals and field changes)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trail_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    park_slug TEXT,
+                    trail_url TEXT NOT NULL,
+                    change TEXT NOT NULL,
+                    fields JSON,
+                    changed_at TIMESTAMP NOT NULL
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trail_changes_changed_at
+                ON trail_changes(changed_at)
+            """)
+            
+            # Create fetch lease table (one row per park or trail being fetched)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS fetch_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            
+            # Create access statistics table (kind is 'park' or 'trail'), used to
+            # pick what the background refresher keeps warm
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cache_access (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    access_count INTEGER NOT NULL DEFAULT 0,
+                    last_accessed TIMESTAMP NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+            
+            self._ensure_columns(cursor, "parks", {"complete": "INTEGER NOT NULL DEFAULT 0"})
+            self._ensure_columns(cursor, "trails", {"content_hash": "TEXT", "position": "INTEGER"})
+            
+            # Numeric fields normalized at ingest (see alltrails_mcp.models)
+            added = self._ensure_columns(cursor, "trails", {
+                "length_km": "REAL",
+                "rating_value": "REAL",
+                "difficulty_level": "INTEGER",
+            })
+            if added:
+                self._backfill_numeric_columns(cursor)
+            self._ensure_columns(cursor, "trails", {"route_type": "TEXT"})
+            
+            # Indexes for server-side filtering and sorting (see query_trails)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trails_rating
+                ON trails(park_slug, rating_value)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trails_length
+                ON trails(park_slug, length_km)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trails_difficulty
+                ON trails(park_slug, difficulty_level)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_trails_route_type
+                ON trails(park_slug, route_type COLLATE NOCASE)
+            """)
+            self._ensure_columns(cursor, "trail_details", {"content_hash": "TEXT"})
+            
+            # HTTP validators for conditional revalidation of expired entries
+            validator_columns = {"etag": "TEXT", "last_modified": "TEXT"}
+            self._ensure_columns(cursor, "park_pages", validator_columns)
+            self._ensure_columns(cursor, "trail_details", validator_columns)
+            
             conn.commit()
             logger.info(f"Cache database initialized at {self.db_path}")
     
-    def get_cached_trails(self, park_slug: str) -> Optional[List[Dict]]:
+    @staticmethod
+    def _ensure_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]) -> List[str]:
+        """Add columns missing from a table created by an older version."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        added = []
+        for column, definition in columns.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                added.append(column)
+        return added
+    
+    @staticmethod
+    def _backfill_numeric_columns(cursor: sqlite3.Cursor):
+        """Fill the normalized numeric columns of trails cached by an older version."""
+        cursor.execute("SELECT id, name, url, summary, difficulty, length, rating FROM trails")
+        updates = []
+        for row_id, name, url, summary, difficulty, length, rating in cursor.fetchall():
+            trail = Trail.from_dict({
+                "name": name,
+                "url": url,
+                "summary": summary,
+                "difficulty": difficulty,
+                "length": length,
+                "rating": rating
+            })
+            updates.append((int(trail.difficulty), trail.length_km, trail.rating, row_id))
+        cursor.executemany("""
+            UPDATE trails SET difficulty_level = ?, length_km = ?, rating_value = ?
+            WHERE id = ?
+        """, updates)
+    
+    def _is_expired(self, last_updated_str: str) -> bool:
+        """Check whether a cache timestamp is older than the expiration window."""
+        cache_age = datetime.now() - datetime.fromisoformat(last_updated_str)
+        return cache_age > timedelta(days=self.cache_days)
+    
+    def _check_entry(self, table: str, last_updated_str: Optional[str], allow_expired: bool = False) -> bool:
+        """
+        Decide whether a looked-up entry can be served, and count the lookup in the metrics.
+        
+        Args:
+            table: Table the entry was looked up in
+            last_updated_str: The entry's timestamp, or None if it was not found
+            allow_expired: Whether expired entries may be served
+            
+        Returns:
+            True if the entry exists and is fresh (or expired entries are allowed)
+        """
+        if last_updated_str is None:
+            result = "miss"
+        elif not self._is_expired(last_updated_str):
+            result = "hit"
+        else:
+            result = "stale" if allow_expired else "expired"
+        CACHE_LOOKUPS.labels(table, result).inc()
+        return result != "miss" and result != "expired"
+    
+    @traced("cache.get_cached_trails", key="park_slug")
+    def get_cached_trails(self, park_slug: str) -> Optional[List[Trail]]:
         """
         Get cached trails for a park if cache is still valid.
         
@@ -142,9 +576,9 @@ class TrailCache:
             park_slug: Park identifier
             
         Returns:
-            List of trail dictionaries if cache is valid, None otherwise
+            List of Trail records if cache is valid, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Check if park exists and cache is valid
@@ -155,92 +589,717 @@ class TrailCache:
             """, (park_slug,))
             
             result = cursor.fetchone()
-            if not result:
-                logger.info(f"No cache found for park: {park_slug}")
+            if not self._check_entry("parks", result[0] if result else None):
+                if not result:
+                    logger.info(f"No cache found for park: {park_slug}")
+                else:
+                    cache_age = datetime.now() - datetime.fromisoformat(result[0])
+                    logger.info(f"Cache expired for {park_slug} (age: {cache_age.days} days)")
                 return None
             
             last_updated_str, trail_count = result
-            last_updated = datetime.fromisoformat(last_updated_str)
-            cache_age = datetime.now() - last_updated
+            cache_age = datetime.now() - datetime.fromisoformat(last_updated_str)
+            
+            # Get cached trails
+            cursor.execute(f"""
+                SELECT {_TRAIL_COLUMNS}
+                FROM trails
+                WHERE park_slug = ?
+                ORDER BY position, id
+            """, (park_slug,))
             
-            # Check if cache is expired
-            if cache_age > timedelta(days=self.cache_days):
-                logger.info(f"Cache expired for {park_slug} (age: {cache_age.days} days)")
+            # Numeric fields were normalized when the trails were saved
+            trails = [_row_to_trail(row) for row in cursor.fetchall()]
+            
+            logger.info(f"Cache hit for {park_slug}: {len(trails)} trails (age: {cache_age.days} days)")
+            return trails
+    
+    def query_trails(
+        self,
+        park_slug: str,
+        min_rating: Optional[float] = None,
+        max_length_km: Optional[float] = None,
+        difficulty: Optional[Difficulty] = None,
+        route_type: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        allow_expired: bool = False
+    ) -> Optional[List[Trail]]:
+        """
+        Filter and sort a park's cached trails in SQL.
+        
+        Filters run against the indexed numeric columns normalized at ingest,
+        so trails with an unknown rating or length never match those filters.
+        
+        Args:
+            park_slug: Park identifier
+            min_rating: Only trails rated at least this
+            max_length_km: Only trails at most this long, in kilometers
+            difficulty: Only trails of this difficulty
+            route_type: Only trails of this route type (case-insensitive, e.g. "Loop")
+            sort_by: "rating" (highest first) or "length" (shortest first).
+                     Defaults to listing order.
+            limit: Maximum number of trails to return (top-k)
+            offset: Number of matching trails to skip
+            allow_expired: If True, also query trails past their expiration
+            
+        Returns:
+            List of matching Trail records if the park's cache is valid, None otherwise
+        
+        Raises:
+            ValueError: If sort_by is not a supported sort order
+        """
+        rows = self._select_trails(
+            _TRAIL_COLUMNS, park_slug, min_rating, max_length_km, difficulty,
+            route_type, sort_by, limit, offset, allow_expired
+        )
+        return [_row_to_trail(row) for row in rows] if rows is not None else None
+    
+    def query_trails_json(
+        self,
+        park_slug: str,
+        min_rating: Optional[float] = None,
+        max_length_km: Optional[float] = None,
+        difficulty: Optional[Difficulty] = None,
+        route_type: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        allow_expired: bool = False
+    ) -> Optional[List[str]]:
+        """
+        Like query_trails, but return each trail as a compact JSON object string.
+        
+        The JSON is built by SQLite from the normalized columns, so the trails
+        are never decoded into records and re-encoded in Python. Every object
+        has the same keys (see render.TRAIL_SCHEMA), with null for unknown values.
+        
+        Returns:
+            List of JSON object strings if the park's cache is valid, None otherwise
+        """
+        rows = self._select_trails(
+            _TRAIL_JSON_COLUMN, park_slug, min_rating, max_length_km, difficulty,
+            route_type, sort_by, limit, offset, allow_expired
+        )
+        return [row[0] for row in rows] if rows is not None else None
+    
+    @traced("cache.query_trails", key="park_slug")
+    def _select_trails(
+        self,
+        columns: str,
+        park_slug: str,
+        min_rating: Optional[float],
+        max_length_km: Optional[float],
+        difficulty: Optional[Difficulty],
+        route_type: Optional[str],
+        sort_by: Optional[str],
+        limit: Optional[int],
+        offset: int,
+        allow_expired: bool
+    ) -> Optional[List[Tuple]]:
+        """Run a filtered trail query for query_trails / query_trails_json."""
+        if sort_by is not None and sort_by not in _SORT_ORDERS:
+            raise ValueError(f"Unsupported sort order '{sort_by}'. Use one of: {', '.join(_SORT_ORDERS)}")
+        
+        conditions = ["park_slug = ?"]
+        params: list = [park_slug]
+        if min_rating is not None:
+            conditions.append("rating_value >= ?")
+            params.append(min_rating)
+        if max_length_km is not None:
+            conditions.append("length_km <= ?")
+            params.append(max_length_km)
+        if difficulty is not None:
+            conditions.append("difficulty_level = ?")
+            params.append(int(difficulty))
+        if route_type:
+            conditions.append("route_type = ? COLLATE NOCASE")
+            params.append(route_type)
+        
+        order_by = _SORT_ORDERS[sort_by] if sort_by else "position, id"
+        query = f"""
+            SELECT {columns}
+            FROM trails
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order_by}
+            LIMIT ? OFFSET ?
+        """
+        params.extend([limit if limit is not None else -1, offset])
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT last_updated FROM parks WHERE park_slug = ?", (park_slug,))
+            result = cursor.fetchone()
+            if not self._check_entry("parks", result[0] if result else None, allow_expired):
                 return None
             
-            # Get cached trails
+            cursor.execute(query, params)
+            return cursor.fetchall()
+    
+    def is_crawl_complete(self, park_slug: str) -> bool:
+        """
+        Check whether the cached trails cover every page of the park listing.
+        
+        Args:
+            park_slug: Park identifier
+            
+        Returns:
+            True if the last crawl reached the final listing page
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT complete FROM parks WHERE park_slug = ?", (park_slug,))
+            result = cursor.fetchone()
+            return bool(result and result[0])
+    
+    def get_trail_count(self, park_slug: str) -> int:
+        """
+        Get the number of trails cached for a park, even if the cache has expired.
+        
+        Args:
+            park_slug: Park identifier
+            
+        Returns:
+            Number of cached trails (0 if the park is not cached)
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT trail_count FROM parks WHERE park_slug = ?", (park_slug,))
+            result = cursor.fetchone()
+            return result[0] if result else 0
+    
+    def covers_trails(self, park_slug: str, count: Optional[int]) -> bool:
+        """
+        Check whether the cached trails of a park reach far enough down its listing.
+        
+        Args:
+            park_slug: Park identifier
+            count: Number of trails needed, or None for the whole listing
+            
+        Returns:
+            True if the last crawl reached the final listing page or, when
+            count is given, collected at least count trails
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT trail_count, complete FROM parks WHERE park_slug = ?", (park_slug,))
+            result = cursor.fetchone()
+            if not result:
+                return False
+            trail_count, complete = result
+            return bool(complete) or (count is not None and trail_count >= count)
+    
+    @traced("cache.get_cached_page", key="park_slug")
+    def get_cached_page(
+        self,
+        park_slug: str,
+        page_number: int,
+        allow_expired: bool = False
+    ) -> Optional[ParkPage]:
+        """
+        Get a single cached listing page for a park if it is still valid.
+        
+        Args:
+            park_slug: Park identifier
+            page_number: Page number, starting at 1
+            allow_expired: If True, also return pages past their expiration
+            
+        Returns:
+            ParkPage if the page is cached and not expired, None otherwise
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT url, next_url, last_updated, trails
+                FROM park_pages
+                WHERE park_slug = ? AND page_number = ?
+            """, (park_slug, page_number))
+            
+            result = cursor.fetchone()
+            if not self._check_entry("park_pages", result[2] if result else None, allow_expired):
+                if result:
+                    logger.info(f"Cached page {page_number} expired for {park_slug}")
+                return None
+            
+            url, next_url, last_updated_str, trails_json = result
+            
+            return ParkPage(
+                number=page_number,
+                url=url,
+                trails=json.loads(trails_json),
+                next_url=next_url
+            )
+    
+    def get_page_validators(self, park_slug: str, page_number: int) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Get the HTTP validators of a cached listing page, even if it has expired.
+        
+        Args:
+            park_slug: Park identifier
+            page_number: Page number, starting at 1
+            
+        Returns:
+            Tuple of (etag, last_modified) if the page is cached with at least
+            one validator, None otherwise
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
             cursor.execute("""
-                SELECT name, url, summary, difficulty, length, rating, trail_data
+                SELECT etag, last_modified
+                FROM park_pages
+                WHERE park_slug = ? AND page_number = ?
+            """, (park_slug, page_number))
+            
+            result = cursor.fetchone()
+            if not result or not any(result):
+                return None
+            return result
+    
+    def touch_page(self, park_slug: str, page_number: int):
+        """
+        Mark a cached listing page as fresh again after a 304 Not Modified.
+        
+        Args:
+            park_slug: Park identifier
+            page_number: Page number, starting at 1
+        """
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE park_pages SET last_updated = ?
+                WHERE park_slug = ? AND page_number = ?
+            """, (datetime.now().isoformat(), park_slug, page_number))
+            conn.commit()
+            logger.info(f"Revalidated page {page_number} of {park_slug} (not modified)")
+    
+    @traced("cache.save_page", key="park_slug")
+    def save_page(self, park_slug: str, page: ParkPage, last_updated: Optional[datetime] = None):
+        """
+        Save a single listing page to the cache, replacing any previous copy.
+        
+        Args:
+            park_slug: Park identifier
+            page: Page returned by the scraper
+            last_updated: When the page was fetched (defaults to now)
+        """
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO park_pages (
+                    park_slug, page_number, url, next_url, last_updated, trails, etag, last_modified
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                park_slug,
+                page.number,
+                page.url,
+                page.next_url,
+                (last_updated or datetime.now()).isoformat(),
+                json.dumps(page.trails),
+                page.etag,
+                page.last_modified
+            ))
+            conn.commit()
+    
+    @traced("cache.save_trails", key="park_slug")
+    def save_trails(
+        self,
+        park_slug: str,
+        trails: List[Dict],
+        limit: Optional[int] = None,
+        complete: bool = False,
+        last_updated: Optional[datetime] = None
+    ):
+        """
+        Save trails to cache, updating only the trails that changed.
+        
+        Each trail is stored with a hash of its content. Trails whose hash is
+        unchanged are left alone; added and changed trails are written and
+        recorded in the change log. Cached trails missing from the new list are
+        only removed (and logged as removed) when the crawl was complete, since
+        a partial crawl simply did not reach them.
+        
+        Args:
+            park_slug: Park identifier
+            trails: List of Trail records or trail dictionaries
+            limit: Maximum number of trails to cache (None to cache all)
+            complete: True if trails cover every page of the park listing
+            last_updated: When the trails were fetched (defaults to now)
+        """
+        # Limit trails to save
+        trails_to_save = trails[:limit]
+        if limit is not None and len(trails) > limit:
+            complete = False
+        
+        now = datetime.now().isoformat()
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            # Take the write lock up front so the comparison below sees the latest rows
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            cursor.execute("""
+                SELECT id, url, content_hash, trail_data, position
                 FROM trails
                 WHERE park_slug = ?
-                ORDER BY id
+                ORDER BY position, id
             """, (park_slug,))
+            existing = {url: (row_id, content_hash, trail_data, old_position)
+                        for row_id, url, content_hash, trail_data, old_position in cursor.fetchall()}
             
-            trails = []
-            for row in cursor.fetchall():
-                name, url, summary, difficulty, length, rating, trail_data_json = row
+            changes = []
+            saved_urls = set()
+            for position, trail in enumerate(trails_to_save):
+                record = trail if isinstance(trail, Trail) else Trail.from_dict(trail)
+                if record.url in saved_urls:
+                    continue
+                saved_urls.add(record.url)
+                
+                trail_data = record.to_dict()
+                content_hash = _content_hash(trail_data)
+                row = (
+                    record.name,
+                    record.summary,
+                    record.difficulty_text,
+                    record.length,
+                    record.rating_text,
+                    json.dumps(trail_data),  # Store complete trail data as JSON
+                    content_hash,
+                    position,
+                    int(record.difficulty),
+                    record.length_km,
+                    record.rating,
+                    record.route_type
+                )
+                
+                if record.url not in existing:
+                    cursor.execute("""
+                        INSERT INTO trails (
+                            name, summary, difficulty, length, rating, trail_data,
+                            content_hash, position, difficulty_level, length_km, rating_value,
+                            route_type, park_slug, url
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, row + (park_slug, record.url))
+                    changes.append((park_slug, record.url, "added", None, now))
+                    continue
                 
-                # Use trail_data if available, otherwise construct from individual fields
-                if trail_data_json:
-                    trail = json.loads(trail_data_json)
+                row_id, old_hash, old_data, old_position = existing[record.url]
+                if old_hash == content_hash:
+                    # Unchanged trails are only rewritten if they moved in the listing
+                    if old_position != position:
+                        cursor.execute("UPDATE trails SET position = ? WHERE id = ?", (position, row_id))
+                    continue
+                
+                cursor.execute("""
+                    UPDATE trails SET
+                        name = ?, summary = ?, difficulty = ?, length = ?, rating = ?,
+                        trail_data = ?, content_hash = ?, position = ?,
+                        difficulty_level = ?, length_km = ?, rating_value = ?,
+                        route_type = COALESCE(NULLIF(?, ''), route_type)
+                    WHERE id = ?
+                """, row + (row_id,))
+                old_trail = Trail.from_dict(json.loads(old_data) if old_data else {}).to_dict()
+                changed_fields = _changed_fields(old_trail, trail_data)
+                if changed_fields:
+                    changes.append((park_slug, record.url, "changed", json.dumps(changed_fields), now))
+            
+            # Trails no longer listed
+            stale = [(url, row_id, old_position) for url, (row_id, _, _, old_position) in existing.items()
+                     if url not in saved_urls]
+            if complete:
+                for url, row_id, _ in stale:
+                    cursor.execute("DELETE FROM trails WHERE id = ?", (row_id,))
+                    changes.append((park_slug, url, "removed", None, now))
+            else:
+                # Keep trails from pages this crawl did not reach, after the new ones
+                for position, (url, row_id, old_position) in enumerate(stale, len(trails_to_save)):
+                    if old_position != position:
+                        cursor.execute("UPDATE trails SET position = ? WHERE id = ?", (position, row_id))
+            
+            cursor.executemany("""
+                INSERT INTO trail_changes (park_slug, trail_url, change, fields, changed_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, changes)
+            
+            cursor.execute("SELECT COUNT(*) FROM trails WHERE park_slug = ?", (park_slug,))
+            trail_count = cursor.fetchone()[0]
+            
+            # Update park record
+            park_row = ((last_updated or datetime.now()).isoformat(), trail_count, int(complete), park_slug)
+            cursor.execute("""
+                UPDATE parks SET last_updated = ?, trail_count = ?, complete = ?
+                WHERE park_slug = ?
+            """, park_row)
+            if cursor.rowcount == 0:
+                cursor.execute("""
+                    INSERT INTO parks (last_updated, trail_count, complete, park_slug)
+                    VALUES (?, ?, ?, ?)
+                """, park_row)
+            
+            conn.commit()
+            logger.info(
+                f"Cached {len(saved_urls)} trails for {park_slug} "
+                f"({len(changes)} changes)"
+            )
+    
+    @traced("cache.get_cached_trail_details", key="slug")
+    def get_cached_trail_details(self, slug: str, allow_expired: bool = False) -> Optional[TrailDetail]:
+        """
+        Get cached details for a trail if cache is still valid.
+        
+        Args:
+            slug: Trail slug
+            allow_expired: If True, also return details past their expiration
+            
+        Returns:
+            TrailDetail if cache is valid, None otherwise
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT last_updated, details
+                FROM trail_details
+                WHERE slug = ?
+            """, (slug,))
+            
+            result = cursor.fetchone()
+            if not self._check_entry("trail_details", result[0] if result else None, allow_expired):
+                if not result:
+                    logger.info(f"No cached details for trail: {slug}")
                 else:
-                    trail = {
-                        "name": name,
-                        "url": url,
-                        "summary": summary or "",
-                        "difficulty": difficulty or "",
-                        "length": length or "",
-                        "rating": rating or ""
-                    }
-                trails.append(trail)
+                    logger.info(f"Cached details expired for {slug}")
+                return None
             
-            logger.info(f"Cache hit for {park_slug}: {len(trails)} trails (age: {cache_age.days} days)")
-            return trails
+            last_updated_str, details_json = result
+            
+            logger.info(f"Cache hit for trail details: {slug}")
+            return TrailDetail.from_dict(json.loads(details_json))
     
-    def save_trails(self, park_slug: str, trails: List[Dict], limit: int = 15):
+    @traced("cache.get_cached_trail_details_json", key="slug")
+    def get_cached_trail_details_json(self, slug: str, allow_expired: bool = False) -> Optional[str]:
         """
-        Save trails to cache, replacing any existing cache for this park.
+        Get cached details for a trail as a compact JSON object string.
+        
+        The object is built by SQLite from the stored details, without decoding
+        them in Python. It has the keys of render.TRAIL_DETAIL_SCHEMA.
         
         Args:
-            park_slug: Park identifier
-            trails: List of trail dictionaries
-            limit: Maximum number of trails to cache (default: 15)
+            slug: Trail slug
+            allow_expired: If True, also return details past their expiration
+            
+        Returns:
+            JSON object string if cache is valid, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT last_updated, {_TRAIL_DETAIL_JSON_COLUMN}
+                FROM trail_details
+                WHERE slug = ?
+            """, (slug,))
             
-            # Delete existing cached data for this park
-            cursor.execute("DELETE FROM trails WHERE park_slug = ?", (park_slug,))
-            cursor.execute("DELETE FROM parks WHERE park_slug = ?", (park_slug,))
+            result = cursor.fetchone()
+            if not self._check_entry("trail_details", result[0] if result else None, allow_expired):
+                return None
+            return result[1]
+    
+    def get_trail_details_validators(self, slug: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Get the HTTP validators of cached trail details, even if they have expired.
+        
+        Args:
+            slug: Trail slug
+            
+        Returns:
+            Tuple of (etag, last_modified) if the trail is cached with at least
+            one validator, None otherwise
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT etag, last_modified FROM trail_details WHERE slug = ?", (slug,))
+            
+            result = cursor.fetchone()
+            if not result or not any(result):
+                return None
+            return result
+    
+    def touch_trail_details(self, slug: str):
+        """
+        Mark cached trail details as fresh again after a 304 Not Modified.
+        
+        Args:
+            slug: Trail slug
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE trail_details SET last_updated = ? WHERE slug = ?",
+                (datetime.now().isoformat(), slug)
+            )
+            conn.commit()
+            logger.info(f"Revalidated details for {slug} (not modified)")
+    
+    @traced("cache.save_trail_details", key="slug")
+    def save_trail_details(
+        self,
+        slug: str,
+        details: Union[TrailDetail, Dict],
+        last_updated: Optional[datetime] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """
+        Save trail details to cache, writing them only if their content changed.
+        
+        New and changed details are recorded in the change log. If the content
+        hash is unchanged, only the freshness timestamp and validators are updated.
+        
+        Args:
+            slug: Trail slug
+            details: TrailDetail record or trail details dictionary
+            last_updated: When the details were fetched (defaults to now)
+            etag: ETag response header, for later revalidation
+            last_modified: Last-Modified response header, for later revalidation
+        """
+        if not isinstance(details, TrailDetail):
+            details = TrailDetail.from_dict(details)
+        details = details.to_dict()
+        content_hash = _content_hash(details)
+        last_updated_str = (last_updated or datetime.now()).isoformat()
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT content_hash, details FROM trail_details WHERE slug = ?", (slug,))
+            existing = cursor.fetchone()
             
-            # Limit trails to save
-            trails_to_save = trails[:limit]
+            if existing and existing[0] == content_hash:
+                cursor.execute("""
+                    UPDATE trail_details SET last_updated = ?, etag = ?, last_modified = ?
+                    WHERE slug = ?
+                """, (last_updated_str, etag, last_modified, slug))
+                conn.commit()
+                logger.info(f"Details unchanged for trail {slug}")
+                return
             
-            # Insert park record
             cursor.execute("""
-                INSERT INTO parks (park_slug, last_updated, trail_count)
-                VALUES (?, ?, ?)
-            """, (park_slug, datetime.now().isoformat(), len(trails_to_save)))
+                INSERT OR REPLACE INTO trail_details (
+                    slug, url, title, last_updated, details, etag, last_modified, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                slug,
+                details.get("url", ""),
+                details.get("title", ""),
+                last_updated_str,
+                json.dumps(details),
+                etag,
+                last_modified,
+                content_hash
+            ))
             
-            # Insert trail records
-            for trail in trails_to_save:
+            # Listing cards often lack the route type; fill it in from the details page
+            if details.get("route_type"):
                 cursor.execute("""
-                    INSERT INTO trails (
-                        park_slug, name, url, summary, difficulty, length, rating, trail_data
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    park_slug,
-                    trail.get("name", ""),
-                    trail.get("url", ""),
-                    trail.get("summary", ""),
-                    trail.get("difficulty", ""),
-                    trail.get("length", ""),
-                    trail.get("rating", ""),
-                    json.dumps(trail)  # Store complete trail data as JSON
-                ))
+                    UPDATE trails SET route_type = ?
+                    WHERE url = ? AND (route_type IS NULL OR route_type = '')
+                """, (details["route_type"], details.get("url", "")))
+            
+            if existing is None:
+                change, fields = "added", None
+            else:
+                change = "changed"
+                old_details = TrailDetail.from_dict(json.loads(existing[1])).to_dict()
+                fields = json.dumps(_changed_fields(old_details, details))
+            cursor.execute("""
+                INSERT INTO trail_changes (park_slug, trail_url, change, fields, changed_at)
+                VALUES (NULL, ?, ?, ?, ?)
+            """, (details.get("url", ""), change, fields, datetime.now().isoformat()))
             
             conn.commit()
-            logger.info(f"Cached {len(trails_to_save)} trails for {park_slug}")
+            logger.info(f"Cached details for trail {slug}")
+    
+    def get_changes_since(
+        self,
+        since: datetime,
+        park_slug: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Get logged trail changes newer than a timestamp, oldest first.
+        
+        Args:
+            since: Only return changes recorded after this time
+            park_slug: If provided, only return changes for this park.
+                       Trail detail changes have no park and are only
+                       returned when park_slug is None.
+            limit: Maximum number of changes to return
+            
+        Returns:
+            List of change dictionaries with park_slug, trail_url, change
+            ('added', 'changed' or 'removed'), fields (new values of the
+            changed fields, for 'changed') and changed_at
+        """
+        query = """
+            SELECT park_slug, trail_url, change, fields, changed_at
+            FROM trail_changes
+            WHERE changed_at > ?
+        """
+        params: list = [since.isoformat()]
+        if park_slug:
+            query += " AND park_slug = ?"
+            params.append(park_slug)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [
+                {
+                    "park_slug": row_park,
+                    "trail_url": trail_url,
+                    "change": change,
+                    "fields": json.loads(fields) if fields else None,
+                    "changed_at": changed_at
+                }
+                for row_park, trail_url, change, fields, changed_at in cursor.fetchall()
+            ]
+    
+    def get_change_summary(self, since: Optional[datetime] = None) -> List[Dict]:
+        """
+        Count logged changes per park, most frequently changing parks first.
+        
+        Useful to see which parks actually change and deserve shorter expiration.
+        
+        Args:
+            since: Only count changes recorded after this time (all if None)
+            
+        Returns:
+            List of dictionaries with park_slug (None for trail details),
+            added, changed, removed and last_change
+        """
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT park_slug,
+                       SUM(change = 'added'),
+                       SUM(change = 'changed'),
+                       SUM(change = 'removed'),
+                       MAX(changed_at)
+                FROM trail_changes
+                WHERE changed_at > ?
+                GROUP BY park_slug
+                ORDER BY COUNT(*) DESC
+            """, ((since or datetime.min).isoformat(),))
+            return [
+                {
+                    "park_slug": park_slug,
+                    "added": added,
+                    "changed": changed,
+                    "removed": removed,
+                    "last_change": last_change
+                }
+                for park_slug, added, changed, removed, last_change in cursor.fetchall()
+            ]
     
     def clear_cache(self, park_slug: Optional[str] = None):
         """
@@ -250,20 +1309,147 @@ class TrailCache:
             park_slug: If provided, only clear cache for this park. 
                       If None, clear entire cache.
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             if park_slug:
                 cursor.execute("DELETE FROM trails WHERE park_slug = ?", (park_slug,))
+                cursor.execute("DELETE FROM park_pages WHERE park_slug = ?", (park_slug,))
                 cursor.execute("DELETE FROM parks WHERE park_slug = ?", (park_slug,))
+                cursor.execute("DELETE FROM cache_access WHERE kind = 'park' AND key = ?", (park_slug,))
                 logger.info(f"Cleared cache for {park_slug}")
             else:
                 cursor.execute("DELETE FROM trails")
+                cursor.execute("DELETE FROM park_pages")
                 cursor.execute("DELETE FROM parks")
+                cursor.execute("DELETE FROM trail_details")
+                cursor.execute("DELETE FROM trail_changes")
+                cursor.execute("DELETE FROM cache_access")
                 logger.info("Cleared entire cache")
             
             conn.commit()
     
+    def acquire_lease(self, key: str, seconds: float = LEASE_SECONDS) -> Optional[str]:
+        """
+        Try to take the fetch lease for a park or trail.
+        
+        Leases are rows in the cache database, so they hold across every
+        process and thread using it. A lease that is never released expires
+        after `seconds`.
+        
+        Args:
+            key: What is being fetched (e.g., "park:us/utah/zion-national-park")
+            seconds: How long the lease lasts unless released
+            
+        Returns:
+            Lease token to pass to release_lease(), or None if another worker
+            holds the lease
+        """
+        token = f"{os.getpid()}-{uuid.uuid4().hex}"
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("DELETE FROM fetch_leases WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor.execute("""
+                INSERT OR IGNORE INTO fetch_leases (key, owner, expires_at)
+                VALUES (?, ?, ?)
+            """, (key, token, now + seconds))
+            acquired = cursor.rowcount == 1
+        return token if acquired else None
+    
+    def release_lease(self, key: str, token: str):
+        """
+        Release a fetch lease taken with acquire_lease().
+        
+        Args:
+            key: Lease key
+            token: Token returned by acquire_lease()
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM fetch_leases WHERE key = ? AND owner = ?", (key, token))
+            conn.commit()
+    
+    def wait_for_lease(self, key: str, timeout: float = LEASE_SECONDS) -> bool:
+        """
+        Wait until nobody holds the fetch lease for a key.
+        
+        Args:
+            key: Lease key
+            timeout: Maximum number of seconds to wait
+            
+        Returns:
+            True if the lease was released (or expired), False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._connect() as conn:
+                result = conn.execute(
+                    "SELECT 1 FROM fetch_leases WHERE key = ? AND expires_at > ?", (key, time.time())
+                ).fetchone()
+            if result is None:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LEASE_POLL_SECONDS)
+    
+    def record_accesses(self, accesses: Dict[Tuple[str, str], int], accessed_at: Optional[datetime] = None):
+        """
+        Add to the access counts of cached parks and trails.
+        
+        Args:
+            accesses: Number of accesses keyed by (kind, key), where kind is
+                "park" (key is the park slug) or "trail" (key is the trail slug)
+            accessed_at: Time of the latest access (defaults to now)
+        """
+        if not accesses:
+            return
+        accessed_at_str = (accessed_at or datetime.now()).isoformat()
+        with self._connect() as conn:
+            conn.executemany("""
+                INSERT INTO cache_access (kind, key, access_count, last_accessed)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE SET
+                    access_count = access_count + excluded.access_count,
+                    last_accessed = excluded.last_accessed
+            """, [(kind, key, count, accessed_at_str) for (kind, key), count in accesses.items()])
+            conn.commit()
+    
+    def get_refresh_candidates(self, refresh_ahead: timedelta, limit: int = 10) -> List[Tuple[str, str]]:
+        """
+        Get cached parks and trails that are about to expire and still in use.
+        
+        Only entries accessed within the expiration window are considered.
+        Entries expiring within refresh_ahead (or already expired) are returned
+        most-accessed first, then soonest to expire.
+        
+        Args:
+            refresh_ahead: How long before expiry an entry becomes a candidate
+            limit: Maximum number of candidates
+            
+        Returns:
+            List of (kind, key) tuples, kind being "park" or "trail"
+        """
+        now = datetime.now()
+        stale_before = (now - timedelta(days=self.cache_days) + refresh_ahead).isoformat()
+        accessed_since = (now - timedelta(days=self.cache_days)).isoformat()
+        
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT kind, key FROM (
+                    SELECT a.kind, a.key, a.access_count, a.last_accessed, p.last_updated
+                    FROM cache_access a JOIN parks p ON a.kind = 'park' AND p.park_slug = a.key
+                    UNION ALL
+                    SELECT a.kind, a.key, a.access_count, a.last_accessed, d.last_updated
+                    FROM cache_access a JOIN trail_details d ON a.kind = 'trail' AND d.slug = a.key
+                )
+                WHERE last_updated < ? AND last_accessed >= ?
+                ORDER BY access_count DESC, last_updated ASC
+                LIMIT ?
+            """, (stale_before, accessed_since, limit))
+            return cursor.fetchall()
+    
     def get_cache_info(self) -> Dict:
         """
         Get information about the cache.
@@ -271,7 +1457,7 @@ class TrailCache:
         Returns:
             Dictionary with cache statistics
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             # Get total parks cached
@@ -282,6 +1468,10 @@ class TrailCache:
             cursor.execute("SELECT COUNT(*) FROM trails")
             total_trails = cursor.fetchone()[0]
             
+            # Get total trail details cached
+            cursor.execute("SELECT COUNT(*) FROM trail_details")
+            total_details = cursor.fetchone()[0]
+            
             # Get parks with cache info
             cursor.execute("""
                 SELECT park_slug, last_updated, trail_count 
@@ -308,45 +1498,551 @@ class TrailCache:
                 "cache_days": self.cache_days,
                 "total_parks": total_parks,
                 "total_trails": total_trails,
+                "total_details": total_details,
                 "parks": parks
             }
+    
+    def get_entry_counts(self) -> Dict[Tuple[str, str], int]:
+        """
+        Count the cached parks, listing pages and trail details, fresh and expired.
+        
+        Returns:
+            Dictionary mapping (table, "fresh" or "expired") to the number of entries
+        """
+        expired_before = (datetime.now() - timedelta(days=self.cache_days)).isoformat()
+        counts = {}
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            for table in ("parks", "park_pages", "trail_details"):
+                cursor.execute(f"""
+                    SELECT COUNT(*), COALESCE(SUM(last_updated < ?), 0)
+                    FROM {table}
+                """, (expired_before,))
+                total, expired = cursor.fetchone()
+                counts[(table, "fresh")] = total - expired
+                counts[(table, "expired")] = expired
+        return counts
+    
+    # Async API: the methods above, run on the cache thread (see _CacheThread)
+    
+    def _run_async(self, read: bool, func: Callable, *args, **kwargs) -> "asyncio.Future":
+        if self._cache_thread is None:
+            with self._cache_thread_lock:
+                if self._cache_thread is None:
+                    self._cache_thread = _CacheThread(self)
+        return self._cache_thread.submit(read, func, args, kwargs)
+    
+    async def aget_cached_trails(self, park_slug: str) -> Optional[List[Trail]]:
+        """Async version of get_cached_trails()."""
+        return await self._run_async(True, self.get_cached_trails, park_slug)
+    
+    async def aquery_trails(self, park_slug: str, **filters) -> Optional[List[Trail]]:
+        """Async version of query_trails()."""
+        return await self._run_async(True, self.query_trails, park_slug, **filters)
+    
+    async def aquery_trails_json(self, park_slug: str, **filters) -> Optional[List[str]]:
+        """Async version of query_trails_json()."""
+        return await self._run_async(True, self.query_trails_json, park_slug, **filters)
+    
+    async def acovers_trails(self, park_slug: str, count: Optional[int]) -> bool:
+        """Async version of covers_trails()."""
+        return await self._run_async(True, self.covers_trails, park_slug, count)
+    
+    async def aget_cached_trail_details(self, slug: str, allow_expired: bool = False) -> Optional[TrailDetail]:
+        """Async version of get_cached_trail_details()."""
+        return await self._run_async(True, self.get_cached_trail_details, slug, allow_expired)
+    
+    async def aget_cached_trail_details_json(self, slug: str, allow_expired: bool = False) -> Optional[str]:
+        """Async version of get_cached_trail_details_json()."""
+        return await self._run_async(True, self.get_cached_trail_details_json, slug, allow_expired)
+    
+    async def aget_refresh_candidates(self, refresh_ahead: timedelta, limit: int = 10) -> List[Tuple[str, str]]:
+        """Async version of get_refresh_candidates()."""
+        return await self._run_async(True, self.get_refresh_candidates, refresh_ahead, limit)
+    
+    async def asave_trails(self, park_slug: str, trails: List[Dict], **kwargs):
+        """Async version of save_trails()."""
+        return await self._run_async(False, self.save_trails, park_slug, trails, **kwargs)
+    
+    async def asave_trail_details(self, slug: str, details: Union[TrailDetail, Dict], **kwargs):
+        """Async version of save_trail_details()."""
+        return await self._run_async(False, self.save_trail_details, slug, details, **kwargs)
+    
+    async def arecord_accesses(self, accesses: Dict[Tuple[str, str], int], accessed_at: Optional[datetime] = None):
+        """Async version of record_accesses()."""
+        return await self._run_async(False, self.record_accesses, accesses, accessed_at)
+
+
+def _lease_or_wait(cache: TrailCache, key: str, lookup: Callable[[], Optional[Any]]) -> Tuple[Optional[str], Any]:
+    """
+    Take the fetch lease for a key, waiting while another worker holds it.
+    
+    After each wait the cache is checked again with `lookup`. If the other
+    worker's fetch did not cover this caller (it fetched less, failed, or its
+    lease expired), the lease is tried again, so only one worker at a time
+    ever fetches the key.
+    
+    Args:
+        cache: Cache holding the leases
+        key: Lease key
+        lookup: Returns the cached result for this caller, or None if it is
+            still missing
+    
+    Returns:
+        Tuple of (lease token, None) if this worker should fetch, or
+        (None, cached result) once another worker's fetch covers this caller
+    
+    Raises:
+        DeadlineExceeded: If the caller's deadline passes while another worker
+            holds the lease
+    """
+    from alltrails_mcp.upstream import DeadlineExceeded, deadline_remaining
+    
+    started = time.monotonic()
+    while True:
+        token = cache.acquire_lease(key)
+        if token is not None:
+            return token, None
+        
+        # Never wait past the caller's deadline
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(
+                f"Deadline passed after {time.monotonic() - started:.2f}s waiting for another worker to fetch {key}"
+            )
+        logger.info(f"Waiting for another worker to fetch {key}")
+        with span("cache.lease_wait", key=key):
+            cache.wait_for_lease(key, LEASE_SECONDS if remaining is None else min(LEASE_SECONDS, remaining))
+        
+        result = lookup()
+        if result is not None:
+            return None, result
+
+
+def _cached_search(cache: TrailCache, park_slug: str, limit: Optional[int]) -> Optional[List[Trail]]:
+    """Get cached trails for a park if they are fresh and cover `limit` trails."""
+    cached_trails = cache.get_cached_trails(park_slug)
+    if cached_trails is not None and (
+        (limit is not None and len(cached_trails) >= limit)
+        or cache.is_crawl_complete(park_slug)
+    ):
+        return cached_trails[:limit] if limit is not None else cached_trails
+    return None
 
 
 def search_trails_with_cache(
     park_slug: str, 
     cache: Optional[TrailCache] = None,
     force_refresh: bool = False,
-    limit: int = 15
-) -> List[Dict]:
+    limit: Optional[int] = 15,
+    max_pages: Optional[int] = None,
+    revalidate: bool = False
+) -> List[Trail]:
     """
     Search for trails with caching support.
     
+    Listing pages are crawled lazily until `limit` trails have been collected.
+    Each page is cached under its page number, so asking for more trails
+    later only fetches the pages that are not cached yet. Expired pages are
+    revalidated with a conditional request; a 304 Not Modified response just
+    extends the cached page without downloading or parsing it again.
+    
+    Only one worker crawls a park at a time, across every process sharing
+    the cache; the others wait and then use the trails it cached, or take
+    the lease in turn if those do not cover their search. A worker whose
+    deadline passes while waiting gets the trails cached so far.
+    
     Args:
         park_slug: Park identifier
         cache: TrailCache instance (creates default if None)
         force_refresh: If True, bypass cache and fetch fresh data
-        limit: Maximum number of trails to cache
+        limit: Maximum number of trails to return (None for every page)
+        max_pages: Maximum number of listing pages to crawl (None for no limit)
+        revalidate: If True, revalidate every cached page with a conditional
+            request even if it has not expired yet
         
     Returns:
-        List of trail dictionaries
+        List of Trail records
     """
-    from alltrails_mcp.scraper import search_trails_in_park
+    from alltrails_mcp.upstream import DeadlineExceeded
     
     if cache is None:
         cache = TrailCache()
     
     # Try to get from cache first (unless force refresh)
-    if not force_refresh:
-        cached_trails = cache.get_cached_trails(park_slug)
+    if not force_refresh and not revalidate:
+        cached_trails = _cached_search(cache, park_slug, limit)
         if cached_trails is not None:
             return cached_trails
     
-    # Cache miss or force refresh - fetch from AllTrails
+    lease_key = f"park:{park_slug}"
+    try:
+        lease, cached_trails = _lease_or_wait(cache, lease_key, lambda: _cached_search(cache, park_slug, limit))
+    except DeadlineExceeded as e:
+        # Settle for whatever is cached, like a crawl cut short by a failed request
+        logger.warning(f"{e}; using the trails cached for {park_slug}")
+        return cache.query_trails(park_slug, limit=limit, allow_expired=True) or []
+    if lease is None:
+        # Another worker just crawled the park, far enough for this search
+        return cached_trails
+    
+    try:
+        return _crawl_park(park_slug, cache, force_refresh, limit, max_pages, revalidate)
+    finally:
+        cache.release_lease(lease_key, lease)
+
+
+def _crawl_park(
+    park_slug: str,
+    cache: TrailCache,
+    force_refresh: bool,
+    limit: Optional[int],
+    max_pages: Optional[int],
+    revalidate: bool
+) -> List[Trail]:
+    """Crawl a park's listing pages and cache the trails (see search_trails_with_cache)."""
+    from alltrails_mcp.scraper import fetch_park_page, park_url
+    import requests
+    
     logger.info(f"Fetching fresh data for {park_slug}")
-    trails = search_trails_in_park(park_slug)
+    trails: List[Trail] = []
+    seen_urls = set()
+    # Listing page URLs already crawled, so a next-page link back to one of them ends the crawl
+    visited_pages = set()
+    url: Optional[str] = None
+    page_number = 1
+    complete = False
+    
+    while max_pages is None or page_number <= max_pages:
+        page = None if force_refresh or revalidate else cache.get_cached_page(park_slug, page_number)
+        if page is None:
+            # Expired pages are revalidated with their ETag / Last-Modified
+            validators = None if force_refresh else cache.get_page_validators(park_slug, page_number)
+            etag, last_modified = validators or (None, None)
+            try:
+                page = fetch_park_page(park_slug, page_number, url, etag, last_modified)
+            except requests.RequestException as e:
+                logger.error(f"Request error when fetching page {page_number} of {park_slug}: {e}")
+                break
+            
+            if page is None:
+                # 304 Not Modified - extend the cached copy without re-parsing
+                cache.touch_page(park_slug, page_number)
+                page = cache.get_cached_page(park_slug, page_number, allow_expired=True)
+                if page is None:
+                    break
+            elif page.trails:
+                cache.save_page(park_slug, page)
+        
+        visited_pages.update((url or park_url(park_slug), page.url))
+        for trail in page.trails:
+            if trail["url"] not in seen_urls:
+                seen_urls.add(trail["url"])
+                trails.append(Trail.from_dict(trail))
+        
+        if not page.trails or not page.next_url or page.next_url in visited_pages:
+            complete = True
+            break
+        if limit is not None and len(trails) >= limit:
+            break
+        
+        url = page.next_url
+        page_number += 1
+    
+    if limit is not None and len(trails) > limit:
+        trails = trails[:limit]
+        complete = False
     
     # Save to cache if we got results
     if trails:
-        cache.save_trails(park_slug, trails, limit=limit)
+        cache.save_trails(park_slug, trails, complete=complete)
     
     return trails
+
+
+def get_trail_details_with_cache(
+    slug: str,
+    cache: Optional[TrailCache] = None,
+    force_refresh: bool = False,
+    revalidate: bool = False
+) -> TrailDetail:
+    """
+    Get trail details with caching support.
+    
+    Expired details are revalidated with a conditional request; a 304 Not
+    Modified response just extends the cached copy. Only one worker fetches
+    a trail at a time, across every process sharing the cache.
+    
+    Args:
+        slug: Trail slug from AllTrails URL
+        cache: TrailCache instance (creates default if None)
+        force_refresh: If True, bypass cache and fetch fresh data
+        revalidate: If True, revalidate cached details with a conditional
+            request even if they have not expired yet
+        
+    Returns:
+        TrailDetail with detailed trail information (with an empty title and
+        the error as summary if the trail could not be fetched)
+    """
+    from alltrails_mcp.scraper import trail_url
+    from alltrails_mcp.upstream import DeadlineExceeded
+    
+    if cache is None:
+        cache = TrailCache()
+    
+    if not force_refresh and not revalidate:
+        cached_details = cache.get_cached_trail_details(slug)
+        if cached_details is not None:
+            return cached_details
+    
+    lease_key = f"trail:{slug}"
+    try:
+        lease, cached_details = _lease_or_wait(cache, lease_key, lambda: cache.get_cached_trail_details(slug))
+    except DeadlineExceeded as e:
+        # Reported like a failed fetch; callers fall back to an expired copy themselves
+        logger.warning(str(e))
+        return TrailDetail(title="", url=trail_url(slug), summary=f"Error fetching trail: {e}")
+    if lease is None:
+        # Another worker just fetched the trail
+        return cached_details
+    
+    try:
+        return _fetch_trail_details(slug, cache, force_refresh)
+    finally:
+        cache.release_lease(lease_key, lease)
+
+
+def _fetch_trail_details(slug: str, cache: TrailCache, force_refresh: bool) -> TrailDetail:
+    """Fetch a trail's details page and cache the details (see get_trail_details_with_cache)."""
+    from alltrails_mcp.scraper import fetch_trail_page, trail_url
+    import requests
+    
+    logger.info(f"Fetching fresh details for {slug}")
+    validators = None if force_refresh else cache.get_trail_details_validators(slug)
+    etag, last_modified = validators or (None, None)
+    url = trail_url(slug)
+    
+    try:
+        page = fetch_trail_page(slug, etag, last_modified)
+    except requests.RequestException as e:
+        logger.error(f"Request error when fetching {url}: {e}")
+        return TrailDetail(title="", url=url, summary=f"Error fetching trail: {e}")
+    except Exception as e:
+        logger.error(f"Unexpected error when parsing trail {slug}: {e}")
+        return TrailDetail(title="", url=url, summary=f"Error parsing trail: {e}")
+    
+    if page is None:
+        # 304 Not Modified - extend the cached copy without re-parsing
+        cache.touch_trail_details(slug)
+        cached_details = cache.get_cached_trail_details(slug, allow_expired=True)
+        if cached_details is not None:
+            return cached_details
+        return _fetch_trail_details(slug, cache, force_refresh=True)
+    
+    # Only cache successful lookups, not error placeholders
+    if page.details.title:
+        cache.save_trail_details(
+            slug,
+            page.details,
+            etag=page.etag,
+            last_modified=page.last_modified
+        )
+    
+    return page.details
+
+
+def get_trail_details_batch_with_cache(
+    slugs: List[str],
+    cache: Optional[TrailCache] = None,
+    force_refresh: bool = False,
+    max_workers: int = 4
+) -> List[TrailDetail]:
+    """
+    Get details for many trails, fetching cache misses concurrently.
+    
+    Cached trails are served straight away; the remaining trails are fetched
+    in a small thread pool. All fetches share the upstream rate limit (see
+    alltrails_mcp.upstream), so a large batch is spread out rather than
+    sent to AllTrails at once. Each distinct slug is fetched at most once.
+    The fetches keep the caller's request priority and deadline.
+    
+    Args:
+        slugs: Trail slugs
+        cache: TrailCache instance (creates default if None)
+        force_refresh: If True, bypass the cache for every trail
+        max_workers: Maximum number of trails fetched at once
+        
+    Returns:
+        List of TrailDetail records in the same order as slugs. Trails that
+        could not be fetched get an error placeholder (empty title, the error
+        as summary), as with get_trail_details_with_cache.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    if cache is None:
+        cache = TrailCache()
+    
+    results: Dict[str, TrailDetail] = {}
+    if not force_refresh:
+        for slug in slugs:
+            if slug not in results:
+                cached_details = cache.get_cached_trail_details(slug)
+                if cached_details is not None:
+                    results[slug] = cached_details
+    
+    misses = list(dict.fromkeys(slug for slug in slugs if slug not in results))
+    if misses:
+        logger.info(f"Fetching details for {len(misses)} of {len(slugs)} trails")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(misses)))) as executor:
+            # Each fetch runs in a copy of the caller's context (priority and deadline)
+            fetches = [
+                executor.submit(
+                    copy_context().run, get_trail_details_with_cache, slug, cache=cache, force_refresh=force_refresh
+                )
+                for slug in misses
+            ]
+            results.update(zip(misses, (fetch.result() for fetch in fetches)))
+    
+    return [results[slug] for slug in slugs]
+
+
+def _iter_with_cache(
+    keys: Iterable[str],
+    lookup: Callable[[str], Any],
+    fetch: Callable[[str], Any],
+    max_workers: int,
+    parse_workers: Optional[int] = None
+) -> Iterator[Tuple[str, Any, bool]]:
+    """
+    Look up keys in the cache and fetch the misses concurrently, yielding results as they complete.
+    
+    Keys are read lazily and at most 2 * max_workers fetches are queued at
+    once, so memory use does not grow with the number of keys. With
+    parse_workers, fetched pages are parsed in a ParserPool of that many
+    processes instead of in the fetch threads.
+    
+    Yields:
+        (key, result, whether it came from the cache), in completion order
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+    from alltrails_mcp.parallel import ParserPool, parse_with
+    
+    max_workers = max(1, max_workers)
+    pending: Dict[Any, str] = {}
+    parser_pool = ParserPool(parse_workers) if parse_workers else None
+    
+    def fetch_parsed(key: str) -> Any:
+        with parse_with(parser_pool):
+            return fetch(key)
+    
+    def completed(block: bool) -> Iterator[Tuple[str, Any, bool]]:
+        done, _ = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result(), False
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key in keys:
+                cached = lookup(key)
+                if cached is not None:
+                    yield key, cached, True
+                else:
+                    # Each fetch runs in a copy of the caller's context (priority and deadline)
+                    pending[executor.submit(copy_context().run, fetch_parsed, key)] = key
+                while len(pending) >= 2 * max_workers:
+                    yield from completed(block=True)
+                if pending:
+                    yield from completed(block=False)
+            while pending:
+                yield from completed(block=True)
+    finally:
+        if parser_pool is not None:
+            parser_pool.close()
+
+
+def iter_trail_details_with_cache(
+    slugs: Iterable[str],
+    cache: Optional[TrailCache] = None,
+    force_refresh: bool = False,
+    max_workers: int = 4,
+    parse_workers: Optional[int] = None
+) -> Iterator[Tuple[str, TrailDetail, bool]]:
+    """
+    Stream details for any number of trails, fetching cache misses concurrently.
+    
+    Unlike get_trail_details_batch_with_cache, slugs are consumed lazily and
+    each trail is yielded as soon as it is available, cached trails first,
+    so arbitrarily long inputs (e.g. read from stdin) run in constant memory.
+    Fetches share the upstream rate limit and keep the caller's request
+    priority and deadline.
+    
+    Args:
+        slugs: Trail slugs (any iterable, e.g. a generator)
+        cache: TrailCache instance (creates default if None)
+        force_refresh: If True, bypass the cache for every trail
+        max_workers: Maximum number of trails fetched at once
+        parse_workers: Parse fetched pages in this many processes (see
+            alltrails_mcp.parallel) instead of in the fetch threads
+        
+    Yields:
+        (slug, details, whether they came from the cache) in completion order.
+        Trails that could not be fetched get an error placeholder (empty
+        title, the error as summary), as with get_trail_details_with_cache.
+    """
+    if cache is None:
+        cache = TrailCache()
+    
+    def lookup(slug: str) -> Optional[TrailDetail]:
+        return None if force_refresh else cache.get_cached_trail_details(slug)
+    
+    def fetch(slug: str) -> TrailDetail:
+        return get_trail_details_with_cache(slug, cache=cache, force_refresh=force_refresh)
+    
+    return _iter_with_cache(slugs, lookup, fetch, max_workers, parse_workers)
+
+
+def iter_park_searches_with_cache(
+    park_slugs: Iterable[str],
+    cache: Optional[TrailCache] = None,
+    force_refresh: bool = False,
+    limit: Optional[int] = 15,
+    max_pages: Optional[int] = None,
+    max_workers: int = 4,
+    parse_workers: Optional[int] = None
+) -> Iterator[Tuple[str, List[Trail], bool]]:
+    """
+    Stream the trails of any number of parks, crawling cache misses concurrently.
+    
+    The streaming counterpart of search_trails_with_cache for many parks;
+    see iter_trail_details_with_cache.
+    
+    Args:
+        park_slugs: Park identifiers (any iterable, e.g. a generator)
+        cache: TrailCache instance (creates default if None)
+        force_refresh: If True, bypass the cache for every park
+        limit: Maximum number of trails per park (None for every page)
+        max_pages: Maximum number of listing pages to crawl per park
+        max_workers: Maximum number of parks crawled at once
+        parse_workers: Parse fetched pages in this many processes instead of
+            in the fetch threads
+        
+    Yields:
+        (park slug, trails, whether they came from the cache) in completion
+        order. Parks that could not be crawled get an empty list.
+    """
+    if cache is None:
+        cache = TrailCache()
+    
+    def lookup(park_slug: str) -> Optional[List[Trail]]:
+        return None if force_refresh else _cached_search(cache, park_slug, limit)
+    
+    def fetch(park_slug: str) -> List[Trail]:
+        try:
+            return search_trails_with_cache(
+                park_slug, cache=cache, force_refresh=force_refresh, limit=limit, max_pages=max_pages
+            )
+        except Exception as e:
+            logger.error(f"Error searching trails in {park_slug}: {e}")
+            return []
+    
+    return _iter_with_cache(park_slugs, lookup, fetch, max_workers, parse_workers)
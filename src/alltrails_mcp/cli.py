@@ -6,10 +6,31 @@ Allows direct searching and querying of trails without the MCP server.
 
 import sys
 import argparse
+import csv
+import json
 import logging
+import os
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import IO, Callable, Dict, Iterator, List
 
 from alltrails_mcp.scraper import search_trails_in_park, get_trail_by_slug
-from alltrails_mcp.cache import TrailCache, search_trails_with_cache, get_cache_days, set_cache_days, CONFIG_FILE
+from alltrails_mcp.cache import (
+    TrailCache,
+    search_trails_with_cache,
+    get_trail_details_with_cache,
+    iter_park_searches_with_cache,
+    iter_trail_details_with_cache,
+    get_cache_days,
+    set_cache_days,
+    is_archive_enabled,
+    set_archive_enabled,
+    CONFIG_FILE,
+)
+from alltrails_mcp.metrics import REGISTRY, metrics_port
+from alltrails_mcp.models import KM_PER_MILE, Difficulty, Trail, TrailDetail
+from alltrails_mcp.profiling import PROFILE_KINDS, Profiler, default_profile_dir, parse_kinds
 
 
 def setup_logging(verbose: bool = False):
@@ -21,25 +42,95 @@ def setup_logging(verbose: bool = False):
     )
 
 
+def has_trail_query(args) -> bool:
+    """Whether the search arguments filter or sort the trails."""
+    return any(value is not None for value in (
+        args.min_rating, args.max_length, args.difficulty, args.route_type, args.sort_by
+    ))
+
+
+def query_cached_trails(cache: TrailCache, park: str, args) -> list:
+    """Filter and sort a park's cached trails by the search arguments."""
+    return cache.query_trails(
+        park,
+        min_rating=args.min_rating,
+        max_length_km=args.max_length * KM_PER_MILE if args.max_length is not None else None,
+        difficulty=Difficulty[args.difficulty.upper()] if args.difficulty else None,
+        route_type=args.route_type,
+        sort_by=args.sort_by,
+        limit=args.limit
+    ) or []
+
+
+def print_trails(trails, args):
+    """Print a numbered list of trails."""
+    limit = args.limit or len(trails)
+    for i, trail in enumerate(trails[:limit], 1):
+        print(f"{i}. {trail['name']}")
+        if trail.get('difficulty'):
+            print(f"   Difficulty: {trail['difficulty']}")
+        if trail.get('length'):
+            print(f"   Length: {trail['length']}")
+        if trail.get('rating'):
+            print(f"   Rating: {trail['rating']}")
+        if trail.get('route_type'):
+            print(f"   Route Type: {trail['route_type']}")
+        if args.show_urls:
+            print(f"   URL: {trail['url']}")
+        if args.show_summary and trail.get('summary'):
+            summary = trail['summary'][:100] + "..." if len(trail['summary']) > 100 else trail['summary']
+            print(f"   Summary: {summary}")
+        print()
+    
+    if len(trails) > limit:
+        print(f"... and {len(trails) - limit} more trails.")
+
+
 def search_command(args):
     """Handle the search command."""
+    if args.from_file or args.format != 'text':
+        if args.from_file and args.park:
+            print("❌ Give either a park slug or --from-file, not both.")
+            return 1
+        if not args.from_file and not args.park:
+            print("❌ A park slug or --from-file is required.")
+            return 1
+        return search_batch_command(args)
+    if not args.park:
+        print("❌ A park slug or --from-file is required.")
+        return 1
+    
     print(f"\n{'='*80}")
     print(f"Searching for trails in: {args.park}")
     if not args.no_cache:
         print("Using cache (use --no-cache to bypass)")
     print(f"{'='*80}\n")
     
+    has_query = has_trail_query(args)
+    
     # Use cache by default unless --no-cache is specified
     if args.no_cache:
-        trails = search_trails_in_park(args.park)
+        if has_query:
+            print("❌ Filtering and sorting run against the cache and cannot be used with --no-cache.")
+            print("   Use --force-refresh to fetch fresh data instead.")
+            return 1
+        trails = search_trails_in_park(args.park, limit=args.limit, max_pages=args.max_pages)
     else:
+        # With a query, --limit is the top-k of the matches across the whole park, not the crawl size
+        crawl_limit = None if has_query else args.limit or 15
         cache = TrailCache()
         trails = search_trails_with_cache(
             args.park, 
             cache=cache, 
             force_refresh=args.force_refresh,
-            limit=15
+            limit=crawl_limit,
+            max_pages=args.max_pages
         )
+        if has_query and trails:
+            trails = query_cached_trails(cache, args.park, args)
+            if not trails:
+                print("❌ No trails match the given filters.")
+                return 1
     
     if not trails:
         print("❌ No trails found. Please check the park slug format.")
@@ -49,40 +140,152 @@ def search_command(args):
     print(f"✅ Found {len(trails)} trails!\n")
     
     # Display trails
-    limit = args.limit or len(trails)
-    for i, trail in enumerate(trails[:limit], 1):
-        print(f"{i}. {trail['name']}")
-        if trail.get('difficulty'):
-            print(f"   Difficulty: {trail['difficulty']}")
-        if trail.get('length'):
-            print(f"   Length: {trail['length']}")
-        if trail.get('rating'):
-            print(f"   Rating: {trail['rating']}")
-        if args.show_urls:
-            print(f"   URL: {trail['url']}")
-        if args.show_summary and trail.get('summary'):
-            summary = trail['summary'][:100] + "..." if len(trail['summary']) > 100 else trail['summary']
-            print(f"   Summary: {summary}")
-        print()
-    
-    if len(trails) > limit:
-        print(f"... and {len(trails) - limit} more trails.")
+    print_trails(trails, args)
     
     return 0
 
 
-def details_command(args):
-    """Handle the details command."""
-    print(f"\n{'='*80}")
-    print(f"Getting trail details for: {args.slug}")
-    print(f"{'='*80}\n")
+TRAIL_URL_PREFIX = "https://www.alltrails.com/trail/"
+PARK_URL_PREFIX = "https://www.alltrails.com/parks/"
+
+# Columns of the CSV output; nested values (trail stats) are written as JSON
+SEARCH_FIELDS = ["park"] + list(Trail._DICT_KEYS)
+DETAILS_FIELDS = ["slug"] + list(TrailDetail._DICT_KEYS)
+
+
+def iter_slugs(path: str, url_prefix: str = TRAIL_URL_PREFIX) -> Iterator[str]:
+    """
+    Read slugs from a file, one per line ('-' reads stdin), as they are needed.
     
-    trail = get_trail_by_slug(args.slug)
+    Blank lines and lines starting with '#' are skipped, and full AllTrails
+    URLs starting with url_prefix are accepted as well as slugs. The file is
+    opened straight away, so a missing file raises OSError here rather than
+    on the first slug.
+    """
+    source = sys.stdin if path == '-' else open(path)
     
-    if not trail or not trail.get('title'):
-        print("❌ Trail not found. Please check the trail slug.")
+    def slugs():
+        try:
+            for line in source:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith(url_prefix):
+                    line = line[len(url_prefix):]
+                yield line.strip('/')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+    
+    return slugs()
+
+
+def record_writer(output_format: str, fields: List[str], stream: IO[str]) -> Callable[[Dict], None]:
+    """
+    Create a function writing one record to a stream as an NDJSON line or CSV row.
+    
+    Args:
+        output_format: 'ndjson' or 'csv' (the CSV header is written straight away)
+        fields: CSV columns
+        stream: Output stream
+        
+    Returns:
+        Function taking a record dictionary
+    """
+    if output_format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=fields, extrasaction='ignore', lineterminator='\n')
+        writer.writeheader()
+        
+        def write_row(record: Dict):
+            writer.writerow({
+                key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                for key, value in record.items()
+            })
+        
+        return write_row
+    
+    def write_line(record: Dict):
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    return write_line
+
+
+def print_batch_summary(noun: str, counts: Counter, extra: str = ""):
+    """Print the cache hits, misses and errors of a batch to stderr."""
+    total = sum(counts.values())
+    print(
+        f"Processed {total} {noun}: {counts['hit']} cache hits, {counts['miss']} misses, "
+        f"{counts['error']} errors{extra}",
+        file=sys.stderr
+    )
+
+
+def _stdout_closed():
+    """Stop writing after the reader of stdout went away (e.g. `| head`)."""
+    # Python flushes stdout again at exit; point it at devnull so that does not fail too
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
+
+
+def search_batch_command(args):
+    """Handle the search command with --from-file or --format ndjson/csv."""
+    try:
+        parks = iter_slugs(args.from_file, PARK_URL_PREFIX) if args.from_file else iter([args.park])
+    except OSError as e:
+        print(f"❌ Could not read {args.from_file}: {e}")
+        return 1
+    
+    text = args.format == 'text'
+    has_query = has_trail_query(args)
+    crawl_limit = None if has_query else args.limit or 15
+    cache = TrailCache()
+    write = None if text else record_writer(args.format, SEARCH_FIELDS, sys.stdout)
+    counts: Counter = Counter()
+    trail_count = 0
+    
+    results = iter_park_searches_with_cache(
+        parks,
+        cache=cache,
+        force_refresh=args.force_refresh or args.no_cache,
+        limit=crawl_limit,
+        max_pages=args.max_pages,
+        max_workers=args.workers,
+        parse_workers=args.parse_workers
+    )
+    try:
+        for park, trails, cached in results:
+            if not trails:
+                counts['error'] += 1
+                print(f"❌ {park}: no trails found", file=sys.stderr)
+                continue
+            counts['hit' if cached else 'miss'] += 1
+            if has_query:
+                trails = query_cached_trails(cache, park, args)
+            trail_count += len(trails)
+            
+            if text:
+                print(f"{'='*80}\n{park}: {len(trails)} trails\n{'='*80}\n")
+                print_trails(trails, args)
+            else:
+                for trail in trails:
+                    write({"park": park, **trail.to_dict()})
+            sys.stdout.flush()
+    except BrokenPipeError:
+        _stdout_closed()
         return 1
+    finally:
+        results.close()
     
+    if not counts:
+        print("❌ No park slugs found in the input.", file=sys.stderr)
+        return 1
+    print_batch_summary("parks", counts, f", {trail_count} trails")
+    return 1 if counts['error'] else 0
+
+
+def print_trail_details(trail):
+    """Print the details of a single trail."""
     print(f"✅ Trail: {trail['title']}\n")
     print(f"URL: {trail['url']}")
     
@@ -101,6 +304,90 @@ def details_command(args):
         print(f"\nDescription:\n{trail['summary']}")
     
     print()
+
+
+def details_batch_command(args):
+    """Handle the details command with --from-file or --format ndjson/csv."""
+    try:
+        slugs = iter_slugs(args.from_file) if args.from_file else iter([args.slug])
+    except OSError as e:
+        print(f"❌ Could not read {args.from_file}: {e}")
+        return 1
+    
+    text = args.format == 'text'
+    if text:
+        print(f"\n{'='*80}")
+        print(f"Getting trail details for the trails in {'stdin' if args.from_file == '-' else args.from_file}")
+        print(f"{'='*80}\n")
+    write = None if text else record_writer(args.format, DETAILS_FIELDS, sys.stdout)
+    counts: Counter = Counter()
+    
+    results = iter_trail_details_with_cache(
+        slugs,
+        cache=TrailCache(),
+        force_refresh=args.force_refresh or args.no_cache,
+        max_workers=args.workers,
+        parse_workers=args.parse_workers
+    )
+    try:
+        for slug, trail, cached in results:
+            if not trail.get('title'):
+                counts['error'] += 1
+                # Keep error messages out of NDJSON / CSV output
+                print(f"❌ {slug}: {trail.get('summary') or 'Trail not found'}\n", file=sys.stdout if text else sys.stderr)
+                continue
+            counts['hit' if cached else 'miss'] += 1
+            
+            if text:
+                print_trail_details(trail)
+            else:
+                write({"slug": slug, **trail.to_dict()})
+            sys.stdout.flush()
+    except BrokenPipeError:
+        _stdout_closed()
+        return 1
+    finally:
+        results.close()
+    
+    if not counts:
+        print("❌ No trail slugs found in the input.", file=sys.stderr)
+        return 1
+    print_batch_summary("trails", counts)
+    return 1 if counts['error'] else 0
+
+
+def details_command(args):
+    """Handle the details command."""
+    if args.from_file or args.format != 'text':
+        if args.from_file and args.slug:
+            print("❌ Give either a trail slug or --from-file, not both.")
+            return 1
+        if not args.from_file and not args.slug:
+            print("❌ A trail slug or --from-file is required.")
+            return 1
+        return details_batch_command(args)
+    if not args.slug:
+        print("❌ A trail slug or --from-file is required.")
+        return 1
+    
+    print(f"\n{'='*80}")
+    print(f"Getting trail details for: {args.slug}")
+    print(f"{'='*80}\n")
+    
+    if args.no_cache:
+        trail = get_trail_by_slug(args.slug)
+    else:
+        trail = get_trail_details_with_cache(
+            args.slug,
+            cache=TrailCache(),
+            force_refresh=args.force_refresh
+        )
+    
+    if not trail or not trail.get('title'):
+        print("❌ Trail not found. Please check the trail slug.")
+        return 1
+    
+    print_trail_details(trail)
     return 0
 
 
@@ -123,7 +410,8 @@ def cache_command(args):
     print(f"📍 Location: {info['db_path']}")
     print(f"⏰ Cache Expiration: {info['cache_days']} days")
     print(f"🏞️  Parks Cached: {info['total_parks']}")
-    print(f"🥾 Total Trails: {info['total_trails']}\n")
+    print(f"🥾 Total Trails: {info['total_trails']}")
+    print(f"📄 Trail Details: {info['total_details']}\n")
     
     if info['parks']:
         print(f"{'Park':<50} {'Trails':<10} {'Age (days)':<12} {'Status'}")
@@ -138,8 +426,102 @@ def cache_command(args):
     return 0
 
 
+def stats_command(args):
+    """Handle the stats command."""
+    url = args.url
+    if url is None and metrics_port():
+        url = f"http://127.0.0.1:{metrics_port()}/metrics"
+    
+    if url is None:
+        # No server to ask: report what this process can measure, i.e. the cache database.
+        # The cache is held until rendered, as the gauges only watch it weakly
+        cache = TrailCache()
+        print("# No metrics endpoint given (--url or ALLTRAILS_METRICS_PORT); showing cache gauges only",
+              file=sys.stderr)
+        sys.stdout.write(REGISTRY.render())
+        return 0
+    
+    from urllib.error import URLError
+    from urllib.request import urlopen
+    
+    try:
+        with urlopen(url, timeout=10) as response:
+            sys.stdout.write(response.read().decode("utf-8"))
+    except (URLError, OSError) as e:
+        print(f"❌ Could not read metrics from {url}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def changes_command(args):
+    """Handle the changes command."""
+    cache = TrailCache()
+    since = datetime.fromisoformat(args.since) if args.since else datetime.now() - timedelta(days=args.days)
+    
+    print(f"\n{'='*80}")
+    print(f"📝 Trail changes since {since.isoformat(timespec='seconds')}")
+    print(f"{'='*80}\n")
+    
+    if args.summary:
+        summary = cache.get_change_summary(since)
+        if not summary:
+            print("No changes recorded.\n")
+            return 0
+        
+        print(f"{'Park':<50} {'Added':<8} {'Changed':<8} {'Removed':<8} {'Last change'}")
+        print(f"{'-'*50} {'-'*8} {'-'*8} {'-'*8} {'-'*19}")
+        for park in summary:
+            name = park['park_slug'] or "(trail details)"
+            print(f"{name:<50} {park['added']:<8} {park['changed']:<8} {park['removed']:<8} {park['last_change'][:19]}")
+        print()
+        return 0
+    
+    changes = cache.get_changes_since(since, park_slug=args.park, limit=args.limit)
+    if not changes:
+        print("No changes recorded.\n")
+        return 0
+    
+    symbols = {"added": "+", "removed": "-", "changed": "~"}
+    for change in changes:
+        print(f"{change['changed_at'][:19]}  {symbols[change['change']]} {change['trail_url']}")
+        for field, value in (change['fields'] or {}).items():
+            print(f"    {field}: {value}")
+    print(f"\n{len(changes)} changes\n")
+    return 0
+
+
+def reparse_command(args):
+    """Handle the reparse command."""
+    from alltrails_mcp.archive import PageArchive, reparse_archive
+    
+    archive = PageArchive()
+    info = archive.get_archive_info()
+    
+    print(f"\n{'='*80}")
+    print("♻️  Re-parsing archived pages (no network requests)")
+    print(f"{'='*80}\n")
+    print(f"📍 Archive: {info['db_path']}")
+    print(f"📄 Archived Pages: {info['total_pages']}\n")
+    
+    if not info['total_pages']:
+        print("❌ The archive is empty. Enable it with: alltrails-search config --archive on")
+        return 1
+    
+    counts = reparse_archive(cache=TrailCache(), archive=archive, park_slug=args.park)
+    
+    print(f"✅ Rebuilt {counts['parks']} parks from {counts['pages']} listing pages")
+    print(f"✅ Rebuilt {counts['details']} trail details\n")
+    return 0
+
+
 def config_command(args):
     """Handle the config command."""
+    if args.archive is not None:
+        set_archive_enabled(args.archive == 'on')
+        print(f"✅ Raw-page archive turned {args.archive}")
+        print(f"📍 Configuration saved to: {CONFIG_FILE}")
+        return 0
+    
     if args.set_cache_days is not None:
         if args.set_cache_days < 1:
             print("❌ Cache days must be at least 1")
@@ -156,7 +538,8 @@ def config_command(args):
     print("⚙️  Configuration")
     print(f"{'='*80}\n")
     print(f"📍 Config File: {CONFIG_FILE}")
-    print(f"⏰ Cache Expiration: {cache_days} days\n")
+    print(f"⏰ Cache Expiration: {cache_days} days")
+    print(f"🗄️  Raw-Page Archive: {'on' if is_archive_enabled() else 'off'}\n")
     
     return 0
 
@@ -174,23 +557,50 @@ Examples:
   # Limit results to top 5
   alltrails-search search us/california/yosemite-national-park --limit 5
   
+  # Crawl further listing pages to collect up to 100 trails
+  alltrails-search search us/california/yosemite-national-park --limit 100
+  
   # Show URLs and summaries
   alltrails-search search us/utah/zion-national-park --show-urls --show-summary
   
+  # Top 5 easy trails under 3 miles, best rated first
+  alltrails-search search us/utah/zion-national-park --difficulty easy --max-length 3 --sort-by rating -l 5
+  
   # Get details about a specific trail
   alltrails-search details us/tennessee/alum-cave-trail-to-mount-leconte
   
+  # Get details for a list of trails (one slug or URL per line)
+  alltrails-search details --from-file trails.txt
+  
+  # Export the trails of many parks as CSV (or NDJSON), streamed as each park completes
+  alltrails-search search --from-file parks.txt --format csv > trails.csv
+  cat parks.txt | alltrails-search search --from-file - --format ndjson --workers 8
+  
   # Show cache information
   alltrails-search cache
   
   # Clear the cache
   alltrails-search cache --clear
   
+  # Show metrics of a running MCP server (started with ALLTRAILS_METRICS_PORT=9464)
+  ALLTRAILS_METRICS_PORT=9464 alltrails-search stats
+  
   # View current configuration
   alltrails-search config
   
   # Set cache expiration to 14 days
   alltrails-search config --set-cache-days 14
+  
+  # Show trails that changed in the last 30 days, or which parks change most
+  alltrails-search changes --days 30
+  alltrails-search changes --summary
+  
+  # Profile a command (cProfile, sampled stacks of all threads, allocations)
+  alltrails-search details --from-file trails.txt --profile sample,memory
+  
+  # Archive raw pages, then rebuild the cache from them after a parser fix
+  alltrails-search config --archive on
+  alltrails-search reparse
 """
     )
     
@@ -202,19 +612,92 @@ Examples:
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
+    # Profiling options shared by every command
+    profile_parser = argparse.ArgumentParser(add_help=False)
+    profile_parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='cpu',
+        metavar='KINDS',
+        help=f"Profile the command: comma-separated {', '.join(PROFILE_KINDS)} (default: cpu)"
+    )
+    profile_parser.add_argument(
+        '--profile-dir',
+        metavar='DIR',
+        help='Directory for profile files (default: ALLTRAILS_PROFILE_DIR or the cache directory)'
+    )
+    
     # Search command
     search_parser = subparsers.add_parser(
         'search',
+        parents=[profile_parser],
         help='Search for trails in a park'
     )
     search_parser.add_argument(
         'park',
+        nargs='?',
         help="Park slug (e.g., 'us/tennessee/great-smoky-mountains-national-park')"
     )
+    search_parser.add_argument(
+        '--from-file',
+        metavar='PATH',
+        help="Read park slugs or URLs from a file, one per line ('-' for stdin)"
+    )
+    search_parser.add_argument(
+        '--format',
+        choices=['text', 'ndjson', 'csv'],
+        default='text',
+        help='Output format: text, or one NDJSON line / CSV row per trail (default: text)'
+    )
+    search_parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Parks crawled at once with --from-file (default: 4)'
+    )
+    search_parser.add_argument(
+        '--parse-workers',
+        type=int,
+        metavar='N',
+        help='Parse pages in N processes with --from-file (default: in the fetch threads)'
+    )
     search_parser.add_argument(
         '-l', '--limit',
         type=int,
-        help='Limit the number of results displayed'
+        help='Limit the number of results (further pages are crawled as needed)'
+    )
+    search_parser.add_argument(
+        '--max-pages',
+        type=int,
+        metavar='PAGES',
+        help='Maximum number of park listing pages to crawl'
+    )
+    search_parser.add_argument(
+        '--min-rating',
+        type=float,
+        metavar='RATING',
+        help='Only show trails rated at least this'
+    )
+    search_parser.add_argument(
+        '--max-length',
+        type=float,
+        metavar='MILES',
+        help='Only show trails at most this long, in miles'
+    )
+    search_parser.add_argument(
+        '--difficulty',
+        choices=['easy', 'moderate', 'hard'],
+        help='Only show trails of this difficulty'
+    )
+    search_parser.add_argument(
+        '--route-type',
+        choices=['loop', 'out & back', 'point to point'],
+        help='Only show trails of this route type'
+    )
+    search_parser.add_argument(
+        '--sort-by',
+        choices=['rating', 'length'],
+        help='Sort by rating (highest first) or length (shortest first)'
     )
     search_parser.add_argument(
         '--show-urls',
@@ -240,16 +723,52 @@ Examples:
     # Details command
     details_parser = subparsers.add_parser(
         'details',
+        parents=[profile_parser],
         help='Get detailed information about a specific trail'
     )
     details_parser.add_argument(
         'slug',
+        nargs='?',
         help="Trail slug (e.g., 'us/tennessee/alum-cave-trail-to-mount-leconte')"
     )
+    details_parser.add_argument(
+        '--from-file',
+        metavar='PATH',
+        help="Read trail slugs or URLs from a file, one per line ('-' for stdin)"
+    )
+    details_parser.add_argument(
+        '--format',
+        choices=['text', 'ndjson', 'csv'],
+        default='text',
+        help='Output format: text, or one NDJSON line / CSV row per trail (default: text)'
+    )
+    details_parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Trails fetched at once with --from-file (default: 4)'
+    )
+    details_parser.add_argument(
+        '--parse-workers',
+        type=int,
+        metavar='N',
+        help='Parse pages in N processes with --from-file (default: in the fetch threads)'
+    )
+    details_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass cache and fetch fresh data'
+    )
+    details_parser.add_argument(
+        '--force-refresh',
+        action='store_true',
+        help='Force refresh cached data (fetch new and update cache)'
+    )
     
     # Cache command
     cache_parser = subparsers.add_parser(
         'cache',
+        parents=[profile_parser],
         help='Show cache information and location'
     )
     cache_parser.add_argument(
@@ -258,9 +777,66 @@ Examples:
         help='Clear the entire cache'
     )
     
+    # Stats command
+    stats_parser = subparsers.add_parser(
+        'stats',
+        parents=[profile_parser],
+        help='Show cache and upstream metrics in Prometheus text format'
+    )
+    stats_parser.add_argument(
+        '--url',
+        help='Metrics endpoint of a running MCP server '
+             '(default: http://127.0.0.1:$ALLTRAILS_METRICS_PORT/metrics if set, '
+             'otherwise only the cache gauges are shown)'
+    )
+    
+    # Changes command
+    changes_parser = subparsers.add_parser(
+        'changes',
+        parents=[profile_parser],
+        help='Show trails added, changed or removed by cache refreshes'
+    )
+    changes_parser.add_argument(
+        '--since',
+        metavar='TIMESTAMP',
+        help="Only show changes after this ISO timestamp (e.g., '2025-06-01T00:00:00')"
+    )
+    changes_parser.add_argument(
+        '--days',
+        type=int,
+        default=7,
+        help='Only show changes from the last N days (default: 7, ignored with --since)'
+    )
+    changes_parser.add_argument(
+        '--park',
+        help='Only show changes for this park slug'
+    )
+    changes_parser.add_argument(
+        '-l', '--limit',
+        type=int,
+        help='Limit the number of changes displayed'
+    )
+    changes_parser.add_argument(
+        '--summary',
+        action='store_true',
+        help='Show change counts per park instead of individual changes'
+    )
+    
+    # Reparse command
+    reparse_parser = subparsers.add_parser(
+        'reparse',
+        parents=[profile_parser],
+        help='Rebuild the cache from archived pages without network requests'
+    )
+    reparse_parser.add_argument(
+        '--park',
+        help='Only rebuild this park slug'
+    )
+    
     # Config command
     config_parser = subparsers.add_parser(
         'config',
+        parents=[profile_parser],
         help='View or modify configuration settings'
     )
     config_parser.add_argument(
@@ -269,19 +845,42 @@ Examples:
         metavar='DAYS',
         help='Set cache expiration in days (e.g., --set-cache-days 14)'
     )
+    config_parser.add_argument(
+        '--archive',
+        choices=['on', 'off'],
+        help='Turn the compressed raw-page archive on or off'
+    )
     
     args = parser.parse_args()
     
     # Set up logging
     setup_logging(args.verbose)
     
-    # Execute command
+    profiler = None
+    if getattr(args, 'profile', None):
+        try:
+            profiler = Profiler(parse_kinds(args.profile), args.profile_dir or default_profile_dir())
+        except ValueError as e:
+            parser.error(str(e))
+    
+    with profiler.profile(args.command) if profiler is not None else nullcontext():
+        return run_command(parser, args)
+
+
+def run_command(parser: argparse.ArgumentParser, args) -> int:
+    """Run the selected subcommand."""
     if args.command == 'search':
         return search_command(args)
     elif args.command == 'details':
         return details_command(args)
     elif args.command == 'cache':
         return cache_command(args)
+    elif args.command == 'stats':
+        return stats_command(args)
+    elif args.command == 'changes':
+        return changes_command(args)
+    elif args.command == 'reparse':
+        return reparse_command(args)
     elif args.command == 'config':
         return config_command(args)
     else:
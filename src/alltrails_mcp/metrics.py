@@ -0,0 +1,404 @@
+"""
+Counters, histograms and gauges for cache and upstream health.
+
+The package records into one process-wide MetricsRegistry (REGISTRY):
+
+- MCP tool calls, their duration, and per tool whether the data came from
+  the cache (hit), from AllTrails (miss) or from expired cached data (stale)
+- TrailCache lookups per table: hit, miss, expired or stale
+- upstream requests by status, their latency, queue wait and bytes downloaded
+- HTML parse duration per page type
+- the upstream scheduler's queue depth and requests in flight
+- cache database size and entry counts
+
+REGISTRY.render() returns every metric in the Prometheus text exposition
+format. The MCP server serves it at http://127.0.0.1:PORT/metrics when
+ALLTRAILS_METRICS_PORT is set, and `alltrails-search stats` prints it.
+
+Metrics are plain in-memory numbers guarded by a lock per metric, so
+recording one costs about as much as a dictionary lookup. No Prometheus
+client library is needed.
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import weakref
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets in seconds (the Prometheus client's defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for fast in-process work such as parsing one page
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class of registered metrics: a family of series, one per label combination."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values) -> object:
+        """
+        Get the series for a combination of label values, creating it if needed.
+
+        Args:
+            *values: One value per label name, in order
+        """
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def _new_series(self) -> object:
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield (name suffix, formatted labels, value) for every sample."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class _CounterSeries:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self, lock: threading.Lock):
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1):
+        """Add to the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing count (e.g. requests, bytes)."""
+
+    kind = "counter"
+
+    def _new_series(self) -> _CounterSeries:
+        return _CounterSeries(self._lock)
+
+    def inc(self, amount: float = 1):
+        """Add to an unlabelled counter."""
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, series in list(self._series.items()):
+            yield "", _format_labels(self.labelnames, key), series.value
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...], lock: threading.Lock):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = lock
+
+    def observe(self, value: float):
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations (e.g. durations) counted into cumulative buckets, with their sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self) -> _HistogramSeries:
+        return _HistogramSeries(self.buckets, self._lock)
+
+    def observe(self, value: float):
+        """Record one observation in an unlabelled histogram."""
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, series in list(self._series.items()):
+            with self._lock:
+                counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield "_sum", _format_labels(self.labelnames, key), total
+            yield "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class Gauge(_Metric):
+    """
+    Values read when the metrics are rendered (e.g. queue depth, database size).
+
+    A collect function returns the current value of every series as a
+    mapping from label values to value.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._collectors: List[Callable[[], Optional[Dict[Tuple[str, ...], float]]]] = []
+
+    def add_collector(self, collect: Callable[[], Optional[Dict[Tuple[str, ...], float]]]):
+        """
+        Add a function reporting series of this gauge.
+
+        Args:
+            collect: Returns {label values: value}, or None once it has nothing
+                to report any more (it is then dropped)
+        """
+        with self._lock:
+            self._collectors.append(collect)
+
+    def _samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            collectors = list(self._collectors)
+        for collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Could not collect {self.name}: {e}")
+                continue
+            if values is None:
+                with self._lock:
+                    if collect in self._collectors:
+                        self._collectors.remove(collect)
+                continue
+            for key, value in values.items():
+                yield "", _format_labels(self.labelnames, key), value
+
+
+class MetricsRegistry:
+    """A set of named metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register a counter."""
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Register a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Register a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+TOOL_CALLS = REGISTRY.counter(
+    "alltrails_tool_calls_total", "MCP tool calls by tool and outcome (ok or error)", ["tool", "outcome"]
+)
+TOOL_CALL_SECONDS = REGISTRY.histogram(
+    "alltrails_tool_call_seconds", "Duration of MCP tool calls", ["tool"]
+)
+TOOL_CACHE_RESULTS = REGISTRY.counter(
+    "alltrails_tool_cache_results_total",
+    "Where tool calls got their data: hit (cache), miss (fetched from AllTrails) or stale (expired cache)",
+    ["tool", "result"]
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "alltrails_cache_lookups_total",
+    "TrailCache lookups by table and result (hit, miss, expired, or stale when expired data was allowed)",
+    ["table", "result"]
+)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "alltrails_upstream_requests_total",
+    "Requests to AllTrails by HTTP status (or timeout / error when no response arrived)",
+    ["status"]
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "alltrails_upstream_request_seconds", "Latency of requests to AllTrails, from sending to the last byte", ["priority"]
+)
+UPSTREAM_QUEUE_SECONDS = REGISTRY.histogram(
+    "alltrails_upstream_queue_wait_seconds", "Time requests waited for the upstream scheduler", ["priority"]
+)
+UPSTREAM_BYTES = REGISTRY.counter(
+    "alltrails_upstream_bytes_total", "Response bytes downloaded from AllTrails"
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "alltrails_parse_seconds", "Time spent parsing AllTrails pages", ["page"], buckets=FAST_BUCKETS
+)
+UPSTREAM_QUEUE_DEPTH = REGISTRY.gauge(
+    "alltrails_upstream_queue_depth", "Requests waiting for the upstream scheduler", ["priority"]
+)
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "alltrails_upstream_in_flight", "Requests to AllTrails in flight", ["priority"]
+)
+CACHE_DB_BYTES = REGISTRY.gauge(
+    "alltrails_cache_db_bytes", "Size of the cache database, including its write-ahead log", ["path"]
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "alltrails_cache_entries", "Entries in the cache database by table and state (fresh or expired)",
+    ["path", "table", "state"]
+)
+
+
+def _collect_scheduler(field: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    def collect() -> Dict[Tuple[str, ...], float]:
+        from alltrails_mcp.upstream import get_scheduler
+
+        return {(priority,): stats[field] for priority, stats in get_scheduler().stats().items()}
+    return collect
+
+
+UPSTREAM_QUEUE_DEPTH.add_collector(_collect_scheduler("waiting"))
+UPSTREAM_IN_FLIGHT.add_collector(_collect_scheduler("in_flight"))
+
+
+def watch_cache(cache) -> None:
+    """
+    Report a TrailCache's database size and entry counts in the gauges.
+
+    The cache is held weakly, so watching it does not keep it alive.
+
+    Args:
+        cache: TrailCache to report on
+    """
+    ref = weakref.ref(cache)
+    path = str(cache.db_path)
+
+    def collect_size() -> Optional[Dict[Tuple[str, ...], float]]:
+        if ref() is None:
+            return None
+        size = sum(
+            os.path.getsize(file) for file in (path, path + "-wal") if os.path.exists(file)
+        )
+        return {(path,): size}
+
+    def collect_entries() -> Optional[Dict[Tuple[str, ...], float]]:
+        cache = ref()
+        if cache is None:
+            return None
+        return {
+            (path, table, state): count
+            for (table, state), count in cache.get_entry_counts().items()
+        }
+
+    CACHE_DB_BYTES.add_collector(collect_size)
+    CACHE_ENTRIES.add_collector(collect_entries)
+
+
+def metrics_port() -> Optional[int]:
+    """Port of the local metrics endpoint, from ALLTRAILS_METRICS_PORT (None if unset)."""
+    value = os.getenv("ALLTRAILS_METRICS_PORT", "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid ALLTRAILS_METRICS_PORT value: {value}")
+        return None
+
+
+def start_http_server(port: int, host: str = "127.0.0.1"):
+    """
+    Serve REGISTRY at http://host:port/metrics from a background thread.
+
+    Args:
+        port: TCP port
+        host: Interface to listen on (local only by default)
+
+    Returns:
+        The running http.server.ThreadingHTTPServer
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="alltrails-metrics", daemon=True).start()
+    logger.info(f"Serving metrics at http://{host}:{port}/metrics")
+    return server
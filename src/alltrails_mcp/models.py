@@ -0,0 +1,322 @@
+"""
+Compact trail records with parsed numeric fields.
+
+The scraper extracts display strings such as "2.4 mi", "1,850 ft" and "4.5".
+Trail and TrailDetail parse them once, when a trail enters the package, into
+numeric fields (length_km, elevation_gain_m, rating) and a Difficulty enum,
+so sorting and filtering never re-run the regexes. The original display
+strings are kept for rendering.
+
+Both records use __slots__ to keep large in-memory result sets small, and
+support read-only dictionary access (record["name"], record.get("rating"))
+with the same keys and display strings as the scraper's dictionaries, so
+existing code that treats trails as dicts keeps working.
+"""
+
+import re
+from enum import IntEnum
+from typing import Any, Dict, Optional
+
+KM_PER_MILE = 1.609344
+M_PER_FOOT = 0.3048
+
+_LENGTH_RE = re.compile(r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*(mi|miles?|km|kilometers?)\b', re.I)
+_ELEVATION_RE = re.compile(r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*(ft|feet|m|meters?)\b', re.I)
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
+class Difficulty(IntEnum):
+    """Trail difficulty, ordered from easiest to hardest."""
+
+    UNKNOWN = 0
+    EASY = 1
+    MODERATE = 2
+    HARD = 3
+
+    @classmethod
+    def parse(cls, text: Optional[str]) -> "Difficulty":
+        """
+        Parse a difficulty label such as "Easy" or "Moderate".
+
+        Example:
+            >>> Difficulty.parse("moderate")
+            <Difficulty.MODERATE: 2>
+        """
+        text = (text or "").lower()
+        if "easy" in text:
+            return cls.EASY
+        if "moderate" in text:
+            return cls.MODERATE
+        if "hard" in text or "strenuous" in text:
+            return cls.HARD
+        return cls.UNKNOWN
+
+
+def parse_length_km(text: Optional[str]) -> Optional[float]:
+    """Parse a length such as "2.4 mi" or "5 km" into kilometers."""
+    match = _LENGTH_RE.search(text or "")
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    if match.group(2).lower().startswith("mi"):
+        value *= KM_PER_MILE
+    return round(value, 3)
+
+
+def parse_elevation_m(text: Optional[str]) -> Optional[float]:
+    """Parse an elevation such as "1,850 ft" or "560 m" into meters."""
+    match = _ELEVATION_RE.search(text or "")
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    if match.group(2).lower().startswith("f"):
+        value *= M_PER_FOOT
+    return round(value, 1)
+
+
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """Parse a rating such as "4.5" into a float."""
+    match = _NUMBER_RE.search(text or "")
+    return float(match.group(0)) if match else None
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class _Record:
+    """Read-only dictionary access for slotted records."""
+
+    __slots__ = ()
+
+    # Dictionary key -> attribute name, in to_dict() order
+    _DICT_KEYS: Dict[str, str] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            attr = self._DICT_KEYS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        value = getattr(self, attr)
+        return int(value) if key == "difficulty_level" else value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._DICT_KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._DICT_KEYS else default
+
+    def keys(self):
+        return self._DICT_KEYS.keys()
+
+    def to_dict(self) -> Dict:
+        """Get the record as a dictionary in the scraper's format plus normalized fields."""
+        return {key: self[key] for key in self._DICT_KEYS}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Trail(_Record):
+    """
+    A trail from a park listing.
+
+    Attributes:
+        name: Trail name
+        url: AllTrails URL of the trail
+        summary: Short description
+        difficulty: Parsed difficulty
+        difficulty_text: Difficulty as displayed (e.g., "Moderate")
+        length: Length as displayed (e.g., "2.4 mi")
+        length_km: Length in kilometers, or None if unknown
+        rating: Rating as a float, or None if unknown
+        rating_text: Rating as displayed (e.g., "4.5")
+        route_type: Route type (e.g., "Loop"), or "" if unknown
+
+    Dictionary access uses the scraper's keys, where "difficulty", "length" and
+    "rating" are the display strings, plus the normalized "difficulty_level",
+    "length_km" and "rating_value".
+    """
+
+    __slots__ = (
+        "name", "url", "summary", "difficulty", "difficulty_text",
+        "length", "length_km", "rating", "rating_text", "route_type",
+    )
+
+    _DICT_KEYS = {
+        "name": "name",
+        "url": "url",
+        "summary": "summary",
+        "difficulty": "difficulty_text",
+        "length": "length",
+        "rating": "rating_text",
+        "route_type": "route_type",
+        "difficulty_level": "difficulty",
+        "length_km": "length_km",
+        "rating_value": "rating",
+    }
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        summary: str = "",
+        difficulty_text: str = "",
+        length: str = "",
+        rating_text: str = "",
+        route_type: str = "",
+        difficulty: Optional[Difficulty] = None,
+        length_km: Optional[float] = None,
+        rating: Optional[float] = None
+    ):
+        self.name = name
+        self.url = url
+        self.summary = summary
+        self.difficulty_text = difficulty_text
+        self.length = length
+        self.rating_text = rating_text
+        self.route_type = route_type
+        self.difficulty = difficulty if difficulty is not None else Difficulty.parse(difficulty_text)
+        self.length_km = length_km
+        self.rating = rating
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Trail":
+        """
+        Build a trail from a scraper or cache dictionary.
+
+        Numeric fields already present in the dictionary (as stored by
+        to_dict) are reused; otherwise they are parsed from the display strings.
+        """
+        length = data.get("length") or ""
+        rating_text = data.get("rating") or ""
+        difficulty_text = data.get("difficulty") or ""
+        return cls(
+            name=data.get("name", ""),
+            url=data.get("url", ""),
+            summary=data.get("summary") or "",
+            difficulty_text=difficulty_text,
+            length=length,
+            rating_text=rating_text,
+            route_type=data.get("route_type") or "",
+            difficulty=(Difficulty(data["difficulty_level"]) if "difficulty_level" in data
+                        else Difficulty.parse(difficulty_text)),
+            length_km=(_optional_float(data["length_km"]) if "length_km" in data
+                       else parse_length_km(length)),
+            rating=(_optional_float(data["rating_value"]) if "rating_value" in data
+                    else parse_rating(rating_text))
+        )
+
+
+class TrailDetail(_Record):
+    """
+    Detailed information about a single trail.
+
+    Attributes:
+        title: Trail title
+        url: AllTrails URL of the trail
+        summary: Description
+        difficulty: Parsed difficulty
+        difficulty_text: Difficulty as displayed
+        length: Length as displayed
+        length_km: Length in kilometers, or None if unknown
+        elevation_gain: Elevation gain as displayed (e.g., "1,850 ft")
+        elevation_gain_m: Elevation gain in meters, or None if unknown
+        route_type: Route type (e.g., "Loop", "Out & back")
+        rating: Rating as a float, or None if unknown
+        rating_text: Rating as displayed
+        stats: Raw stats extracted from the page
+
+    Dictionary access uses the scraper's keys, like Trail.
+    """
+
+    __slots__ = (
+        "title", "url", "summary", "difficulty", "difficulty_text",
+        "length", "length_km", "elevation_gain", "elevation_gain_m",
+        "route_type", "rating", "rating_text", "stats",
+    )
+
+    _DICT_KEYS = {
+        "title": "title",
+        "summary": "summary",
+        "length": "length",
+        "elevation_gain": "elevation_gain",
+        "route_type": "route_type",
+        "difficulty": "difficulty_text",
+        "rating": "rating_text",
+        "url": "url",
+        "stats": "stats",
+        "difficulty_level": "difficulty",
+        "length_km": "length_km",
+        "elevation_gain_m": "elevation_gain_m",
+        "rating_value": "rating",
+    }
+
+    def __init__(
+        self,
+        title: str,
+        url: str,
+        summary: str = "",
+        difficulty_text: str = "",
+        length: str = "",
+        elevation_gain: str = "",
+        route_type: str = "",
+        rating_text: str = "",
+        stats: Optional[Dict] = None,
+        difficulty: Optional[Difficulty] = None,
+        length_km: Optional[float] = None,
+        elevation_gain_m: Optional[float] = None,
+        rating: Optional[float] = None
+    ):
+        self.title = title
+        self.url = url
+        self.summary = summary
+        self.difficulty_text = difficulty_text
+        self.length = length
+        self.elevation_gain = elevation_gain
+        self.route_type = route_type
+        self.rating_text = rating_text
+        self.stats = stats or {}
+        self.difficulty = difficulty if difficulty is not None else Difficulty.parse(difficulty_text)
+        self.length_km = length_km
+        self.elevation_gain_m = elevation_gain_m
+        self.rating = rating
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TrailDetail":
+        """
+        Build trail details from a scraper or cache dictionary.
+
+        Numeric fields already present in the dictionary are reused; otherwise
+        they are parsed from the display strings.
+        """
+        length = data.get("length") or ""
+        elevation_gain = data.get("elevation_gain") or ""
+        rating_text = data.get("rating") or ""
+        difficulty_text = data.get("difficulty") or ""
+        return cls(
+            title=data.get("title", ""),
+            url=data.get("url", ""),
+            summary=data.get("summary") or "",
+            difficulty_text=difficulty_text,
+            length=length,
+            elevation_gain=elevation_gain,
+            route_type=data.get("route_type") or "",
+            rating_text=rating_text,
+            stats=data.get("stats"),
+            difficulty=(Difficulty(data["difficulty_level"]) if "difficulty_level" in data
+                        else Difficulty.parse(difficulty_text)),
+            length_km=(_optional_float(data["length_km"]) if "length_km" in data
+                       else parse_length_km(length)),
+            elevation_gain_m=(_optional_float(data["elevation_gain_m"]) if "elevation_gain_m" in data
+                              else parse_elevation_m(elevation_gain)),
+            rating=(_optional_float(data["rating_value"]) if "rating_value" in data
+                    else parse_rating(rating_text))
+        )
@@ -0,0 +1,115 @@
+"""
+Multi-process parsing stage for bulk crawls.
+
+BeautifulSoup parsing is CPU-bound and holds the GIL, so fetch threads that
+also parse keep only one core busy and leave the network idle meanwhile.
+A ParserPool runs the scraper's extraction code in worker processes instead:
+
+    with ParserPool(4) as pool, parse_with(pool):
+        search_trails_with_cache(park_slug)   # pages are parsed in the pool
+
+Inside parse_with() the scraper's fetch_park_page / fetch_trail_page hand
+the downloaded HTML to the pool and wait for the result, so everything
+else (cache, revalidation, fetch leases, the upstream scheduler) works as
+usual. The pool is held in a context variable, so it follows the current
+thread or asyncio task; iter_park_searches_with_cache and
+iter_trail_details_with_cache take parse_workers to use one for their
+fetch threads (`alltrails-search ... --parse-workers N`).
+
+Only the compact result dictionaries travel back from the parser workers,
+never BeautifulSoup trees. Parse timings of the workers are not part of
+this process's metrics.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+
+def _parse_park_job(html: str, url: str) -> Dict:
+    """Parser worker entry point for park listing pages."""
+    from alltrails_mcp.scraper import parse_park_page
+
+    trails, next_url = parse_park_page(html, url)
+    return {"url": url, "trails": trails, "next_url": next_url}
+
+
+def _parse_trail_job(html: str, url: str, slug: str) -> Dict:
+    """Parser worker entry point for trail detail pages."""
+    from alltrails_mcp.scraper import parse_trail_page
+
+    return parse_trail_page(html, url, slug)
+
+
+_parser_pool: ContextVar[Optional["ParserPool"]] = ContextVar("alltrails_parser_pool", default=None)
+
+
+def current_parser_pool() -> Optional["ParserPool"]:
+    """Get the parser pool pages fetched in the current context are parsed in, if any."""
+    return _parser_pool.get()
+
+
+@contextmanager
+def parse_with(pool: Optional["ParserPool"]) -> Iterator[None]:
+    """Parse pages fetched inside the block in the given pool (None parses in the fetching thread)."""
+    token = _parser_pool.set(pool)
+    try:
+        yield
+    finally:
+        _parser_pool.reset(token)
+
+
+class ParserPool:
+    """
+    Process pool running the scraper's extraction code on fetched HTML.
+
+    Example:
+        >>> with ParserPool() as pool:
+        ...     future = pool.submit_park_page(html, url)
+        ...     trails = future.result()["trails"]
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize the parser pool.
+
+        Args:
+            max_workers: Number of parser processes. Defaults to the CPU count.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Workers start on demand from fetch threads; forking a process that runs
+        # other threads (cache, sessions) can deadlock, so they are spawned fresh
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit_park_page(self, html: str, url: str) -> Future:
+        """
+        Queue a park listing page for parsing.
+
+        Returns:
+            Future resolving to {"url", "trails", "next_url"}
+        """
+        return self._executor.submit(_parse_park_job, html, url)
+
+    def submit_trail_page(self, html: str, url: str, slug: str) -> Future:
+        """
+        Queue a trail detail page for parsing.
+
+        Returns:
+            Future resolving to the trail details dictionary
+        """
+        return self._executor.submit(_parse_trail_job, html, url, slug)
+
+    def close(self):
+        """Shut down the parser processes."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ParserPool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
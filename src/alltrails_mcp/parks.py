@@ -6,7 +6,8 @@ for use with the AllTrails scraper.
 """
 
 from enum import Enum
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Tuple
 
 
 class NationalPark(Enum):
@@ -209,3 +210,23 @@ def list_parks() -> Dict[str, str]:
         'us/california/yosemite-national-park'
     """
     return {park.name: park.value for park in NationalPark}
+
+
+@lru_cache(maxsize=None)
+def park_directory() -> Tuple[Tuple[str, str], ...]:
+    """
+    Get all parks as display names and slugs, sorted by name.
+    
+    The result is computed once and shared, so it is an immutable tuple.
+    
+    Returns:
+        Tuple of (display name, slug) pairs
+        
+    Example:
+        >>> park_directory()[0]
+        ('Acadia', 'us/maine/acadia-national-park')
+    """
+    return tuple(
+        (park.name.replace('_', ' ').title(), park.value)
+        for park in sorted(NationalPark, key=lambda park: park.name)
+    )
@@ -0,0 +1,199 @@
+"""
+Background prefetching of trail details after a park search.
+
+After search_trails returns a park listing, agents usually ask for details on
+a few of the top trails next. When prefetching is enabled, the MCP server
+hands the top trails of each listing to a Prefetcher, which fetches their
+detail pages in one background thread and stores them in the detail cache, so
+the follow-up get_trail_details calls are cache hits.
+
+Prefetching is opt-in and bounded:
+
+- ALLTRAILS_PREFETCH: trails prefetched per search (default 0, disabled)
+- ALLTRAILS_PREFETCH_BUDGET: detail pages prefetched per hour (default 30)
+
+Prefetches are background requests to the upstream scheduler, so they never
+hold up an interactive tool call, and the queue is dropped as soon as the
+upstream circuit breaker opens (see alltrails_mcp.upstream).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterable, Optional, Set
+
+from alltrails_mcp.cache import TrailCache, get_trail_details_with_cache
+from alltrails_mcp.tracing import span
+from alltrails_mcp.upstream import CircuitBreaker, Priority, get_circuit_breaker, request_priority
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_BUDGET = 30
+BUDGET_WINDOW_SECONDS = 3600
+
+
+class Prefetcher:
+    """
+    Fetches trail details into the cache in a background thread.
+
+    Example:
+        >>> prefetcher = Prefetcher(TrailCache(), top_n=3)
+        >>> prefetcher.submit(["us/utah/angels-landing-trail", "us/utah/the-narrows"])
+        2
+    """
+
+    def __init__(
+        self,
+        cache: TrailCache,
+        top_n: int,
+        budget: int = DEFAULT_PREFETCH_BUDGET,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            cache: TrailCache the details are stored in
+            top_n: Maximum number of trails queued per submit() call
+            budget: Maximum number of detail pages fetched per hour
+            breaker: Circuit breaker to watch (defaults to the shared one)
+        """
+        self.cache = cache
+        self.top_n = top_n
+        self.budget = budget
+        self.breaker = breaker or get_circuit_breaker()
+        self._queue: Deque[str] = deque()
+        self._queued: Set[str] = set()
+        self._fetched_at: Deque[float] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, slugs: Iterable[str]) -> int:
+        """
+        Queue the first top_n trails for prefetching.
+
+        Trails that are already queued are skipped, and trails found in the
+        cache are skipped by the worker without using the budget. Nothing is
+        queued while the upstream circuit is open.
+
+        Args:
+            slugs: Trail slugs, best first
+
+        Returns:
+            Number of trails queued
+        """
+        if self.breaker.is_open:
+            return 0
+
+        queued = 0
+        with self._condition:
+            for slug in list(slugs)[:self.top_n]:
+                if slug in self._queued:
+                    continue
+                self._queue.append(slug)
+                self._queued.add(slug)
+                queued += 1
+            if queued:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="alltrails-prefetch", daemon=True)
+                    self._thread.start()
+                self._condition.notify()
+        if queued:
+            logger.info(f"Queued {queued} trails for prefetching")
+        return queued
+
+    def cancel(self) -> int:
+        """
+        Drop every queued prefetch.
+
+        Returns:
+            Number of trails dropped
+        """
+        with self._condition:
+            dropped = len(self._queue)
+            self._queue.clear()
+            self._queued.clear()
+        return dropped
+
+    @property
+    def pending(self) -> int:
+        """Number of trails waiting to be prefetched."""
+        with self._condition:
+            return len(self._queue)
+
+    def _take_budget(self) -> bool:
+        """Use one fetch from the hourly budget, if any is left."""
+        now = time.monotonic()
+        while self._fetched_at and now - self._fetched_at[0] >= BUDGET_WINDOW_SECONDS:
+            self._fetched_at.popleft()
+        if len(self._fetched_at) >= self.budget:
+            return False
+        self._fetched_at.append(now)
+        return True
+
+    def _run(self):
+        with request_priority(Priority.BACKGROUND):
+            self._process_queue()
+
+    def _process_queue(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                slug = self._queue[0]
+
+            if self.cache.get_cached_trail_details(slug) is not None:
+                self._done(slug)
+                continue
+            if self.breaker.is_open:
+                logger.info(f"Upstream circuit open; cancelled {self.cancel()} prefetches")
+                continue
+            if not self._take_budget():
+                logger.info(f"Prefetch budget of {self.budget}/hour used up; dropped {self.cancel()} prefetches")
+                continue
+
+            try:
+                with span("prefetch", slug=slug):
+                    details = get_trail_details_with_cache(slug, cache=self.cache)
+                if details.title:
+                    logger.info(f"Prefetched details for {slug}")
+            except Exception as e:
+                logger.error(f"Error prefetching {slug}: {e}")
+            finally:
+                self._done(slug)
+
+    def _done(self, slug: str):
+        """Remove a processed trail from the queue (unless the queue was cancelled meanwhile)."""
+        with self._condition:
+            if self._queue and self._queue[0] == slug:
+                self._queue.popleft()
+            self._queued.discard(slug)
+
+
+def prefetch_count() -> int:
+    """Trails to prefetch per search, from ALLTRAILS_PREFETCH (0 if disabled)."""
+    try:
+        return max(0, int(os.getenv("ALLTRAILS_PREFETCH", "0")))
+    except ValueError:
+        logger.warning("Ignoring invalid ALLTRAILS_PREFETCH value")
+        return 0
+
+
+def create_prefetcher(cache: TrailCache) -> Optional[Prefetcher]:
+    """
+    Create a prefetcher configured from the environment.
+
+    Args:
+        cache: TrailCache the details are stored in
+
+    Returns:
+        Prefetcher, or None if prefetching is disabled
+    """
+    top_n = prefetch_count()
+    if not top_n:
+        return None
+    budget = int(os.getenv("ALLTRAILS_PREFETCH_BUDGET", str(DEFAULT_PREFETCH_BUDGET)))
+    logger.info(f"Prefetching details for the top {top_n} trails of each search ({budget}/hour)")
+    return Prefetcher(cache, top_n=top_n, budget=budget)
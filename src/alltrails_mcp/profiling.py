@@ -0,0 +1,265 @@
+"""
+Opt-in CPU and memory profiling of CLI commands and MCP tool calls.
+
+A Profiler wraps a command or tool call and writes what it captured to
+files for the usual viewers:
+
+- "cpu": a cProfile profile of the calling thread (NAME.prof), for
+  `python -m pstats`, snakeviz or similar
+- "sample": stacks of every thread sampled every few milliseconds, as
+  collapsed stacks (NAME.folded) for speedscope or flamegraph.pl. Unlike
+  cProfile this sees the worker threads fetches and parses run in, at a
+  small fraction of the overhead.
+- "memory": a tracemalloc snapshot of the memory allocated during the call
+  and still held at its end (NAME.tracemalloc, see
+  tracemalloc.Snapshot.load), plus its top allocation sites and the peak
+  (NAME.memory.txt)
+
+`alltrails-search <command> --profile [KINDS]` profiles one command. The MCP
+server profiles tool calls when ALLTRAILS_PROFILE is set:
+
+- ALLTRAILS_PROFILE: comma-separated kinds, e.g. "sample" or "cpu,memory"
+- ALLTRAILS_PROFILE_EVERY: profile every Nth tool call (default 1, every call)
+- ALLTRAILS_PROFILE_DIR: where files are written (default: a "profiles"
+  folder in the cache directory)
+
+Only one call is profiled at a time; calls that start while another is being
+profiled run unprofiled. Tool calls that overlap a profiled call show up in
+its CPU and sample profiles too.
+"""
+
+import cProfile
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KINDS = ("cpu", "sample", "memory")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+MEMORY_TOP_SITES = 25
+TRACEMALLOC_FRAMES = 5
+
+
+class _StackSampler:
+    """Samples the stacks of all threads from a background thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alltrails-profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class Profiler:
+    """
+    Profiles selected calls and writes the results to files.
+
+    Example:
+        >>> profiler = Profiler(["sample", "memory"], "/tmp/profiles", every=10)
+        >>> with profiler.profile("search_trails"):
+        ...     handle_search()
+    """
+
+    def __init__(
+        self,
+        kinds: Iterable[str],
+        output_dir: Path,
+        every: int = 1,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            kinds: What to capture: "cpu", "sample" and/or "memory"
+            output_dir: Directory the profile files are written to
+            every: Profile every Nth call (1 profiles every call)
+            sample_interval: Seconds between stack samples
+
+        Raises:
+            ValueError: If a kind is not supported
+        """
+        self.kinds = list(dict.fromkeys(kinds))
+        unknown = [kind for kind in self.kinds if kind not in PROFILE_KINDS]
+        if unknown or not self.kinds:
+            raise ValueError(f"Unsupported profile kind {unknown}. Use some of: {', '.join(PROFILE_KINDS)}")
+        self.output_dir = Path(output_dir)
+        self.every = max(1, every)
+        self.sample_interval = sample_interval
+        self._calls = itertools.count()
+        self._busy = threading.Lock()
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[Optional[Path]]:
+        """
+        Context manager profiling its body, if this call is selected.
+
+        Args:
+            name: Name of the command or tool, used in the file names
+
+        Yields:
+            Path prefix of the files being written, or None if the call is not profiled
+        """
+        index = next(self._calls)
+        if index % self.every or not self._busy.acquire(blocking=False):
+            yield None
+            return
+
+        try:
+            prefix = self._prefix(name, index)
+            cpu = cProfile.Profile() if "cpu" in self.kinds else None
+            sampler = _StackSampler(self.sample_interval) if "sample" in self.kinds else None
+            trace_memory = "memory" in self.kinds
+            started_tracing = trace_memory and not tracemalloc.is_tracing()
+            if trace_memory:
+                if started_tracing:
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+                    tracemalloc.reset_peak()
+                before = tracemalloc.take_snapshot()
+            if sampler is not None:
+                sampler.start()
+            if cpu is not None:
+                try:
+                    cpu.enable()
+                except ValueError as e:
+                    # Python 3.12+ allows one profiler per process (e.g. not under another profiler)
+                    logger.warning(f"Cannot start cProfile: {e}")
+                    cpu = None
+            started = time.perf_counter()
+            try:
+                yield prefix
+            finally:
+                elapsed = time.perf_counter() - started
+                if cpu is not None:
+                    cpu.disable()
+                samples = sampler.stop() if sampler is not None else None
+                written: List[Path] = []
+                try:
+                    self.output_dir.mkdir(parents=True, exist_ok=True)
+                    if cpu is not None:
+                        written.append(self._write_cpu(prefix, cpu))
+                    if samples is not None:
+                        written.append(self._write_samples(prefix, samples))
+                    if trace_memory:
+                        written.extend(self._write_memory(prefix, before))
+                except OSError as e:
+                    logger.warning(f"Could not write profile of {name}: {e}")
+                finally:
+                    if started_tracing:
+                        tracemalloc.stop()
+                if written:
+                    logger.info(
+                        f"Profiled {name} ({elapsed * 1000:.0f} ms): {', '.join(str(path) for path in written)}"
+                    )
+        finally:
+            self._busy.release()
+
+    def _prefix(self, name: str, index: int) -> Path:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "call"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return self.output_dir / f"{stamp}-{os.getpid()}-{index}-{safe_name}"
+
+    @staticmethod
+    def _write_cpu(prefix: Path, cpu: cProfile.Profile) -> Path:
+        path = prefix.with_name(prefix.name + ".prof")
+        cpu.dump_stats(str(path))
+        return path
+
+    @staticmethod
+    def _write_samples(prefix: Path, samples: Counter) -> Path:
+        path = prefix.with_name(prefix.name + ".folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    @staticmethod
+    def _write_memory(prefix: Path, before: "tracemalloc.Snapshot") -> List[Path]:
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        snapshot_path = prefix.with_name(prefix.name + ".tracemalloc")
+        after.dump(str(snapshot_path))
+
+        # Leave the profilers' own bookkeeping out of the report
+        # (filtering by file name here is much cheaper than Snapshot.filter_traces)
+        own_files = {module.__file__ for module in (tracemalloc, cProfile, sys.modules[__name__])}
+        growth = [
+            stat for stat in after.compare_to(before, "lineno")
+            if stat.traceback[0].filename not in own_files
+        ]
+        report_path = prefix.with_name(prefix.name + ".memory.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+            f.write(f"Top {MEMORY_TOP_SITES} allocation sites by growth during the call:\n")
+            for stat in growth[:MEMORY_TOP_SITES]:
+                f.write(f"{stat}\n")
+        return [snapshot_path, report_path]
+
+
+def parse_kinds(value: str) -> List[str]:
+    """Split a comma-separated list of profile kinds (e.g. "cpu,memory")."""
+    return [kind.strip().lower() for kind in value.split(",") if kind.strip()]
+
+
+def default_profile_dir() -> Path:
+    """Directory profiles are written to, from ALLTRAILS_PROFILE_DIR or in the cache directory."""
+    configured = os.getenv("ALLTRAILS_PROFILE_DIR", "").strip()
+    if configured:
+        return Path(os.path.expanduser(configured))
+    from alltrails_mcp.cache import _get_default_cache_dir
+
+    return _get_default_cache_dir() / "profiles"
+
+
+def profiler_from_env() -> Optional[Profiler]:
+    """
+    Create the tool-call profiler selected by ALLTRAILS_PROFILE.
+
+    Returns:
+        Profiler, or None if profiling is off (or misconfigured)
+    """
+    value = os.getenv("ALLTRAILS_PROFILE", "").strip()
+    if not value or value == "0":
+        return None
+    try:
+        every = int(os.getenv("ALLTRAILS_PROFILE_EVERY", "1"))
+        profiler = Profiler(parse_kinds(value), default_profile_dir(), every=every)
+    except ValueError as e:
+        logger.warning(f"Ignoring ALLTRAILS_PROFILE settings: {e}")
+        return None
+    logger.info(f"Profiling every {profiler.every} tool calls ({', '.join(profiler.kinds)}) to {profiler.output_dir}")
+    return profiler
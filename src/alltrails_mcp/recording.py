@@ -0,0 +1,116 @@
+"""
+Recording of MCP tool calls, for replaying real traffic against a server.
+
+With ALLTRAILS_RECORD set to a file path, the MCP server appends one JSON
+line per tool call:
+
+    {"time": 1760832000.123, "tool": "search_trails",
+     "arguments": {"park": "Zion"}, "duration_ms": 412.5, "error": false}
+
+"time" is when the call arrived (seconds since the epoch), so the gaps
+between lines keep the agents' pacing. benchmarks/replay.py fires a
+recording at a server over stdio or HTTP, at the recorded pace or faster,
+and reports latencies and cache hit ratios, e.g. to compare cache sizes,
+expiry times and worker counts on real traffic.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import IO, Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCallRecorder:
+    """
+    Appends tool calls to a JSON lines stream.
+
+    Example:
+        >>> recorder = ToolCallRecorder(open("calls.jsonl", "a"))
+        >>> recorder.record("get_trail_details", {"slug": "us/utah/angels-landing-trail"}, time.time(), 0.25)
+    """
+
+    def __init__(self, stream: IO[str]):
+        """
+        Initialize the recorder.
+
+        Args:
+            stream: Text stream the JSON lines are written to
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def record(self, tool: str, arguments: Dict[str, Any], started_at: float, duration: float, error: bool = False):
+        """
+        Record one tool call.
+
+        Args:
+            tool: Tool name
+            arguments: Tool arguments as received
+            started_at: When the call arrived, in seconds since the epoch
+            duration: Seconds the call took
+            error: Whether the call failed
+        """
+        line = json.dumps({
+            "time": round(started_at, 6),
+            "tool": tool,
+            "arguments": arguments,
+            "duration_ms": round(duration * 1000, 3),
+            "error": error,
+        }, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+def recorder_from_env() -> Optional[ToolCallRecorder]:
+    """
+    Create the recorder selected by ALLTRAILS_RECORD.
+
+    Returns:
+        ToolCallRecorder, or None if recording is off (or the file cannot be opened)
+    """
+    path = os.getenv("ALLTRAILS_RECORD", "").strip()
+    if not path:
+        return None
+    try:
+        stream = open(os.path.expanduser(path), "a", encoding="utf-8", buffering=1)
+    except OSError as e:
+        logger.warning(f"Cannot open recording file {path}: {e}; recording is off")
+        return None
+    logger.info(f"Recording tool calls to {path}")
+    return ToolCallRecorder(stream)
+
+
+def load_recording(path: str) -> List[Dict]:
+    """
+    Read a recording, oldest call first.
+
+    Each call gets an "offset": seconds since the first recorded call.
+    Lines that are not valid JSON (e.g. cut short by a crash) are skipped.
+
+    Args:
+        path: Recording file written with ALLTRAILS_RECORD
+
+    Returns:
+        List of recorded calls
+    """
+    calls = []
+    with open(os.path.expanduser(path), encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                call = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping invalid line {number} of {path}")
+                continue
+            if isinstance(call, dict) and "tool" in call:
+                calls.append(call)
+    calls.sort(key=lambda call: call.get("time", 0))
+    start = calls[0].get("time", 0) if calls else 0
+    for call in calls:
+        call["offset"] = call.get("time", start) - start
+    return calls
@@ -0,0 +1,183 @@
+"""
+Background refresh of cached parks and trail details.
+
+When enabled, the MCP server runs a RefreshDaemon task in its event loop. The
+daemon counts which parks and trails the tools are asked for and, every
+interval, revalidates the most-used entries that are close to expiring, so
+users rarely wait on a synchronous scrape after a cache entry expires.
+
+Refreshes are background requests to the upstream scheduler (see
+alltrails_mcp.upstream), so they share the rate limit without holding up
+interactive tool calls. The daemon also waits while any tool call is in
+progress, and skips a pass while the upstream circuit breaker is open.
+
+- ALLTRAILS_REFRESH_INTERVAL: seconds between refresh passes (default 0, disabled)
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterator, Optional
+
+from alltrails_mcp.cache import TrailCache, get_trail_details_with_cache, search_trails_with_cache
+from alltrails_mcp.tracing import span
+from alltrails_mcp.upstream import Priority, get_circuit_breaker, request_priority
+
+logger = logging.getLogger(__name__)
+
+# Refresh entries in the last tenth of their lifetime
+REFRESH_AHEAD_FRACTION = 0.1
+DEFAULT_BATCH_SIZE = 10
+
+
+class RefreshDaemon:
+    """
+    Keeps frequently used cache entries fresh from an asyncio task.
+
+    Example:
+        >>> refresher = RefreshDaemon(TrailCache, interval=300)
+        >>> task = asyncio.create_task(refresher.run())
+        >>> refresher.record_access("park", "us/utah/zion-national-park")
+        >>> with refresher.interactive():
+        ...     handle_tool_call()
+    """
+
+    def __init__(
+        self,
+        cache_factory: Callable[[], TrailCache],
+        interval: float,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        Initialize the refresh daemon.
+
+        Args:
+            cache_factory: Returns the TrailCache to refresh (called on the first pass,
+                so creating the daemon does not open the cache)
+            interval: Seconds between refresh passes
+            batch_size: Maximum number of entries refreshed per pass
+        """
+        self.cache_factory = cache_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._accesses: Counter = Counter()
+        self._active_calls = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def record_access(self, kind: str, key: str):
+        """
+        Count an access to a cached park or trail.
+
+        Counts are kept in memory and written to the cache once per pass.
+
+        Args:
+            kind: "park" or "trail"
+            key: Park slug or trail slug
+        """
+        self._accesses[(kind, key)] += 1
+
+    def _idle_event(self) -> asyncio.Event:
+        # Created inside the event loop (on Python < 3.10 an Event binds to the loop it is created in)
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            if not self._active_calls:
+                self._idle.set()
+        return self._idle
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """Context manager marking a tool call in progress; refreshes wait until none are."""
+        self._active_calls += 1
+        self._idle_event().clear()
+        try:
+            yield
+        finally:
+            self._active_calls -= 1
+            if not self._active_calls:
+                self._idle_event().set()
+
+    def refresh_entry(self, cache: TrailCache, kind: str, key: str):
+        """
+        Revalidate one cached park or trail at background priority.
+
+        Args:
+            cache: TrailCache to refresh
+            kind: "park" or "trail"
+            key: Park slug or trail slug
+        """
+        with request_priority(Priority.BACKGROUND), span("refresh", kind=kind, key=key):
+            if kind == "park":
+                limit = None if cache.is_crawl_complete(key) else max(cache.get_trail_count(key), 1)
+                search_trails_with_cache(key, cache=cache, limit=limit, revalidate=True)
+            else:
+                get_trail_details_with_cache(key, cache=cache, revalidate=True)
+
+    async def refresh_once(self, cache: TrailCache) -> int:
+        """
+        Run one refresh pass.
+
+        Args:
+            cache: TrailCache to refresh
+
+        Returns:
+            Number of entries refreshed
+        """
+        loop = asyncio.get_running_loop()
+        accesses, self._accesses = self._accesses, Counter()
+        await cache.arecord_accesses(dict(accesses))
+
+        refresh_ahead = timedelta(days=cache.cache_days * REFRESH_AHEAD_FRACTION)
+        candidates = await cache.aget_refresh_candidates(refresh_ahead, limit=self.batch_size)
+
+        refreshed = 0
+        breaker = get_circuit_breaker()
+        for kind, key in candidates:
+            await self._idle_event().wait()
+            if breaker.is_open:
+                logger.info("Upstream circuit open; postponing cache refresh")
+                break
+            try:
+                await loop.run_in_executor(None, self.refresh_entry, cache, kind, key)
+                refreshed += 1
+            except Exception as e:
+                logger.error(f"Error refreshing {kind} {key}: {e}")
+
+        if refreshed:
+            logger.info(f"Refreshed {refreshed} cache entries")
+        return refreshed
+
+    async def run(self):
+        """Refresh the cache every interval until cancelled."""
+        logger.info(f"Background cache refresh every {self.interval:.0f}s")
+        cache = None
+        while True:
+            await asyncio.sleep(self.interval)
+            if cache is None:
+                cache = self.cache_factory()
+            try:
+                await self.refresh_once(cache)
+            except Exception as e:
+                logger.error(f"Error in cache refresh pass: {e}")
+
+
+def create_refresh_daemon(cache_factory: Callable[[], TrailCache]) -> Optional[RefreshDaemon]:
+    """
+    Create a refresh daemon configured from the environment.
+
+    Args:
+        cache_factory: Returns the TrailCache to refresh
+
+    Returns:
+        RefreshDaemon, or None if ALLTRAILS_REFRESH_INTERVAL is unset or 0
+    """
+    try:
+        interval = float(os.getenv("ALLTRAILS_REFRESH_INTERVAL", "0"))
+    except ValueError:
+        logger.warning("Ignoring invalid ALLTRAILS_REFRESH_INTERVAL value")
+        return None
+    if interval <= 0:
+        return None
+    return RefreshDaemon(cache_factory, interval)
@@ -0,0 +1,507 @@
+"""
+Rendering for MCP tool responses, as markdown or compact JSON.
+
+Listings are rendered in a single pass into a list of parts that is joined
+once, and stop at a character budget so large parks never produce huge
+responses. When a listing is cut short, the caller gets the offset of the
+first item left out and hands it back to the agent as an opaque cursor.
+
+JSON listings are assembled from per-item JSON strings (built by SQLite from
+the cache, see TrailCache.query_trails_json) without decoding them. The JSON
+shapes are described by the *_SCHEMA constants, which the server advertises
+as tool output schemas.
+"""
+
+import base64
+import json
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from alltrails_mcp.models import Trail, TrailDetail
+from alltrails_mcp.tracing import traced
+
+# Default number of items per page and character budget per response
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_MAX_CHARS = 8000
+
+# Summaries in listings are cut to this many characters
+SUMMARY_CHARS = 80
+
+# Room kept free in JSON listings for the closing brackets and next cursor
+_JSON_TRAILER_CHARS = 400
+
+_STRING = {"type": "string"}
+_NUMBER_OR_NULL = {"type": ["number", "null"]}
+_CURSOR = {"type": ["string", "null"], "description": "Cursor for the next page, or null on the last page"}
+_FRESHNESS = {
+    "type": "string",
+    "enum": ["stale", "partial"],
+    "description": "Only present when fresh data could not be fetched from AllTrails in time: "
+                   "stale (expired cached data) or partial (only some listing pages were fetched)",
+}
+
+# Notes shown above markdown responses that are not fresh and complete
+FRESHNESS_NOTES = {
+    "stale": "Could not get fresh data from AllTrails in time; showing older cached data that may be out of date.",
+    "partial": "Could not get every listing page from AllTrails in time; showing only the trails fetched so far.",
+}
+
+TRAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": _STRING,
+        "url": _STRING,
+        "summary": _STRING,
+        "difficulty": _STRING,
+        "difficulty_level": {"type": "integer", "description": "0 unknown, 1 easy, 2 moderate, 3 hard"},
+        "length": _STRING,
+        "length_km": _NUMBER_OR_NULL,
+        "rating": _NUMBER_OR_NULL,
+        "route_type": _STRING,
+    },
+    "required": ["name", "url"],
+}
+
+TRAIL_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "park": _STRING,
+        "offset": {"type": "integer"},
+        "trails": {"type": "array", "items": TRAIL_SCHEMA},
+        "next_cursor": _CURSOR,
+        "freshness": _FRESHNESS,
+    },
+    "required": ["park", "offset", "trails", "next_cursor"],
+}
+
+TRAIL_DETAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": _STRING,
+        "url": _STRING,
+        "summary": _STRING,
+        "difficulty": _STRING,
+        "difficulty_level": {"type": "integer"},
+        "length": _STRING,
+        "length_km": _NUMBER_OR_NULL,
+        "elevation_gain": _STRING,
+        "elevation_gain_m": _NUMBER_OR_NULL,
+        "rating": _NUMBER_OR_NULL,
+        "route_type": _STRING,
+        "freshness": _FRESHNESS,
+    },
+    "required": ["title", "url"],
+}
+
+TRAIL_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "trails": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "slug": _STRING,
+                    "trail": {"anyOf": [TRAIL_DETAIL_SCHEMA, {"type": "null"}]},
+                    "error": {"type": ["string", "null"]},
+                },
+                "required": ["slug", "trail", "error"],
+            },
+        },
+    },
+    "required": ["trails"],
+}
+
+PARK_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "total": {"type": "integer"},
+        "offset": {"type": "integer"},
+        "parks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"name": _STRING, "slug": _STRING},
+                "required": ["name", "slug"],
+            },
+        },
+        "next_cursor": _CURSOR,
+    },
+    "required": ["total", "offset", "parks", "next_cursor"],
+}
+
+
+def encode_cursor(state: Dict) -> str:
+    """
+    Encode listing state (park, filters and offset) as an opaque cursor.
+
+    Args:
+        state: JSON-serializable listing state
+
+    Returns:
+        URL-safe cursor string
+    """
+    data = json.dumps(state, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        Listing state dictionary
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(state, dict) or not isinstance(state.get("offset"), int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return state
+
+
+def _render_budgeted(
+    header: str,
+    entries: Iterable[str],
+    max_chars: Optional[int]
+) -> Tuple[List[str], int]:
+    """
+    Collect rendered entries after a header until the character budget is spent.
+
+    The first entry is always included, even if it alone exceeds the budget,
+    so every page makes progress.
+
+    Returns:
+        Tuple of (parts, number of entries included)
+    """
+    parts = [header]
+    used = len(header)
+    count = 0
+    for entry in entries:
+        if count and max_chars is not None and used + len(entry) > max_chars:
+            break
+        parts.append(entry)
+        used += len(entry)
+        count += 1
+    return parts, count
+
+
+def _budget_left(
+    max_chars: Optional[int],
+    note: str,
+    make_cursor: Optional[Callable[[int], str]],
+    last_offset: int
+) -> Optional[int]:
+    """
+    Get the budget left for listing entries after a note and a "More results" trailer.
+
+    The trailer is sized for the cursor of the largest possible next offset,
+    which is never shorter than the one actually rendered.
+    """
+    if max_chars is None:
+        return None
+    reserved = len(note)
+    if make_cursor is not None:
+        reserved += len(render_more(make_cursor(last_offset)))
+    return max_chars - reserved
+
+
+def _trail_entry(number: int, trail: Trail) -> str:
+    lines = [f"{number}. **{trail.name}**"]
+    if trail.difficulty_text:
+        lines.append(f"   - Difficulty: {trail.difficulty_text}")
+    if trail.length:
+        lines.append(f"   - Length: {trail.length}")
+    if trail.rating_text:
+        lines.append(f"   - Rating: {trail.rating_text}")
+    if trail.route_type:
+        lines.append(f"   - Route Type: {trail.route_type}")
+    if trail.summary:
+        summary = trail.summary
+        if len(summary) > SUMMARY_CHARS:
+            summary = summary[:SUMMARY_CHARS] + "..."
+        lines.append(f"   - Summary: {summary}")
+    lines.append(f"   - URL: {trail.url}")
+    return "\n".join(lines) + "\n\n"
+
+
+@traced("render.trail_list")
+def render_trail_list(
+    park: str,
+    trails: Sequence[Trail],
+    offset: int = 0,
+    has_more: bool = False,
+    max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+    make_cursor: Optional[Callable[[int], str]] = None,
+    freshness: Optional[str] = None
+) -> Tuple[str, int]:
+    """
+    Render a page of trails as markdown.
+
+    Args:
+        park: Park name or slug shown in the heading
+        trails: Trails on this page
+        offset: Number of trails before this page (for numbering)
+        has_more: Whether further trails exist after this page
+        max_chars: Character budget for the response, or None for no limit
+        make_cursor: Builds the cursor for a given next offset; if given, a
+            "More results" trailer is added when trails are left out
+        freshness: "stale" or "partial" to add a note above the trails
+
+    Returns:
+        Tuple of (markdown, number of trails rendered)
+    """
+    note = render_freshness(freshness)
+    budget = _budget_left(max_chars, note, make_cursor, offset + len(trails))
+    entries = (_trail_entry(number, trail) for number, trail in enumerate(trails, offset + 1))
+    # The heading depends on how many trails fit, so the budget reserves room
+    # for the longest form and it is filled in last
+    reserved = f"Trails {offset + 1}-{offset + len(trails)} in {park}:\n\n"
+    parts, count = _render_budgeted(reserved, entries, budget)
+    if offset or has_more or count < len(trails):
+        parts[0] = f"Trails {offset + 1}-{offset + count} in {park}:\n\n"
+    else:
+        parts[0] = f"Found {count} trails in {park}:\n\n"
+    if make_cursor is not None and (has_more or count < len(trails)):
+        parts.append(render_more(make_cursor(offset + count)))
+    return note + "".join(parts), count
+
+
+@traced("render.park_list")
+def render_park_list(
+    parks: Sequence[Tuple[str, str]],
+    total: int,
+    max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+    make_cursor: Optional[Callable[[int], str]] = None,
+    offset: int = 0
+) -> Tuple[str, int]:
+    """
+    Render a page of national parks as markdown.
+
+    Args:
+        parks: (display name, slug) pairs on this page
+        total: Total number of parks across all pages
+        max_chars: Character budget for the response, or None for no limit
+        make_cursor: Builds the cursor for a given next offset; if given, a
+            "More results" trailer is added when parks are left out
+        offset: Number of parks before this page
+
+    Returns:
+        Tuple of (markdown, number of parks rendered)
+    """
+    budget = _budget_left(max_chars, "", make_cursor, offset + len(parks))
+    header = f"# Available US National Parks\n\nTotal: {total} parks\n\n"
+    entries = (f"- **{name}**\n  - Slug: `{slug}`\n" for name, slug in parks)
+    parts, count = _render_budgeted(header, entries, budget)
+    if make_cursor is not None and offset + count < total:
+        parts.append(render_more(make_cursor(offset + count)))
+    return "".join(parts), count
+
+
+def render_more(cursor: str) -> str:
+    """Render the trailer telling the agent how to fetch the next page."""
+    return f"\nMore results available: call again with cursor \"{cursor}\".\n"
+
+
+def render_freshness(freshness: Optional[str]) -> str:
+    """Render the note shown above a markdown response that is stale or partial ("" if fresh)."""
+    return f"> **Note:** {FRESHNESS_NOTES[freshness]}\n\n" if freshness else ""
+
+
+def with_freshness(response: str, freshness: Optional[str]) -> str:
+    """Add a freshness marker to a JSON object response, unless it is fresh."""
+    if not freshness:
+        return response
+    return response[:-1] + ',"freshness":' + json.dumps(freshness) + "}"
+
+
+def _render_json_list(
+    header: str,
+    items: Sequence[str],
+    has_more: bool,
+    max_chars: Optional[int],
+    make_cursor: Callable[[int], str],
+    offset: int
+) -> Tuple[str, int]:
+    """
+    Splice pre-encoded JSON items into a listing object within the budget.
+
+    Args:
+        header: Start of the object, up to and including the opening "["
+        items: JSON-encoded list items
+        has_more: Whether further items exist after these
+        max_chars: Character budget, or None for no limit
+        make_cursor: Builds the cursor for a given next offset
+        offset: Number of items before this page
+
+    Returns:
+        Tuple of (JSON text, number of items included)
+    """
+    budget = max_chars - _JSON_TRAILER_CHARS if max_chars is not None else None
+    entries = (item if i == 0 else "," + item for i, item in enumerate(items))
+    parts, count = _render_budgeted(header, entries, budget)
+
+    next_cursor = make_cursor(offset + count) if has_more or count < len(items) else None
+    parts.append('],"next_cursor":' + json.dumps(next_cursor) + "}")
+    return "".join(parts), count
+
+
+@traced("render.trail_list_json")
+def render_trail_list_json(
+    park: str,
+    trails: Sequence[str],
+    make_cursor: Callable[[int], str],
+    offset: int = 0,
+    has_more: bool = False,
+    max_chars: Optional[int] = DEFAULT_MAX_CHARS,
+    freshness: Optional[str] = None
+) -> Tuple[str, int]:
+    """
+    Render a page of trails as compact JSON (see TRAIL_LIST_SCHEMA).
+
+    Args:
+        park: Park name or slug
+        trails: Trail JSON objects from TrailCache.query_trails_json
+        make_cursor: Builds the cursor for a given next offset
+        offset: Number of trails before this page
+        has_more: Whether further trails exist after this page
+        max_chars: Character budget for the response, or None for no limit
+        freshness: "stale" or "partial" if the trails are not fresh and complete
+
+    Returns:
+        Tuple of (JSON text, number of trails included)
+    """
+    header = '{"park":' + json.dumps(park) + ',"offset":' + str(offset) + ',"trails":['
+    response, count = _render_json_list(header, trails, has_more, max_chars, make_cursor, offset)
+    return with_freshness(response, freshness), count
+
+
+@traced("render.park_list_json")
+def render_park_list_json(
+    parks: Sequence[Tuple[str, str]],
+    total: int,
+    make_cursor: Callable[[int], str],
+    offset: int = 0,
+    max_chars: Optional[int] = DEFAULT_MAX_CHARS
+) -> Tuple[str, int]:
+    """
+    Render a page of national parks as compact JSON (see PARK_LIST_SCHEMA).
+
+    Args:
+        parks: (display name, slug) pairs on this page
+        total: Total number of parks across all pages
+        make_cursor: Builds the cursor for a given next offset
+        offset: Number of parks before this page
+        max_chars: Character budget for the response, or None for no limit
+
+    Returns:
+        Tuple of (JSON text, number of parks included)
+    """
+    header = '{"total":' + str(total) + ',"offset":' + str(offset) + ',"parks":['
+    items = [json.dumps({"name": name, "slug": slug}, separators=(",", ":")) for name, slug in parks]
+    return _render_json_list(header, items, offset + len(parks) < total, max_chars, make_cursor, offset)
+
+
+@traced("render.trail_detail_json")
+def trail_detail_json(trail: TrailDetail) -> str:
+    """
+    Render trail details as compact JSON (see TRAIL_DETAIL_SCHEMA).
+
+    Used when the details are not in the cache; cached details are rendered
+    by TrailCache.get_cached_trail_details_json instead.
+    """
+    return json.dumps({
+        "title": trail.title,
+        "url": trail.url,
+        "summary": trail.summary,
+        "difficulty": trail.difficulty_text,
+        "difficulty_level": int(trail.difficulty),
+        "length": trail.length,
+        "length_km": trail.length_km,
+        "elevation_gain": trail.elevation_gain,
+        "elevation_gain_m": trail.elevation_gain_m,
+        "rating": trail.rating,
+        "route_type": trail.route_type,
+    }, separators=(",", ":"))
+
+
+@traced("render.trail_detail")
+def render_trail_detail(trail: TrailDetail, heading: str = "#") -> str:
+    """
+    Render trail details as markdown.
+
+    Args:
+        trail: Trail details
+        heading: Markdown heading marker for the title (e.g. "##" inside a batch)
+    """
+    lines = [f"{heading} {trail.title}", ""]
+    if trail.length:
+        lines.append(f"**Length:** {trail.length}")
+    if trail.elevation_gain:
+        lines.append(f"**Elevation Gain:** {trail.elevation_gain}")
+    if trail.route_type:
+        lines.append(f"**Route Type:** {trail.route_type}")
+    if trail.difficulty_text:
+        lines.append(f"**Difficulty:** {trail.difficulty_text}")
+    if trail.rating_text:
+        lines.append(f"**Rating:** {trail.rating_text}")
+    lines.append(f"**URL:** {trail.url}")
+    lines.append("")
+
+    if trail.summary:
+        lines.append(f"**Description:**\n{trail.summary}")
+    return "\n".join(lines) + "\n"
+
+
+@traced("render.trail_batch")
+def render_trail_batch(
+    slugs: Sequence[str],
+    trails: Sequence[TrailDetail],
+    stale: Collection[str] = ()
+) -> str:
+    """
+    Render the results of a batch detail lookup as markdown, in input order.
+
+    Args:
+        slugs: Requested trail slugs
+        trails: TrailDetail for each slug; error placeholders (empty title)
+                are rendered as per-trail errors
+        stale: Slugs whose details are expired cached copies
+    """
+    failed = sum(1 for trail in trails if not trail.title)
+    parts = [f"# Details for {len(slugs)} trails"
+             + (f" ({failed} failed)" if failed else "") + "\n\n"]
+    for number, (slug, trail) in enumerate(zip(slugs, trails), 1):
+        if trail.title:
+            detail = render_trail_detail(trail, heading=f"## {number}.")
+            if slug in stale:
+                # The note goes right under the trail's heading
+                title, body = detail.split("\n", 1)
+                detail = title + "\n\n" + render_freshness("stale") + body.lstrip("\n")
+            parts.append(detail + "\n")
+        else:
+            parts.append(f"## {number}. {slug}\n\n**Error:** {trail.summary or 'Trail not found'}\n\n")
+    return "".join(parts)
+
+
+@traced("render.trail_batch_json")
+def render_trail_batch_json(items: Sequence[Tuple[str, Optional[str], Optional[str]]]) -> str:
+    """
+    Render the results of a batch detail lookup as compact JSON (see TRAIL_BATCH_SCHEMA).
+
+    Args:
+        items: (slug, trail details JSON or None, error or None) in input order
+    """
+    entries = (
+        '{"slug":' + json.dumps(slug) + ',"trail":' + (trail or "null")
+        + ',"error":' + json.dumps(error) + "}"
+        for slug, trail, error in items
+    )
+    return '{"trails":[' + ",".join(entries) + "]}"
@@ -1,12 +1,52 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
-from typing import List, Dict, Optional
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, List, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
 import re
 
+from alltrails_mcp.metrics import (
+    PARSE_SECONDS,
+    UPSTREAM_BYTES,
+    UPSTREAM_QUEUE_SECONDS,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_SECONDS,
+)
+from alltrails_mcp.models import Trail, TrailDetail
+from alltrails_mcp.parallel import current_parser_pool
+from alltrails_mcp.tracing import current_span, span, traced, tracing_enabled
+
+# requests and BeautifulSoup are slow to import, so they are only imported
+# where a page is actually fetched or parsed
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
+
 logger = logging.getLogger(__name__)
 
-BASE_URL = "https://www.alltrails.com"
+# Overridable to point the scraper at a stand-in server (see benchmarks/standin.py)
+BASE_URL = os.getenv("ALLTRAILS_BASE_URL", "https://www.alltrails.com").rstrip("/")
+
+# Maximum number of pooled keep-alive connections kept open to AllTrails
+POOL_MAXSIZE = 8
+
+# Timeout of a single request to AllTrails (shorter when the caller's deadline is nearer)
+REQUEST_TIMEOUT_SECONDS = 10
+
+# Selectors for "next page" / "load more" controls on park listing pages
+NEXT_PAGE_SELECTORS = [
+    "a[data-testid='pagination-next']",
+    "[data-testid='load-more'][data-next-url]",
+    "button[data-next-url]",
+    "a.load-more",
+]
+
+# A card element whose whole text is a route type label
+ROUTE_TYPE_LABEL_RE = re.compile(r'^\s*(Out & back|Loop|Point to point)\s*$', re.I)
+
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
 
 def get_headers():
     """Get headers for web scraping to avoid being blocked."""
@@ -36,150 +76,699 @@ def extract_distance_and_rating(text: str) -> tuple[Optional[str], Optional[str]
     
     return distance, rating
 
-def search_trails_in_park(park_slug: str) -> List[Dict]:
+class ParkPage(NamedTuple):
+    """One rendered page of a park's trail listing."""
+    number: int
+    url: str
+    trails: List[Dict]
+    next_url: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class TrailPage(NamedTuple):
+    """A parsed trail detail page."""
+    slug: str
+    url: str
+    details: TrailDetail
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def get_session() -> "requests.Session":
     """
-    Search for trails in a specific park.
+    Get the shared HTTP session used for all AllTrails requests.
     
-    WARNING: AllTrails implements CAPTCHA and rate limiting. Use sparingly with delays
-    between requests to avoid triggering anti-bot protection (403 errors).
+    The session keeps connections to AllTrails alive between requests, so
+    crawling several pages of a park (or several trails) reuses the same
+    pooled TCP/TLS connections instead of reconnecting every time.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE)
+                if tracing_enabled():
+                    adapter.poolmanager.pool_classes_by_scheme = _traced_connection_pools()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(get_headers())
+                _session = session
+    return _session
+
+
+def _traced_connection_pools() -> Dict[str, type]:
+    """
+    urllib3 connection pool classes that trace opening new connections.
+    
+    Opening a connection is recorded as an http.connect span (including the
+    TLS handshake), with an http.socket child span for the DNS lookup and TCP
+    connect. Requests over a reused keep-alive connection have neither.
+    """
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    
+    class TracedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            with span("http.socket", host=self.host):
+                return super()._new_conn()
+        
+        def connect(self):
+            with span("http.connect", host=self.host):
+                return super().connect()
+    
+    class TracedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            with span("http.socket", host=self.host):
+                return super()._new_conn()
+        
+        def connect(self):
+            with span("http.connect", host=self.host):
+                return super().connect()
+    
+    class TracedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TracedHTTPConnection
+    
+    class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TracedHTTPSConnection
+    
+    return {"http": TracedHTTPConnectionPool, "https": TracedHTTPSConnectionPool}
+
+
+def park_url(park_slug: str) -> str:
+    """Get the AllTrails URL of the first listing page for a park."""
+    return f"{BASE_URL}/parks/{park_slug}"
+
+
+def trail_slug(url: str) -> str:
+    """Get the trail slug from an AllTrails trail URL (the part after /trail/)."""
+    return url.split("/trail/", 1)[-1].split("?", 1)[0].strip("/")
+
+
+def trail_url(slug: str) -> str:
+    """Get the AllTrails URL of a trail's detail page."""
+    return f"{BASE_URL}/trail/{slug}"
+
+
+@traced("http.fetch", key="url")
+def fetch_response(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> "requests.Response":
+    """
+    Fetch a page from AllTrails over the shared session.
+    
+    If validators from an earlier response are given, the request is made
+    conditional (If-None-Match / If-Modified-Since) and AllTrails may answer
+    with an empty 304 Not Modified response instead of the full page.
+    
+    Requests are queued by the shared upstream scheduler at the caller's
+    priority and deadline, and their outcome is reported to the upstream
+    circuit breaker (see alltrails_mcp.upstream), and counted in the upstream
+    metrics (see alltrails_mcp.metrics). A request in flight times
+    out at the caller's deadline, if that comes before
+    REQUEST_TIMEOUT_SECONDS. Successful responses are also stored in
+    the raw-page archive when it is enabled (see alltrails_mcp.archive).
     
     Args:
-        park_slug: Park identifier (e.g., 'us/tennessee/great-smoky-mountains-national-park')
+        url: Page URL
+        etag: ETag of the cached copy, if any
+        last_modified: Last-Modified of the cached copy, if any
     
     Returns:
-        List of trail dictionaries with name, url, summary, difficulty, etc.
+        The HTTP response (status 200, or 304 for a conditional request)
+    
+    Raises:
+        requests.RequestException: If the request fails or returns an error status
+            (requests.Timeout if the caller's deadline passes)
     """
-    url = f"{BASE_URL}/parks/{park_slug}"
+    from alltrails_mcp.archive import get_page_archive
+    from alltrails_mcp.upstream import (
+        BLOCKING_STATUSES,
+        DeadlineExceeded,
+        current_priority,
+        deadline_remaining,
+        get_circuit_breaker,
+        get_scheduler,
+    )
+    import requests
+    
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     
+    breaker = get_circuit_breaker()
+    priority = current_priority().name.lower()
+    timeout = REQUEST_TIMEOUT_SECONDS
+    queued_at = time.perf_counter()
     try:
-        logger.info(f"Fetching trails from: {url}")
-        resp = requests.get(url, headers=get_headers(), timeout=10)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.text, "html.parser")
-        trails = []
-        
-        # Try multiple selectors for trail cards as AllTrails may update their HTML
-        card_selectors = [
-            "div[data-testid='trail-card']",
-            "div.trail-card",
-            "a[data-testid='trail-card-title-link']",
-            ".styles-module__container___3ZXxx"
-        ]
+        with get_scheduler().slot():
+            sent_at = time.perf_counter()
+            UPSTREAM_QUEUE_SECONDS.labels(priority).observe(sent_at - queued_at)
+            remaining = deadline_remaining()
+            if remaining is not None:
+                timeout = max(0.01, min(timeout, remaining))
+            # The body is streamed so time to first byte and download time can be told apart
+            resp = get_session().get(url, headers=headers, timeout=timeout, stream=True)
+            first_byte_at = time.perf_counter()
+            body = resp.content
+            done_at = time.perf_counter()
+    except DeadlineExceeded as e:
+        # Callers handle a missed deadline like any other request that timed out
+        raise requests.Timeout(f"{e} for {url}") from e
+    except (requests.ConnectionError, requests.Timeout) as e:
+        UPSTREAM_REQUESTS.labels("timeout" if isinstance(e, requests.Timeout) else "error").inc()
+        # A request cut short by the caller's deadline says nothing about AllTrails
+        if timeout == REQUEST_TIMEOUT_SECONDS or not isinstance(e, requests.Timeout):
+            breaker.record_failure()
+        raise
+    
+    UPSTREAM_REQUESTS.labels(resp.status_code).inc()
+    UPSTREAM_SECONDS.labels(priority).observe(done_at - sent_at)
+    UPSTREAM_BYTES.inc(len(body))
+    
+    fetch_span = current_span()
+    if fetch_span is not None:
+        fetch_span.set(
+            status=resp.status_code,
+            bytes=len(body),
+            queue_ms=round((sent_at - queued_at) * 1000, 3),
+            ttfb_ms=round((first_byte_at - sent_at) * 1000, 3),
+            download_ms=round((done_at - first_byte_at) * 1000, 3),
+        )
+    
+    if resp.status_code in BLOCKING_STATUSES:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    resp.raise_for_status()
+    
+    if resp.status_code == 304:
+        logger.info(f"Not modified: {url}")
+        return resp
+    
+    archive = get_page_archive()
+    if archive is not None:
+        archive.store_response(url, resp)
+    
+    return resp
+
+
+def fetch_html(url: str) -> str:
+    """
+    Fetch a page from AllTrails over the shared session.
+    
+    Args:
+        url: Page URL
+    
+    Returns:
+        Response body as text
+    
+    Raises:
+        requests.RequestException: If the request fails or returns an error status
+    """
+    return fetch_response(url).text
+
+
+def _absolute_url(href: str, base: str = BASE_URL) -> str:
+    """Resolve a (possibly relative) link against the page it appeared on."""
+    return BASE_URL + href if href.startswith("/") else urljoin(base, href)
+
+
+def _find_next_page_url(soup: "BeautifulSoup", current_url: str) -> Optional[str]:
+    """Find the next-page or load-more link of a park listing page, if any."""
+    next_elem = soup.find("link", rel="next") or soup.find("a", rel="next")
+    href = next_elem.get("href") if next_elem else None
+    
+    if not href:
+        for selector in NEXT_PAGE_SELECTORS:
+            elem = soup.select_one(selector)
+            if elem:
+                href = elem.get("data-next-url") or elem.get("href")
+                if href:
+                    break
+    
+    if not href:
+        return None
+    
+    next_url = _absolute_url(href, current_url)
+    return next_url if next_url != current_url else None
+
+
+def parse_park_page(html: str, url: str = BASE_URL) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Extract trails and the next-page link from a park listing page.
+    
+    Args:
+        html: Raw HTML of the park page
+        url: URL the page was fetched from, used to resolve relative links
+    
+    Returns:
+        Tuple of (list of trail dictionaries, URL of the next page or None)
+    """
+    from bs4 import BeautifulSoup
+    
+    started = time.perf_counter()
+    with span("parse.html", bytes=len(html)):
+        soup = BeautifulSoup(html, "html.parser")
+    with span("extract.park_page"):
+        result = _extract_park_page(soup, url)
+    PARSE_SECONDS.labels("park").observe(time.perf_counter() - started)
+    return result
+
+
+def _extract_park_page(soup: "BeautifulSoup", url: str) -> Tuple[List[Dict], Optional[str]]:
+    """Extract trails and the next-page link from a parsed park listing page."""
+    next_url = _find_next_page_url(soup, url)
+    trails = []
+    
+    # Try multiple selectors for trail cards as AllTrails may update their HTML
+    card_selectors = [
+        "div[data-testid='trail-card']",
+        "div.trail-card",
+        "a[data-testid='trail-card-title-link']",
+        ".styles-module__container___3ZXxx"
+    ]
+    
+    cards = []
+    for selector in card_selectors:
+        cards = soup.select(selector)
+        if cards:
+            logger.info(f"Found {len(cards)} trail cards using selector: {selector}")
+            break
+    
+    if not cards:
+        # Try to find any links that look like trails
+        trail_links = soup.find_all("a", href=re.compile(r"/trail/"))
+        logger.info(f"Found {len(trail_links)} trail links as fallback")
         
-        cards = []
-        for selector in card_selectors:
-            cards = soup.select(selector)
-            if cards:
-                logger.info(f"Found {len(cards)} trail cards using selector: {selector}")
-                break
+        for link in trail_links:
+            name = link.get_text(strip=True)
+            if name and len(name) > 3:  # Filter out very short names
+                trails.append({
+                    "name": name,
+                    "url": _absolute_url(link["href"], url),
+                    "summary": "",
+                    "difficulty": "",
+                    "length": "",
+                    "rating": ""
+                })
         
-        if not cards:
-            # Try to find any links that look like trails
-            trail_links = soup.find_all("a", href=re.compile(r"/trail/"))
-            logger.info(f"Found {len(trail_links)} trail links as fallback")
+        return trails, next_url
+    
+    # Process trail cards
+    for card in cards:
+        try:
+            # Try different methods to extract trail information
+            name_elem = (
+                card.find("a", {"data-testid": "trail-card-title-link"}) or
+                card.find("h3") or
+                card.find("a", href=re.compile(r"/trail/")) or
+                card.find("span", class_=re.compile(r"name|title", re.I))
+            )
             
-            for link in trail_links[:20]:  # Limit to prevent too many results
-                name = link.get_text(strip=True)
-                if name and len(name) > 3:  # Filter out very short names
-                    trail_url = BASE_URL + link["href"] if link["href"].startswith("/") else link["href"]
-                    trails.append({
-                        "name": name,
-                        "url": trail_url,
-                        "summary": "",
-                        "difficulty": "",
-                        "length": "",
-                        "rating": ""
-                    })
+            if not name_elem:
+                continue
+            
+            name = name_elem.get_text(strip=True)
+            if not name:
+                continue
+            
+            # Get trail URL
+            trail_url = None
+            if name_elem.name == "a" and name_elem.get("href"):
+                trail_url = _absolute_url(name_elem["href"], url)
+            else:
+                # Look for any link in the card
+                link_elem = card.find("a", href=re.compile(r"/trail/"))
+                if link_elem:
+                    trail_url = _absolute_url(link_elem["href"], url)
+            
+            if not trail_url:
+                continue
+            
+            # Extract difficulty
+            difficulty_elem = (
+                card.find("span", class_=re.compile(r"difficulty", re.I)) or
+                card.find("div", class_=re.compile(r"difficulty", re.I)) or
+                card.find(text=re.compile(r"Easy|Moderate|Hard", re.I))
+            )
+            difficulty = difficulty_elem.get_text(strip=True) if hasattr(difficulty_elem, 'get_text') else str(difficulty_elem).strip() if difficulty_elem else ""
+            
+            # Extract summary/description
+            summary_selectors = [
+                "div.styles-module__text___1Jt3Z",
+                "p[data-testid='trail-card-description']",
+                ".trail-description",
+                "p"
+            ]
+            
+            summary = ""
+            for selector in summary_selectors:
+                summary_elem = card.select_one(selector)
+                if summary_elem:
+                    summary = summary_elem.get_text(strip=True)
+                    if len(summary) > 20:  # Only use if it's substantial
+                        break
+            
+            # Try to extract length and rating from card text
+            card_text = card.get_text()
+            length, rating = extract_distance_and_rating(card_text)
+            
+            # Route type is shown as its own label when present (e.g., "Loop")
+            route_elem = card.find(string=ROUTE_TYPE_LABEL_RE)
+            route_type = route_elem.strip() if route_elem else ""
+            
+            trail_data = {
+                "name": name,
+                "url": trail_url,
+                "summary": summary,
+                "difficulty": difficulty,
+                "length": length or "",
+                "rating": rating or "",
+                "route_type": route_type
+            }
             
-            return trails
+            trails.append(trail_data)
+            
+        except Exception as e:
+            logger.warning(f"Error processing trail card: {e}")
+            continue
+    
+    return trails, next_url
+
+
+def fetch_park_page(
+    park_slug: str,
+    number: int = 1,
+    url: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> Optional[ParkPage]:
+    """
+    Fetch and parse a single page of a park's trail listing.
+    
+    Args:
+        park_slug: Park identifier
+        number: Page number, starting at 1
+        url: URL of the page. Defaults to the park's first page.
+        etag: ETag of a cached copy, to revalidate instead of re-downloading
+        last_modified: Last-Modified of a cached copy, to revalidate instead of re-downloading
+    
+    Returns:
+        ParkPage with the page's trails and the link to the next page, or None
+        if validators were given and the page has not changed (HTTP 304)
+    
+    Raises:
+        requests.RequestException: If the page could not be fetched
+    """
+    url = url or park_url(park_slug)
+    logger.info(f"Fetching trails from: {url} (page {number})")
+    resp = fetch_response(url, etag=etag, last_modified=last_modified)
+    if resp.status_code == 304:
+        return None
+    
+    pool = current_parser_pool()
+    if pool is not None:
+        parsed = pool.submit_park_page(resp.text, url).result()
+        trails, next_url = parsed["trails"], parsed["next_url"]
+    else:
+        trails, next_url = parse_park_page(resp.text, url)
+    return ParkPage(
+        number=number,
+        url=url,
+        trails=trails,
+        next_url=next_url,
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified")
+    )
+
+
+def iter_park_pages(park_slug: str, max_pages: Optional[int] = None) -> Iterator[ParkPage]:
+    """
+    Lazily crawl a park's trail listing, one page at a time.
+    
+    Pages are only requested as the caller iterates, so stopping early
+    (e.g. once enough trails have been collected) avoids fetching the rest.
+    
+    Args:
+        park_slug: Park identifier
+        max_pages: Maximum number of pages to fetch (None for no limit)
+    
+    Yields:
+        ParkPage for each page, following next-page / load-more links
+    """
+    url: Optional[str] = park_url(park_slug)
+    number = 1
+    seen_urls = set()
+    
+    while url and url not in seen_urls and (max_pages is None or number <= max_pages):
+        seen_urls.add(url)
+        page = fetch_park_page(park_slug, number, url)
+        yield page
         
-        # Process trail cards
-        for card in cards:
-            try:
-                # Try different methods to extract trail information
-                name_elem = (
-                    card.find("a", {"data-testid": "trail-card-title-link"}) or
-                    card.find("h3") or
-                    card.find("a", href=re.compile(r"/trail/")) or
-                    card.find("span", class_=re.compile(r"name|title", re.I))
-                )
-                
-                if not name_elem:
-                    continue
-                
-                name = name_elem.get_text(strip=True)
-                if not name:
-                    continue
-                
-                # Get trail URL
-                trail_url = None
-                if name_elem.name == "a" and name_elem.get("href"):
-                    trail_url = BASE_URL + name_elem["href"] if name_elem["href"].startswith("/") else name_elem["href"]
-                else:
-                    # Look for any link in the card
-                    link_elem = card.find("a", href=re.compile(r"/trail/"))
-                    if link_elem:
-                        trail_url = BASE_URL + link_elem["href"] if link_elem["href"].startswith("/") else link_elem["href"]
-                
-                if not trail_url:
+        if not page.trails:
+            break
+        url = page.next_url
+        number += 1
+
+
+def search_trails_in_park(
+    park_slug: str,
+    limit: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> List[Trail]:
+    """
+    Search for trails in a specific park.
+    
+    WARNING: AllTrails implements CAPTCHA and rate limiting. Use sparingly with delays
+    between requests to avoid triggering anti-bot protection (403 errors).
+    
+    Args:
+        park_slug: Park identifier (e.g., 'us/tennessee/great-smoky-mountains-national-park')
+        limit: Maximum number of trails to return. Further pages are crawled
+               until this many trails have been found.
+        max_pages: Maximum number of listing pages to crawl. If neither
+                   limit nor max_pages is given, only the first page is read.
+    
+    Returns:
+        List of Trail records with name, url, summary, difficulty, length, rating, etc.
+    """
+    import requests
+    
+    if limit is None and max_pages is None:
+        max_pages = 1
+    
+    trails: List[Trail] = []
+    seen_urls = set()
+    
+    try:
+        for page in iter_park_pages(park_slug, max_pages=max_pages):
+            for trail in page.trails:
+                if trail["url"] in seen_urls:
                     continue
-                
-                # Extract difficulty
-                difficulty_elem = (
-                    card.find("span", class_=re.compile(r"difficulty", re.I)) or
-                    card.find("div", class_=re.compile(r"difficulty", re.I)) or
-                    card.find(text=re.compile(r"Easy|Moderate|Hard", re.I))
-                )
-                difficulty = difficulty_elem.get_text(strip=True) if hasattr(difficulty_elem, 'get_text') else str(difficulty_elem).strip() if difficulty_elem else ""
-                
-                # Extract summary/description
-                summary_selectors = [
-                    "div.styles-module__text___1Jt3Z",
-                    "p[data-testid='trail-card-description']",
-                    ".trail-description",
-                    "p"
-                ]
-                
-                summary = ""
-                for selector in summary_selectors:
-                    summary_elem = card.select_one(selector)
-                    if summary_elem:
-                        summary = summary_elem.get_text(strip=True)
-                        if len(summary) > 20:  # Only use if it's substantial
-                            break
-                
-                # Try to extract length and rating from card text
-                card_text = card.get_text()
-                length, rating = extract_distance_and_rating(card_text)
-                
-                trail_data = {
-                    "name": name,
-                    "url": trail_url,
-                    "summary": summary,
-                    "difficulty": difficulty,
-                    "length": length or "",
-                    "rating": rating or ""
-                }
-                
-                trails.append(trail_data)
-                
-            except Exception as e:
-                logger.warning(f"Error processing trail card: {e}")
-                continue
+                seen_urls.add(trail["url"])
+                trails.append(Trail.from_dict(trail))
+            
+            if limit is not None and len(trails) >= limit:
+                trails = trails[:limit]
+                break
         
         logger.info(f"Successfully extracted {len(trails)} trails")
         return trails
         
     except requests.RequestException as e:
-        logger.error(f"Request error when fetching {url}: {e}")
-        return []
+        logger.error(f"Request error when fetching trails for {park_slug}: {e}")
+        return trails
     except Exception as e:
         logger.error(f"Unexpected error when parsing trails: {e}")
-        return []
+        return trails
+
+
+def parse_trail_page(html: str, url: str, slug: str) -> Dict:
+    """
+    Extract trail details from a trail page.
+    
+    Args:
+        html: Raw HTML of the trail page
+        url: URL the page was fetched from
+        slug: Trail slug, used as a fallback title
+    
+    Returns:
+        Dictionary with detailed trail information
+    """
+    from bs4 import BeautifulSoup
+    
+    started = time.perf_counter()
+    with span("parse.html", bytes=len(html)):
+        soup = BeautifulSoup(html, "html.parser")
+    with span("extract.trail_page"):
+        result = _extract_trail_page(soup, url, slug)
+    PARSE_SECONDS.labels("trail").observe(time.perf_counter() - started)
+    return result
 
 
-def get_trail_by_slug(slug: str) -> Dict:
+def _extract_trail_page(soup: "BeautifulSoup", url: str, slug: str) -> Dict:
+    """Extract trail details from a parsed trail page."""
+    # Extract title
+    title_selectors = [
+        "h1[data-testid='trail-title']",
+        "h1.styles-module__title___1BPJy",
+        "h1",
+        "[data-testid='trail-name']"
+    ]
+    
+    title = None
+    for selector in title_selectors:
+        title_elem = soup.select_one(selector)
+        if title_elem:
+            title = title_elem.get_text(strip=True)
+            break
+    
+    # Extract summary/description
+    summary_selectors = [
+        "[data-testid='trail-description']",
+        "div.styles-module__text___1Jt3Z",
+        ".trail-description",
+        "meta[name='description']"
+    ]
+    
+    summary = ""
+    for selector in summary_selectors:
+        if selector.startswith("meta"):
+            elem = soup.select_one(selector)
+            if elem:
+                summary = elem.get("content", "")
+                break
+        else:
+            elem = soup.select_one(selector)
+            if elem:
+                summary = elem.get_text(strip=True)
+                if len(summary) > 50:  # Only use substantial descriptions
+                    break
+    
+    # Extract stats
+    stats = {}
+    
+    # Method 1: Look for specific stat elements
+    stat_selectors = [
+        "[data-testid='trail-length']",
+        "[data-testid='trail-elevation']",
+        "[data-testid='trail-difficulty']",
+        "span.css-1d3z3hw",
+        ".trail-stats span"
+    ]
+    
+    for selector in stat_selectors:
+        elements = soup.select(selector)
+        for elem in elements:
+            text = elem.get_text(strip=True)
+            if "mi" in text or "km" in text:
+                stats["length"] = text
+            elif "ft" in text or "m" in text and "gain" in text.lower():
+                stats["elevation_gain"] = text
+    
+    # Method 2: Look for structured data or specific patterns
+    page_text = soup.get_text()
+    
+    # Extract length
+    length_match = re.search(r'Length[:\s]*(\d+\.?\d*\s*(?:mi|km|miles|kilometers))', page_text, re.I)
+    if length_match and "length" not in stats:
+        stats["length"] = length_match.group(1)
+    
+    # Extract elevation gain
+    elevation_match = re.search(r'Elevation[:\s]*(\d+\.?\d*\s*(?:ft|feet|m|meters))', page_text, re.I)
+    if elevation_match and "elevation_gain" not in stats:
+        stats["elevation_gain"] = elevation_match.group(1)
+    
+    # Extract difficulty
+    difficulty_match = re.search(r'Difficulty[:\s]*(Easy|Moderate|Hard)', page_text, re.I)
+    difficulty = difficulty_match.group(1) if difficulty_match else ""
+    
+    # Extract rating
+    rating_selectors = [
+        "[data-testid='trail-rating']",
+        ".reviewRating",
+        ".rating-display"
+    ]
+    
+    rating = ""
+    for selector in rating_selectors:
+        rating_elem = soup.select_one(selector)
+        if rating_elem:
+            rating_text = rating_elem.get_text(strip=True)
+            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+            if rating_match:
+                rating = rating_match.group(1)
+                break
+    
+    # Extract route type
+    route_type = ""
+    route_match = re.search(r'Route type[:\s]*(Out & back|Loop|Point to point)', page_text, re.I)
+    if route_match:
+        route_type = route_match.group(1)
+    
+    return {
+        "title": title or f"Trail {slug}",
+        "summary": summary,
+        "length": stats.get("length", ""),
+        "elevation_gain": stats.get("elevation_gain", ""),
+        "route_type": route_type,
+        "difficulty": difficulty,
+        "rating": rating,
+        "url": url,
+        "stats": stats
+    }
+
+
+def fetch_trail_page(
+    slug: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None
+) -> Optional[TrailPage]:
+    """
+    Fetch and parse a trail detail page.
+    
+    Args:
+        slug: Trail slug from AllTrails URL
+        etag: ETag of a cached copy, to revalidate instead of re-downloading
+        last_modified: Last-Modified of a cached copy, to revalidate instead of re-downloading
+    
+    Returns:
+        TrailPage with the trail details, or None if validators were given
+        and the page has not changed (HTTP 304)
+    
+    Raises:
+        requests.RequestException: If the page could not be fetched
+    """
+    url = trail_url(slug)
+    logger.info(f"Fetching trail details from: {url}")
+    resp = fetch_response(url, etag=etag, last_modified=last_modified)
+    if resp.status_code == 304:
+        return None
+    
+    pool = current_parser_pool()
+    if pool is not None:
+        details = pool.submit_trail_page(resp.text, url, slug).result()
+    else:
+        details = parse_trail_page(resp.text, url, slug)
+    return TrailPage(
+        slug=slug,
+        url=url,
+        details=TrailDetail.from_dict(details),
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified")
+    )
+
+
+def get_trail_by_slug(slug: str) -> TrailDetail:
     """
     Get detailed information about a specific trail.
     
@@ -190,130 +779,19 @@ def get_trail_by_slug(slug: str) -> Dict:
         slug: Trail slug from AllTrails URL
     
     Returns:
-        Dictionary with detailed trail information
+        TrailDetail with detailed trail information (with an empty title and
+        the error as summary if the trail could not be fetched)
     """
-    url = f"{BASE_URL}/trail/{slug}"
+    import requests
+    
+    url = trail_url(slug)
     
     try:
-        logger.info(f"Fetching trail details from: {url}")
-        resp = requests.get(url, headers=get_headers(), timeout=10)
-        resp.raise_for_status()
-        
-        soup = BeautifulSoup(resp.text, "html.parser")
-        
-        # Extract title
-        title_selectors = [
-            "h1[data-testid='trail-title']",
-            "h1.styles-module__title___1BPJy",
-            "h1",
-            "[data-testid='trail-name']"
-        ]
-        
-        title = None
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = title_elem.get_text(strip=True)
-                break
-        
-        # Extract summary/description
-        summary_selectors = [
-            "[data-testid='trail-description']",
-            "div.styles-module__text___1Jt3Z",
-            ".trail-description",
-            "meta[name='description']"
-        ]
-        
-        summary = ""
-        for selector in summary_selectors:
-            if selector.startswith("meta"):
-                elem = soup.select_one(selector)
-                if elem:
-                    summary = elem.get("content", "")
-                    break
-            else:
-                elem = soup.select_one(selector)
-                if elem:
-                    summary = elem.get_text(strip=True)
-                    if len(summary) > 50:  # Only use substantial descriptions
-                        break
-        
-        # Extract stats
-        stats = {}
-        
-        # Method 1: Look for specific stat elements
-        stat_selectors = [
-            "[data-testid='trail-length']",
-            "[data-testid='trail-elevation']",
-            "[data-testid='trail-difficulty']",
-            "span.css-1d3z3hw",
-            ".trail-stats span"
-        ]
-        
-        for selector in stat_selectors:
-            elements = soup.select(selector)
-            for elem in elements:
-                text = elem.get_text(strip=True)
-                if "mi" in text or "km" in text:
-                    stats["length"] = text
-                elif "ft" in text or "m" in text and "gain" in text.lower():
-                    stats["elevation_gain"] = text
-        
-        # Method 2: Look for structured data or specific patterns
-        page_text = soup.get_text()
-        
-        # Extract length
-        length_match = re.search(r'Length[:\s]*(\d+\.?\d*\s*(?:mi|km|miles|kilometers))', page_text, re.I)
-        if length_match and "length" not in stats:
-            stats["length"] = length_match.group(1)
-        
-        # Extract elevation gain
-        elevation_match = re.search(r'Elevation[:\s]*(\d+\.?\d*\s*(?:ft|feet|m|meters))', page_text, re.I)
-        if elevation_match and "elevation_gain" not in stats:
-            stats["elevation_gain"] = elevation_match.group(1)
-        
-        # Extract difficulty
-        difficulty_match = re.search(r'Difficulty[:\s]*(Easy|Moderate|Hard)', page_text, re.I)
-        difficulty = difficulty_match.group(1) if difficulty_match else ""
-        
-        # Extract rating
-        rating_selectors = [
-            "[data-testid='trail-rating']",
-            ".reviewRating",
-            ".rating-display"
-        ]
-        
-        rating = ""
-        for selector in rating_selectors:
-            rating_elem = soup.select_one(selector)
-            if rating_elem:
-                rating_text = rating_elem.get_text(strip=True)
-                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                if rating_match:
-                    rating = rating_match.group(1)
-                    break
-        
-        # Extract route type
-        route_type = ""
-        route_match = re.search(r'Route type[:\s]*(Out & back|Loop|Point to point)', page_text, re.I)
-        if route_match:
-            route_type = route_match.group(1)
-        
-        return {
-            "title": title or f"Trail {slug}",
-            "summary": summary,
-            "length": stats.get("length", ""),
-            "elevation_gain": stats.get("elevation_gain", ""),
-            "route_type": route_type,
-            "difficulty": difficulty,
-            "rating": rating,
-            "url": url,
-            "stats": stats
-        }
+        return fetch_trail_page(slug).details
         
     except requests.RequestException as e:
         logger.error(f"Request error when fetching {url}: {e}")
-        return {"title": "", "summary": f"Error fetching trail: {e}", "url": url}
+        return TrailDetail(title="", url=url, summary=f"Error fetching trail: {e}")
     except Exception as e:
         logger.error(f"Unexpected error when parsing trail {slug}: {e}")
-        return {"title": "", "summary": f"Error parsing trail: {e}", "url": url}
+        return TrailDetail(title="", url=url, summary=f"Error parsing trail: {e}")
@@ -2,9 +2,17 @@
 # Copyright (c) 2025 Srinath Srinivasan
 # Licensed under the MIT License - see LICENSE file for details
 
+import argparse
 import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import os
 import sys
+import time
 from datetime import datetime
+from typing import Any, Optional, Tuple, Union
 
 print(f"{datetime.now()}: Starting AllTrails MCP server", file=sys.stderr)
 
@@ -18,180 +26,697 @@ try:
     
     # Import AllTrails scraper and cache
 
-    from alltrails_mcp.scraper import get_trail_by_slug
-    
-    from alltrails_mcp.cache import TrailCache, search_trails_with_cache
-    from alltrails_mcp.parks import get_park_slug, list_parks
+    from alltrails_mcp.cache import (
+        TrailCache,
+        search_trails_with_cache,
+        get_trail_details_with_cache,
+        get_trail_details_batch_with_cache,
+    )
+    from alltrails_mcp.models import KM_PER_MILE, Difficulty, TrailDetail
+    from alltrails_mcp.parks import get_park_slug, park_directory
+    from alltrails_mcp.prefetch import Prefetcher, create_prefetcher, prefetch_count
+    from alltrails_mcp.refresh import create_refresh_daemon
+    from alltrails_mcp.render import (
+        DEFAULT_MAX_CHARS,
+        DEFAULT_PAGE_SIZE,
+        decode_cursor,
+        encode_cursor,
+        PARK_LIST_SCHEMA,
+        TRAIL_BATCH_SCHEMA,
+        TRAIL_DETAIL_SCHEMA,
+        TRAIL_LIST_SCHEMA,
+        render_freshness,
+        render_park_list,
+        render_park_list_json,
+        render_trail_list,
+        render_trail_list_json,
+        render_trail_batch,
+        render_trail_batch_json,
+        render_trail_detail,
+        trail_detail_json,
+        with_freshness,
+    )
+    from alltrails_mcp.metrics import (
+        TOOL_CACHE_RESULTS,
+        TOOL_CALL_SECONDS,
+        TOOL_CALLS,
+        metrics_port,
+        start_http_server,
+    )
+    from alltrails_mcp.profiling import profiler_from_env
+    from alltrails_mcp.recording import recorder_from_env
+    from alltrails_mcp.scraper import trail_slug, trail_url
+    from alltrails_mcp.tracing import span
+    from alltrails_mcp.upstream import deadline_remaining, request_deadline
     print("AllTrails scraper and cache imports successful", file=sys.stderr)
     
-    # Initialize cache
-    cache = TrailCache()
+    # The cache is opened on first use, so the server can answer initialize and
+    # list_tools without touching SQLite
+    _cache = None
+    
+    def get_cache() -> TrailCache:
+        global _cache
+        if _cache is None:
+            _cache = TrailCache()
+        return _cache
+    
+    # Opt-in background prefetch of the top trails' details after a search (ALLTRAILS_PREFETCH)
+    _prefetcher = None
+    
+    def get_prefetcher() -> Optional[Prefetcher]:
+        global _prefetcher
+        if _prefetcher is None and prefetch_count():
+            _prefetcher = create_prefetcher(get_cache())
+        return _prefetcher
+    
+    # Optional background refresh of frequently used cache entries (ALLTRAILS_REFRESH_INTERVAL)
+    refresher = create_refresh_daemon(get_cache)
+    
+    # Optional recording of tool calls for replay (ALLTRAILS_RECORD)
+    recorder = recorder_from_env()
+    
+    # Optional CPU / memory profiles of every Nth tool call (ALLTRAILS_PROFILE)
+    profiler = profiler_from_env()
     
     server = Server("alltrails-mcp")
     
+    # Server-wide response format ("markdown" or "json"); tools take a "format" argument to override it
+    OUTPUT_FORMAT = os.environ.get("ALLTRAILS_OUTPUT_FORMAT", "markdown").lower()
+    if OUTPUT_FORMAT not in ("markdown", "json"):
+        print(f"Unknown ALLTRAILS_OUTPUT_FORMAT '{OUTPUT_FORMAT}', using markdown", file=sys.stderr)
+        OUTPUT_FORMAT = "markdown"
+    
+    # Clients validate every result of a tool that declares an output schema, so
+    # schemas are only advertised when all responses are JSON, and only if the
+    # installed mcp version supports them
+    STRUCTURED_OUTPUT = OUTPUT_FORMAT == "json" and "outputSchema" in getattr(types.Tool, "model_fields", {})
+    
+    FORMAT_PROPERTY = {} if STRUCTURED_OUTPUT else {
+        "format": {
+            "type": "string",
+            "enum": ["markdown", "json"],
+            "description": f"Response format: readable markdown or compact JSON (default: {OUTPUT_FORMAT})"
+        }
+    }
+    
+    # Tools that may have to wait on AllTrails take a deadline
+    TIMEOUT_PROPERTY = {
+        "timeout": {
+            "type": "number",
+            "minimum": 1,
+            "description": "Seconds to wait for AllTrails before answering with stale or partial cached data (default set by the server)"
+        }
+    }
+    
+    def output_schema(schema: dict) -> dict:
+        """Tool keyword arguments advertising an output schema, if enabled."""
+        return {"outputSchema": schema} if STRUCTURED_OUTPUT else {}
+    
+    def response_format(arguments: dict) -> str:
+        if STRUCTURED_OUTPUT:
+            return "json"
+        return arguments.get("format") or OUTPUT_FORMAT
+    
+    def text_response(text: str):
+        return [types.TextContent(type="text", text=text)]
+    
+    def json_response(text: str):
+        """Return pre-encoded JSON, as structured content too when schemas are advertised."""
+        if STRUCTURED_OUTPUT:
+            return types.CallToolResult(
+                content=[types.TextContent(type="text", text=text)],
+                structuredContent=json.loads(text)
+            )
+        return text_response(text)
+    
+    def error_response(text: str):
+        if STRUCTURED_OUTPUT:
+            return types.CallToolResult(content=[types.TextContent(type="text", text=text)], isError=True)
+        return text_response(text)
+    
+    # search_trails arguments that select and order trails (carried in cursors)
+    TRAIL_QUERY_ARGUMENTS = ("min_rating", "max_length", "difficulty", "route_type", "sort_by", "limit")
+    
+    def trail_query_filters(query: dict) -> dict:
+        """Convert search_trails query arguments to TrailCache.query_trails filters."""
+        filters = {}
+        if query.get("min_rating") is not None:
+            filters["min_rating"] = query["min_rating"]
+        if query.get("max_length") is not None:
+            filters["max_length_km"] = query["max_length"] * KM_PER_MILE
+        if query.get("difficulty"):
+            filters["difficulty"] = Difficulty[query["difficulty"].upper()]
+        if query.get("route_type"):
+            filters["route_type"] = query["route_type"]
+        return filters
+    
+    @functools.lru_cache(maxsize=64)
+    def park_list_response(fmt: str, offset: int, page_size: int, max_chars: int):
+        """
+        Render a list_parks response.
+        
+        The park list is static, so each distinct page is rendered once and the
+        same response object is served on every later call.
+        """
+        parks = park_directory()
+        page = parks[offset:offset + page_size]
+        
+        def next_cursor(next_offset: int) -> str:
+            return encode_cursor({"offset": next_offset, "page_size": page_size})
+        
+        if fmt == "json":
+            response, _ = render_park_list_json(page, len(parks), next_cursor, offset, max_chars)
+            return json_response(response)
+        
+        response, _ = render_park_list(page, len(parks), max_chars, next_cursor, offset)
+        return text_response(response)
+    
+    # Maximum number of trails per get_trails_details_batch call
+    MAX_BATCH_SIZE = 25
+    
+    # Tool definitions never change while the server runs, so they are built once
+    TOOLS = [
+        types.Tool(
+            name="search_trails",
+            description="Search for trails in a specific national park using AllTrails data",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "park": {
+                        "type": "string",
+                        "description": "Park name (e.g., 'Yosemite', 'Grand Canyon') or slug in format 'us/state/park-name' (e.g., 'us/tennessee/great-smoky-mountains-national-park'). Required unless a cursor is given."
+                    },
+                    "min_rating": {
+                        "type": "number",
+                        "description": "Only return trails rated at least this (0-5)"
+                    },
+                    "max_length": {
+                        "type": "number",
+                        "description": "Only return trails at most this long, in miles"
+                    },
+                    "difficulty": {
+                        "type": "string",
+                        "enum": ["easy", "moderate", "hard"],
+                        "description": "Only return trails of this difficulty"
+                    },
+                    "route_type": {
+                        "type": "string",
+                        "enum": ["loop", "out & back", "point to point"],
+                        "description": "Only return trails of this route type"
+                    },
+                    "sort_by": {
+                        "type": "string",
+                        "enum": ["rating", "length"],
+                        "description": "Sort by rating (highest first) or length (shortest first)"
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Maximum number of trails to return (e.g., top 5 by rating)"
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Number of trails to skip"
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Maximum number of trails per response (default 20)"
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Character budget for the response (default 8000); longer listings are cut short with a cursor"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from a previous response to fetch the next page; the other arguments are taken from the cursor"
+                    },
+                    **TIMEOUT_PROPERTY,
+                    **FORMAT_PROPERTY
+                },
+                "required": []
+            },
+            **output_schema(TRAIL_LIST_SCHEMA)
+        ),
+        types.Tool(
+            name="get_trail_details",
+            description="Get detailed information about a specific trail by its AllTrails slug",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "slug": {
+                        "type": "string",
+                        "description": "Trail slug from AllTrails URL (the part after '/trail/')"
+                    },
+                    **TIMEOUT_PROPERTY,
+                    **FORMAT_PROPERTY
+                },
+                "required": ["slug"]
+            },
+            **output_schema(TRAIL_DETAIL_SCHEMA)
+        ),
+        types.Tool(
+            name="get_trails_details_batch",
+            description="Get detailed information about several trails at once by their AllTrails slugs. Faster than calling get_trail_details repeatedly: cached trails return immediately and the rest are fetched concurrently. Results are in input order, with an error for any trail that could not be fetched.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "slugs": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "minItems": 1,
+                        "maxItems": MAX_BATCH_SIZE,
+                        "description": f"Trail slugs from AllTrails URLs (the part after '/trail/'), at most {MAX_BATCH_SIZE}"
+                    },
+                    **TIMEOUT_PROPERTY,
+                    **FORMAT_PROPERTY
+                },
+                "required": ["slugs"]
+            },
+            **output_schema(TRAIL_BATCH_SCHEMA)
+        ),
+        types.Tool(
+            name="list_parks",
+            description="List all available US National Parks with their names and slugs. Use this to discover valid park names before searching for trails.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "offset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Number of parks to skip"
+                    },
+                    "page_size": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Maximum number of parks per response"
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Character budget for the response (default 8000); longer listings are cut short with a cursor"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from a previous response to fetch the next page"
+                    },
+                    **FORMAT_PROPERTY
+                },
+                "required": []
+            },
+            **output_schema(PARK_LIST_SCHEMA)
+        )
+    ]
+    
     @server.list_tools()
     async def handle_list_tools() -> list[types.Tool]:
         print("list_tools called", file=sys.stderr)
-        return [
-            types.Tool(
-                name="search_trails",
-                description="Search for trails in a specific national park using AllTrails data",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "park": {
-                            "type": "string",
-                            "description": "Park name (e.g., 'Yosemite', 'Grand Canyon') or slug in format 'us/state/park-name' (e.g., 'us/tennessee/great-smoky-mountains-national-park')"
-                        }
-                    },
-                    "required": ["park"]
-                }
-            ),
-            types.Tool(
-                name="get_trail_details",
-                description="Get detailed information about a specific trail by its AllTrails slug",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "slug": {
-                            "type": "string",
-                            "description": "Trail slug from AllTrails URL (the part after '/trail/')"
-                        }
-                    },
-                    "required": ["slug"]
-                }
-            ),
-            types.Tool(
-                name="list_parks",
-                description="List all available US National Parks with their names and slugs. Use this to discover valid park names before searching for trails.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            )
-        ]
+        return TOOLS
+    
+    # Render the default park listing at startup so the first call is as cheap as the rest
+    park_list_response(response_format({}), 0, len(park_directory()), DEFAULT_MAX_CHARS)
     
-    @server.call_tool()
-    async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent]:
-        print(f"call_tool: {name} with {arguments}", file=sys.stderr)
+    # The SDK validates arguments with jsonschema.validate, which re-checks the
+    # whole schema on every call; compile one validator per tool instead
+    try:
+        import jsonschema
+    except ImportError:  # older mcp releases do not depend on jsonschema
+        jsonschema = None
+    
+    INPUT_VALIDATORS = {
+        tool.name: jsonschema.validators.validator_for(tool.inputSchema)(tool.inputSchema)
+        for tool in TOOLS
+    } if jsonschema else {}
+    
+    try:
+        register_call_tool = server.call_tool(validate_input=False)
+    except TypeError:  # mcp releases without built-in input validation
+        register_call_tool = server.call_tool()
+    
+    # Limits the tool calls handled at once across all clients; created by serve() (--max-tool-calls)
+    DEFAULT_MAX_TOOL_CALLS = 16
+    tool_call_slots: Optional[asyncio.Semaphore] = None
+    
+    # Seconds a tool call may wait on AllTrails, unless the call gives a timeout (--tool-timeout;
+    # None for no limit). Fetches stop a little earlier, leaving time to answer with what they got.
+    DEFAULT_TOOL_TIMEOUT = 30.0
+    RESPONSE_MARGIN_SECONDS = 0.5
+    tool_timeout: Optional[float] = DEFAULT_TOOL_TIMEOUT
+    
+    # Trails crawled at least for a park on a search_trails cache miss; searches that
+    # page further crawl further, and filtered or sorted searches crawl the whole listing
+    SEARCH_LIMIT = 15
+    
+    async def fetch_within_deadline(func, *args, **kwargs) -> Tuple[bool, Any]:
+        """
+        Run a blocking fetch in a worker thread, waiting for it until the tool call's deadline.
+        
+        The worker runs in a copy of the current context, so its upstream
+        requests stop at the deadline too. A fetch still running then is left
+        to finish in the background, and caches whatever it gets.
+        
+        Returns:
+            Tuple of (finished, result); result is None if the fetch did not finish in time
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, functools.partial(contextvars.copy_context().run, func, *args, **kwargs))
+        remaining = deadline_remaining()
+        if remaining is None:
+            return True, await future
+        
+        done, _ = await asyncio.wait({future}, timeout=max(0.0, remaining) + RESPONSE_MARGIN_SECONDS)
+        if not done:
+            print("Deadline passed while fetching from AllTrails", file=sys.stderr)
+            return False, None
+        return True, future.result()
+    
+    def deadline_passed() -> bool:
+        remaining = deadline_remaining()
+        return remaining is not None and remaining <= 0
+    
+    def timeout_response(timeout: float, what: str):
+        return error_response(
+            f"AllTrails did not answer within {timeout:g}s and {what} is not cached. "
+            "Try again later or with a longer timeout."
+        )
+    
+    def search_park(park_slug: str, cache: TrailCache, needed: Optional[int]) -> bool:
+        """Crawl a park's listing into the cache until it has `needed` trails (None for every page); True if it got them."""
+        trails = search_trails_with_cache(park_slug, cache=cache, limit=needed)
+        return (needed is not None and len(trails) >= needed) or cache.is_crawl_complete(park_slug)
+    
+    @register_call_tool
+    async def handle_call_tool(name: str, arguments: dict) -> Union[list[types.TextContent], types.CallToolResult]:
+        # Each tool call is one trace; its ID correlates every span the call causes (ALLTRAILS_TRACE)
+        with span("tool_call", tool=name) as call_span:
+            print(f"call_tool: {name} with {arguments}", file=sys.stderr)
+            started_at = time.time()
+            started = time.perf_counter()
+            
+            if tool_call_slots is None:
+                result = await track_tool_call(name, arguments)
+            else:
+                async with tool_call_slots:
+                    result = await track_tool_call(name, arguments)
+            failed = isinstance(result, types.CallToolResult) and bool(result.isError)
+            call_span.set(error=failed)
+            TOOL_CALLS.labels(name, "error" if failed else "ok").inc()
+            duration = time.perf_counter() - started
+            TOOL_CALL_SECONDS.labels(name).observe(duration)
+            if recorder is not None:
+                recorder.record(name, arguments, started_at, duration, failed)
+            return result
+    
+    async def track_tool_call(name: str, arguments: dict) -> Union[list[types.TextContent], types.CallToolResult]:
+        with profiler.profile(name) if profiler is not None else contextlib.nullcontext():
+            if refresher is None:
+                return await call_tool(name, arguments)
+            # Background refreshes wait while tool calls are in progress
+            with refresher.interactive():
+                return await call_tool(name, arguments)
+    
+    async def call_tool(name: str, arguments: dict) -> Union[list[types.TextContent], types.CallToolResult]:
+        
+        validator = INPUT_VALIDATORS.get(name)
+        if validator is not None:
+            error = jsonschema.exceptions.best_match(validator.iter_errors(arguments))
+            if error is not None:
+                return types.CallToolResult(
+                    content=[types.TextContent(type="text", text=f"Input validation error: {error.message}")],
+                    isError=True
+                )
+        
+        fmt = response_format(arguments)
+        
+        timeout = arguments.get("timeout", tool_timeout)
+        with request_deadline(max(0.0, timeout - RESPONSE_MARGIN_SECONDS) if timeout else None):
+            return await run_tool(name, arguments, fmt, timeout)
+    
+    async def run_tool(
+        name: str,
+        arguments: dict,
+        fmt: str,
+        timeout: Optional[float]
+    ) -> Union[list[types.TextContent], types.CallToolResult]:
         
         try:
             if name == "search_trails":
-                park = arguments.get("park")
-                if not park:
-                    return [types.TextContent(type="text", text="Park parameter is required")]
-                
-                # Try to resolve park name to slug (supports both names and slugs)
-                try:
-                    park_slug = get_park_slug(park)
-                    print(f"Searching trails for park: {park} -> {park_slug} (using cache)", file=sys.stderr)
-                except ValueError:
-                    # If not a known park name, assume it's a slug and try it directly
-                    park_slug = park
-                    print(f"Searching trails for park: {park} (as slug, using cache)", file=sys.stderr)
-                
-                # Check if cached before fetching
-                cached_trails = cache.get_cached_trails(park_slug)
-                if cached_trails:
-                    print(f"✓ Cache HIT - returning {len(cached_trails)} cached trails", file=sys.stderr)
-                    trails = cached_trails
+                cache = get_cache()
+                cursor = arguments.get("cursor")
+                if cursor:
+                    # Cursors carry the original search, so later pages read the same cached result
+                    try:
+                        state = decode_cursor(cursor)
+                        park, park_slug, query = state["park"], state["park_slug"], state["query"]
+                        offset, page_size = state["offset"], state["page_size"]
+                    except (ValueError, KeyError):
+                        return error_response(f"Invalid cursor: {cursor}")
                 else:
+                    park = arguments.get("park")
+                    if not park:
+                        return error_response("Park parameter is required")
+                    
+                    # Try to resolve park name to slug (supports both names and slugs)
+                    try:
+                        park_slug = get_park_slug(park)
+                        print(f"Searching trails for park: {park} -> {park_slug} (using cache)", file=sys.stderr)
+                    except ValueError:
+                        # If not a known park name, assume it's a slug and try it directly
+                        park_slug = park
+                        print(f"Searching trails for park: {park} (as slug, using cache)", file=sys.stderr)
+                    
+                    query = {key: arguments[key] for key in TRAIL_QUERY_ARGUMENTS if arguments.get(key) is not None}
+                    offset = arguments.get("offset", 0)
+                    page_size = arguments.get("page_size", DEFAULT_PAGE_SIZE)
+                max_chars = arguments.get("max_chars", DEFAULT_MAX_CHARS)
+                if refresher is not None:
+                    refresher.record_access("park", park_slug)
+                
+                # The top-k limit caps the whole result, across pages
+                page_limit = page_size
+                if query.get("limit") is not None:
+                    page_limit = max(0, min(page_size, query["limit"] - offset))
+                
+                # Filtering, sorting and paging run in SQL against the cached trails.
+                # One extra row tells us whether there is a further page.
+                # JSON responses are spliced from per-trail JSON built by SQLite
+                filters = trail_query_filters(query)
+                select_trails = functools.partial(
+                    cache.aquery_trails_json if fmt == "json" else cache.aquery_trails,
+                    park_slug, **filters, sort_by=query.get("sort_by"), limit=page_limit + 1, offset=offset
+                )
+                # Filters and sort orders apply to the whole park; plain listings need
+                # the trails up to the end of this page (and one more)
+                needed = None if filters or query.get("sort_by") else max(SEARCH_LIMIT, offset + page_limit + 1)
+                trails = await select_trails()
+                freshness = None
+                if trails is not None and await cache.acovers_trails(park_slug, needed):
+                    print(f"✓ Cache HIT - returning {len(trails)} cached trails", file=sys.stderr)
+                    TOOL_CACHE_RESULTS.labels(name, "hit").inc()
+                elif cursor and trails is None:
+                    return error_response(
+                        f"The cached results for {park} have expired. Please search again without a cursor."
+                    )
+                else:
+                    # Not cached, or the cached crawl stops short of this page: crawl further
                     print("✗ Cache MISS - fetching from AllTrails", file=sys.stderr)
-                    trails = search_trails_with_cache(park_slug, cache=cache, limit=15)
+                    # Scrape in a worker thread so other clients' calls keep being served
+                    finished, complete = await fetch_within_deadline(search_park, park_slug, cache, needed)
+                    trails = await select_trails()
+                    if trails is None:
+                        # Nothing fresh from AllTrails in time: fall back to expired cached trails
+                        trails = await select_trails(allow_expired=True)
+                        freshness = "stale" if trails is not None else None
+                    elif finished and not complete:
+                        freshness = "partial"
+                    TOOL_CACHE_RESULTS.labels(name, freshness or "miss").inc()
+                    if trails is None and (not finished or deadline_passed()):
+                        return timeout_response(timeout, park)
+                    trails = trails or []
+                
+                has_more = len(trails) > page_limit and (
+                    query.get("limit") is None or offset + page_limit < query["limit"]
+                )
+                trails = trails[:page_limit]
+                
+                prefetcher = get_prefetcher()
+                if prefetcher is not None and trails:
+                    top_trails = trails[:prefetcher.top_n]
+                    prefetcher.submit(
+                        trail_slug(json.loads(trail)["url"] if fmt == "json" else trail.url)
+                        for trail in top_trails
+                    )
                 
                 if not trails:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"No trails found for park: {park}. Please check the park name or slug format."
-                    )]
-                
-                response = f"Found {len(trails)} trails in {park}:\n\n"
-                for i, trail in enumerate(trails, 1):
-                    response += f"{i}. **{trail['name']}**\n"
-                    if trail.get('difficulty'):
-                        response += f"   - Difficulty: {trail['difficulty']}\n"
-                    if trail.get('length'):
-                        response += f"   - Length: {trail['length']}\n"
-                    if trail.get('rating'):
-                        response += f"   - Rating: {trail['rating']}\n"
-                    if trail.get('summary'):
-                        summary = trail['summary'][:80] + "..." if len(trail['summary']) > 80 else trail['summary']
-                        response += f"   - Summary: {summary}\n"
-                    response += f"   - URL: {trail['url']}\n\n"
-                
-                return [types.TextContent(type="text", text=response)]
+                    park_found = bool(offset) or freshness == "stale" or bool(
+                        filters and await cache.aget_cached_trails(park_slug)
+                    )
+                    if not park_found:
+                        return error_response(
+                            f"No trails found for park: {park}. Please check the park name or slug format."
+                        )
+                    if fmt != "json":
+                        if offset:
+                            return text_response(render_freshness(freshness) + f"No more trails in {park}.")
+                        return text_response(render_freshness(freshness) + f"No trails in {park} match the given filters.")
+                
+                def next_cursor(next_offset: int) -> str:
+                    return encode_cursor({
+                        "park": park,
+                        "park_slug": park_slug,
+                        "query": query,
+                        "offset": next_offset,
+                        "page_size": page_size,
+                    })
+                
+                if fmt == "json":
+                    response, _ = render_trail_list_json(park, trails, next_cursor, offset, has_more, max_chars, freshness)
+                    return json_response(response)
+                
+                response, _ = render_trail_list(park, trails, offset, has_more, max_chars, next_cursor, freshness)
+                return text_response(response)
             
             elif name == "list_parks":
                 print("Listing all available parks", file=sys.stderr)
-                parks = list_parks()
-                
-                response = "# Available US National Parks\n\n"
-                response += f"Total: {len(parks)} parks\n\n"
-                
-                for park_name, slug in sorted(parks.items()):
-                    # Format enum name to title case
-                    display_name = park_name.replace('_', ' ').title()
-                    response += f"- **{display_name}**\n"
-                    response += f"  - Slug: `{slug}`\n"
+                cursor = arguments.get("cursor")
+                if cursor:
+                    try:
+                        state = decode_cursor(cursor)
+                        offset, page_size = state["offset"], state["page_size"]
+                    except (ValueError, KeyError):
+                        return error_response(f"Invalid cursor: {cursor}")
+                else:
+                    offset = arguments.get("offset", 0)
+                    page_size = arguments.get("page_size", len(park_directory()))
+                max_chars = arguments.get("max_chars", DEFAULT_MAX_CHARS)
                 
-                return [types.TextContent(type="text", text=response)]
+                return park_list_response(fmt, offset, page_size, max_chars)
             
             elif name == "get_trail_details":
                 slug = arguments.get("slug")
                 if not slug:
-                    return [types.TextContent(type="text", text="Slug parameter is required")]
+                    return error_response("Slug parameter is required")
                 
                 print(f"Getting trail details for: {slug}", file=sys.stderr)
-                trail = get_trail_by_slug(slug)
+                cache = get_cache()
+                if refresher is not None:
+                    refresher.record_access("trail", slug)
+                
+                # Serve cached details as JSON straight from SQLite when possible
+                if fmt == "json":
+                    response = await cache.aget_cached_trail_details_json(slug)
+                    if response is not None:
+                        TOOL_CACHE_RESULTS.labels(name, "hit").inc()
+                        return json_response(response)
+                
+                trail = await cache.aget_cached_trail_details(slug)
+                freshness = None
+                if trail is not None:
+                    TOOL_CACHE_RESULTS.labels(name, "hit").inc()
+                else:
+                    # Scrape in a worker thread so other clients' calls keep being served
+                    finished, trail = await fetch_within_deadline(get_trail_details_with_cache, slug, cache=cache)
+                    if not trail or not trail.title:
+                        # Nothing fresh from AllTrails in time: fall back to an expired cached copy
+                        stale_trail = await cache.aget_cached_trail_details(slug, allow_expired=True)
+                        if stale_trail is not None:
+                            trail, freshness = stale_trail, "stale"
+                        elif not finished or deadline_passed():
+                            TOOL_CACHE_RESULTS.labels(name, "miss").inc()
+                            return timeout_response(timeout, slug)
+                    TOOL_CACHE_RESULTS.labels(name, freshness or "miss").inc()
                 
                 if not trail or not trail.get('title'):
-                    return [types.TextContent(
-                        type="text",
-                        text=f"Trail not found for slug: {slug}. Please check the trail slug."
-                    )]
-                
-                # Format detailed trail information
-                response = f"# {trail['title']}\n\n"
-                if trail.get('length'):
-                    response += f"**Length:** {trail['length']}\n"
-                if trail.get('elevation_gain'):
-                    response += f"**Elevation Gain:** {trail['elevation_gain']}\n"
-                if trail.get('route_type'):
-                    response += f"**Route Type:** {trail['route_type']}\n"
-                if trail.get('difficulty'):
-                    response += f"**Difficulty:** {trail['difficulty']}\n"
-                if trail.get('rating'):
-                    response += f"**Rating:** {trail['rating']}\n"
-                response += f"**URL:** {trail['url']}\n\n"
-                
-                if trail.get('summary'):
-                    response += f"**Description:**\n{trail['summary']}\n"
-                
-                return [types.TextContent(type="text", text=response)]
+                    return error_response(f"Trail not found for slug: {slug}. Please check the trail slug.")
+                
+                if fmt == "json":
+                    response = await cache.aget_cached_trail_details_json(slug, allow_expired=True)
+                    return json_response(with_freshness(response or trail_detail_json(trail), freshness))
+                
+                return text_response(render_freshness(freshness) + render_trail_detail(trail))
+            
+            elif name == "get_trails_details_batch":
+                slugs = arguments.get("slugs")
+                if not slugs:
+                    return error_response("Slugs parameter is required")
+                
+                print(f"Getting trail details for {len(slugs)} trails", file=sys.stderr)
+                cache = get_cache()
+                if refresher is not None:
+                    for slug in slugs:
+                        refresher.record_access("trail", slug)
+                
+                # Cache misses are fetched concurrently in worker threads; keep the event loop free meanwhile
+                finished, trails = await fetch_within_deadline(get_trail_details_batch_with_cache, slugs, cache=cache)
+                if not finished:
+                    # Trails fetched before the deadline are in the cache already
+                    cached = await asyncio.gather(*(cache.aget_cached_trail_details(slug) for slug in slugs))
+                    trails = [
+                        trail or TrailDetail(title="", url=trail_url(slug), summary="Timed out waiting for AllTrails")
+                        for slug, trail in zip(slugs, cached)
+                    ]
+                
+                # Trails that could not be fetched fall back to expired cached copies
+                failed = list(dict.fromkeys(slug for slug, trail in zip(slugs, trails) if not trail.title))
+                expired = dict(zip(failed, await asyncio.gather(*(
+                    cache.aget_cached_trail_details(slug, allow_expired=True) for slug in failed
+                ))))
+                stale = {slug for slug, trail in expired.items() if trail is not None}
+                trails = [expired.get(slug) or trail for slug, trail in zip(slugs, trails)]
+                # Hits and misses of batched lookups show up in the cache lookup metrics
+                if stale:
+                    TOOL_CACHE_RESULTS.labels(name, "stale").inc(len(stale))
+                
+                if fmt == "json":
+                    # Concurrent lookups are batched into one transaction on the cache thread
+                    found = [slug for slug, trail in zip(slugs, trails) if trail.title]
+                    trail_jsons = dict(zip(found, await asyncio.gather(*(
+                        cache.aget_cached_trail_details_json(slug, allow_expired=True) for slug in found
+                    ))))
+                    items = []
+                    for slug, trail in zip(slugs, trails):
+                        if not trail.title:
+                            items.append((slug, None, trail.summary or "Trail not found"))
+                            continue
+                        response = trail_jsons.get(slug) or trail_detail_json(trail)
+                        items.append((slug, with_freshness(response, "stale" if slug in stale else None), None))
+                    return json_response(render_trail_batch_json(items))
+                
+                return text_response(render_trail_batch(slugs, trails, stale))
             
             else:
-                return [types.TextContent(type="text", text=f"Unknown tool: {name}")]
+                return error_response(f"Unknown tool: {name}")
         
         except Exception as e:
             print(f"Error in tool {name}: {e}", file=sys.stderr)
             import traceback
             traceback.print_exc(file=sys.stderr)
-            return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+            return error_response(f"Error: {str(e)}")
     
-    async def main():
-        print("Creating server capabilities", file=sys.stderr)
-        
+    DEFAULT_HTTP_HOST = "127.0.0.1"
+    
+    def parse_http_address(value: str) -> Tuple[str, int]:
+        """Parse an --http address such as ":8000", "8000" or "0.0.0.0:8000"."""
+        host, _, port = value.rpartition(":")
+        try:
+            return host or DEFAULT_HTTP_HOST, int(port)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid address '{value}', expected [HOST]:PORT")
+    
+    def initialization_options() -> InitializationOptions:
         capabilities = types.ServerCapabilities(
             tools=types.ToolsCapability(listChanged=False)
         )
         
-        init_options = InitializationOptions(
+        return InitializationOptions(
             server_name="alltrails",
             server_version="0.1.0",
             capabilities=capabilities
         )
-        
+    
+    async def run_stdio():
         print("Starting stdio server", file=sys.stderr)
         
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
@@ -199,11 +724,142 @@ try:
             await server.run(
                 read_stream,
                 write_stream,
-                initialization_options=init_options
+                initialization_options=initialization_options()
             )
     
+    class StreamableHTTPEndpoint:
+        """ASGI endpoint passing /mcp requests to the streamable HTTP session manager."""
+        
+        def __init__(self, session_manager):
+            self.session_manager = session_manager
+        
+        async def __call__(self, scope, receive, send):
+            await self.session_manager.handle_request(scope, receive, send)
+    
+    def http_transport_available() -> bool:
+        """Whether the installed MCP SDK can serve streamable HTTP (mcp 1.8 or newer)."""
+        try:
+            import mcp.server.streamable_http_manager  # noqa: F401
+        except ImportError:
+            return False
+        return True
+    
+    async def run_http(host: str, port: int):
+        """
+        Serve MCP over HTTP to any number of clients from this process.
+        
+        Streamable HTTP is served at /mcp, and the older SSE transport at /sse
+        (with messages posted to /messages/). All clients share the cache,
+        the HTTP connection pool and the upstream scheduler.
+        """
+        import uvicorn
+        from mcp.server.sse import SseServerTransport
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        from starlette.applications import Starlette
+        from starlette.responses import Response
+        from starlette.routing import Mount, Route
+        
+        session_manager = StreamableHTTPSessionManager(app=server)
+        sse = SseServerTransport("/messages/")
+        
+        async def handle_sse(request):
+            async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+                await server.run(read_stream, write_stream, initialization_options())
+            return Response()
+        
+        @contextlib.asynccontextmanager
+        async def lifespan(app):
+            async with session_manager.run():
+                yield
+        
+        app = Starlette(
+            routes=[
+                Route("/mcp", endpoint=StreamableHTTPEndpoint(session_manager)),
+                Route("/sse", endpoint=handle_sse, methods=["GET"]),
+                Mount("/messages/", app=sse.handle_post_message),
+            ],
+            lifespan=lifespan
+        )
+        
+        print(f"AllTrails MCP server listening on http://{host}:{port}/mcp (SSE at /sse)", file=sys.stderr)
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        await uvicorn.Server(config).serve()
+    
+    async def serve(
+        http_address: Optional[Tuple[str, int]] = None,
+        max_tool_calls: int = DEFAULT_MAX_TOOL_CALLS,
+        timeout: Optional[float] = DEFAULT_TOOL_TIMEOUT,
+        metrics_address: Optional[Tuple[str, int]] = None
+    ):
+        """
+        Run the MCP server until the transport closes.
+        
+        Args:
+            http_address: (host, port) to serve over HTTP, or None for stdio
+            max_tool_calls: Maximum number of tool calls handled at once
+            timeout: Default seconds a tool call may wait on AllTrails (None or 0 for no limit)
+            metrics_address: (host, port) to serve Prometheus metrics at /metrics, or None
+        """
+        global tool_call_slots, tool_timeout
+        tool_call_slots = asyncio.Semaphore(max(1, max_tool_calls))
+        tool_timeout = timeout or None
+        if metrics_address is not None:
+            start_http_server(metrics_address[1], metrics_address[0])
+            print(f"Metrics at http://{metrics_address[0]}:{metrics_address[1]}/metrics", file=sys.stderr)
+        refresh_task = asyncio.create_task(refresher.run()) if refresher is not None else None
+        
+        try:
+            if http_address is not None:
+                await run_http(*http_address)
+            else:
+                await run_stdio()
+        finally:
+            if refresh_task is not None:
+                refresh_task.cancel()
+    
+    def main(argv=None):
+        """Entry point of the alltrails-mcp command."""
+        parser = argparse.ArgumentParser(
+            prog="alltrails-mcp",
+            description="AllTrails MCP server (serves a single client over stdio by default)"
+        )
+        parser.add_argument(
+            "--http",
+            metavar="[HOST]:PORT",
+            type=parse_http_address,
+            help="Serve many clients over HTTP instead of stdio, e.g. --http :8000 "
+                 f"(streamable HTTP at /mcp, SSE at /sse; host defaults to {DEFAULT_HTTP_HOST})"
+        )
+        parser.add_argument(
+            "--max-tool-calls",
+            type=int,
+            default=DEFAULT_MAX_TOOL_CALLS,
+            help=f"Maximum number of tool calls handled at once (default: {DEFAULT_MAX_TOOL_CALLS})"
+        )
+        parser.add_argument(
+            "--tool-timeout",
+            type=float,
+            default=DEFAULT_TOOL_TIMEOUT,
+            metavar="SECONDS",
+            help="Seconds a tool call may wait on AllTrails before answering with stale or partial "
+                 f"cached data; tools also take a timeout argument (default: {DEFAULT_TOOL_TIMEOUT:g}, 0 for no limit)"
+        )
+        parser.add_argument(
+            "--metrics",
+            metavar="[HOST]:PORT",
+            type=parse_http_address,
+            default=(DEFAULT_HTTP_HOST, metrics_port()) if metrics_port() else None,
+            help="Serve Prometheus metrics at http://HOST:PORT/metrics "
+                 f"(default: ALLTRAILS_METRICS_PORT if set; host defaults to {DEFAULT_HTTP_HOST})"
+        )
+        args = parser.parse_args(argv)
+        if args.http is not None and not http_transport_available():
+            parser.error("--http needs mcp 1.8 or newer; upgrade it with: pip install --upgrade 'mcp>=1.8'")
+        
+        asyncio.run(serve(args.http, args.max_tool_calls, args.tool_timeout, args.metrics))
+    
     if __name__ == "__main__":
-        asyncio.run(main())
+        main()
         
 except Exception as e:
     print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,299 @@
+"""
+Lightweight tracing of tool calls, cache access, fetches, parsing and rendering.
+
+Code paths are wrapped in spans, which nest through a context variable:
+
+    with span("http.fetch", url=url) as fetch_span:
+        resp = session.get(url)
+        fetch_span.set(status=resp.status_code)
+
+A span started outside any other span begins a new trace, so every MCP tool
+call gets its own trace ID that ties together the cache lookups, upstream
+requests, parsing and rendering it caused. Spans follow the current thread
+or asyncio task; work handed to other threads keeps its trace when it runs
+in contextvars.copy_context() (as the server, the batch lookup and the cache
+thread do).
+
+Finished spans go to an exporter, chosen with the ALLTRAILS_TRACE
+environment variable:
+
+- unset or empty: tracing is off (the default); span() returns a shared
+  no-op object and traced() functions run unwrapped after one check
+- "stderr": one JSON object per span on stderr
+- "otel": spans are mirrored into OpenTelemetry (needs opentelemetry-api,
+  plus an SDK configured by the host application to export them)
+- anything else: path of a file JSON lines are appended to
+
+Span names used by the package: tool_call, cache.*, cache.lease_wait,
+http.fetch, http.connect, parse.html, extract.*, render.*, prefetch and
+refresh.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import IO, Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_current: ContextVar[Optional["Span"]] = ContextVar("alltrails_trace_span", default=None)
+
+
+class SpanExporter:
+    """Receives spans as they start and end. Subclasses override what they need."""
+
+    def start(self, span: "Span"):
+        """Called when a span starts."""
+
+    def end(self, span: "Span"):
+        """Called when a span ends."""
+
+
+class JsonLinesExporter(SpanExporter):
+    """
+    Writes each finished span as one JSON object per line.
+
+    Example line:
+        {"trace_id": "4bf9...", "span_id": "00f0...", "parent_id": null,
+         "name": "tool_call", "start": 1760832000.123, "duration_ms": 412.5,
+         "attributes": {"tool": "search_trails"}, "error": null}
+    """
+
+    def __init__(self, stream: IO[str]):
+        """
+        Initialize the exporter.
+
+        Args:
+            stream: Text stream the JSON lines are written to
+        """
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def end(self, span: "Span"):
+        line = json.dumps(span.to_dict(), separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """
+    Mirrors spans into OpenTelemetry spans with the same names, nesting and attributes.
+
+    Only the opentelemetry-api package is needed here; where the spans go is
+    decided by the OpenTelemetry SDK the host application configures.
+    """
+
+    def __init__(self, tracer: Any = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            tracer: OpenTelemetry tracer (defaults to the global tracer provider's)
+
+        Raises:
+            ImportError: If opentelemetry-api is not installed
+        """
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer("alltrails_mcp")
+
+    def start(self, span: "Span"):
+        context = None
+        if span.parent is not None and span.parent.handle is not None:
+            context = self._trace.set_span_in_context(span.parent.handle)
+        span.handle = self.tracer.start_span(span.name, context=context)
+
+    def end(self, span: "Span"):
+        handle = span.handle
+        if handle is None:
+            return
+        handle.set_attributes({key: value for key, value in span.attributes.items() if value is not None})
+        if span.error is not None:
+            handle.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        handle.end()
+
+
+class Span:
+    """A timed operation within a trace. Use span() rather than creating these directly."""
+
+    __slots__ = (
+        "name", "attributes", "trace_id", "span_id", "parent", "start_time",
+        "duration_ms", "error", "handle", "_started", "_token",
+    )
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.parent: Optional[Span] = None
+        self.trace_id = ""
+        self.span_id = os.urandom(8).hex()
+        self.start_time = 0.0
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        # Exporter-specific object (e.g. the OpenTelemetry span)
+        self.handle: Any = None
+
+    def set(self, **attributes):
+        """Add or update attributes of the span."""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        """Get the span as a JSON-serializable dictionary."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "start": round(self.start_time, 6),
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def __enter__(self) -> "Span":
+        self.parent = _current.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else os.urandom(16).hex()
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        exporter = _exporter
+        if exporter is not None:
+            try:
+                exporter.end(self)
+            except Exception as e:
+                logger.warning(f"Could not export span {self.name}: {e}")
+        return False
+
+
+class _NoopSpan:
+    """Stands in for a Span while tracing is off."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes) -> Any:
+    """
+    Start a span (use as a context manager).
+
+    Args:
+        name: Span name, e.g. "http.fetch"
+        **attributes: Attributes recorded with the span
+
+    Returns:
+        Span, or a shared no-op object when tracing is off
+    """
+    if _exporter is None:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def traced(name: str, key: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorator running a function inside a span.
+
+    Args:
+        name: Span name
+        key: Name of an argument to record as a span attribute, if any
+    """
+    def decorate(func: F) -> F:
+        index = list(inspect.signature(func).parameters).index(key) if key is not None else 0
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            attributes = {}
+            if key is not None:
+                attributes[key] = args[index] if index < len(args) else kwargs.get(key)
+            with Span(name, attributes):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+def current_span() -> Optional[Span]:
+    """Get the innermost span of the current context (None if there is none or tracing is off)."""
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Get the trace (correlation) ID of the current context, if any."""
+    current = _current.get()
+    return current.trace_id if current is not None else None
+
+
+def tracing_enabled() -> bool:
+    """Whether spans are being recorded."""
+    return _exporter is not None
+
+
+def set_exporter(exporter: Optional[SpanExporter]):
+    """
+    Send spans to an exporter, or turn tracing off with None.
+
+    Args:
+        exporter: SpanExporter to use, or None
+    """
+    global _exporter
+    _exporter = exporter
+
+
+def exporter_from_env() -> Optional[SpanExporter]:
+    """
+    Create the exporter selected by ALLTRAILS_TRACE.
+
+    Returns:
+        SpanExporter, or None if tracing is off (or cannot be set up)
+    """
+    target = os.getenv("ALLTRAILS_TRACE", "").strip()
+    if not target or target == "0":
+        return None
+    if target == "stderr":
+        return JsonLinesExporter(sys.stderr)
+    if target == "otel":
+        try:
+            return OpenTelemetryExporter()
+        except ImportError:
+            logger.warning("ALLTRAILS_TRACE=otel needs the opentelemetry-api package; tracing is off")
+            return None
+    try:
+        return JsonLinesExporter(open(os.path.expanduser(target), "a", encoding="utf-8", buffering=1))
+    except OSError as e:
+        logger.warning(f"Cannot open trace file {target}: {e}; tracing is off")
+        return None
+
+
+_exporter: Optional[SpanExporter] = exporter_from_env()
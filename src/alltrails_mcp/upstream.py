@@ -0,0 +1,417 @@
+"""
+Shared scheduling and limits for requests to AllTrails.
+
+Every page the scraper downloads goes through one process-wide
+UpstreamScheduler, so concurrent callers (MCP tool calls, batch detail
+lookups, bulk crawls, prefetching) share a single request budget instead of
+each adding their own load on AllTrails.
+
+The scheduler combines a token bucket (a steady request rate with a small
+burst allowance) with a cap on the number of requests in flight, and splits
+requests into two priority classes:
+
+- Priority.INTERACTIVE: a caller is waiting on the result (the default)
+- Priority.BACKGROUND: prefetching, cache warming and scheduled refreshes
+
+Waiting interactive requests always go first. Background requests have their
+own, smaller concurrency limit and leave half of the burst allowance in the
+bucket, so interactive cache misses do not queue behind background work. Code
+marks its requests as background with request_priority():
+
+    with request_priority(Priority.BACKGROUND):
+        get_trail_details_with_cache(slug)
+
+Callers that need an answer by a certain time (such as MCP tool calls) set a
+deadline with request_deadline(). Requests that cannot start before it fail
+with DeadlineExceeded instead of queueing, and the scraper cuts the timeout
+of requests in flight to the time left:
+
+    with request_deadline(10):
+        search_trails_with_cache(park_slug)
+
+Queue-wait times are recorded per class (see UpstreamScheduler.stats()).
+The limits can be tuned with environment variables:
+
+- ALLTRAILS_RATE_LIMIT: requests per second (default 2, 0 disables the rate limit)
+- ALLTRAILS_MAX_CONCURRENCY: requests in flight at once (default 4)
+- ALLTRAILS_BACKGROUND_CONCURRENCY: background requests in flight at once (default 1)
+
+A CircuitBreaker tracks whether AllTrails is currently answering. After a run
+of blocked or failed requests (403/429, server errors, timeouts) the circuit
+opens for a cool-down period, and background work such as prefetching stops
+instead of adding to the load while AllTrails is pushing back.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Deque, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT = 2.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_BACKGROUND_CONCURRENCY = 1
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN_SECONDS = 60.0
+
+# Queue waits kept per priority class for percentiles
+WAIT_SAMPLES = 1000
+
+# HTTP statuses meaning AllTrails is blocking or struggling, not that a page is missing
+BLOCKING_STATUSES = frozenset({403, 429, 500, 502, 503, 504})
+
+_default_scheduler: Optional["UpstreamScheduler"] = None
+_default_lock = threading.Lock()
+_default_breaker: Optional["CircuitBreaker"] = None
+
+
+class Priority(IntEnum):
+    """Priority class of a request to AllTrails; lower values go first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("alltrails_request_priority", default=Priority.INTERACTIVE)
+
+
+def current_priority() -> Priority:
+    """Get the priority class of requests made in the current context."""
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Make requests inside the block with the given priority class.
+
+    The priority is held in a context variable, so it follows the current
+    thread or asyncio task but not work handed to other threads.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request cannot be sent before the current deadline."""
+
+
+# time.monotonic() by which requests in the current context must be done
+_deadline: ContextVar[Optional[float]] = ContextVar("alltrails_request_deadline", default=None)
+
+
+def deadline_remaining() -> Optional[float]:
+    """
+    Get the time left before the current request_deadline().
+
+    Returns:
+        Seconds left (zero or less once the deadline has passed), or None if
+        there is no deadline
+    """
+    deadline = _deadline.get()
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give requests inside the block a deadline, `seconds` from now.
+
+    A nested deadline can only shorten the current one. Like the priority,
+    the deadline is held in a context variable; run work in other threads
+    with contextvars.copy_context().run to keep it.
+
+    Args:
+        seconds: Time allowed, or None for no (additional) deadline
+    """
+    deadline = _deadline.get()
+    if seconds is not None:
+        new_deadline = time.monotonic() + seconds
+        deadline = new_deadline if deadline is None else min(deadline, new_deadline)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class UpstreamScheduler:
+    """
+    Thread-safe token bucket and concurrency limits with priority classes.
+
+    Example:
+        >>> scheduler = UpstreamScheduler(rate=2.0, burst=4, max_concurrency=4)
+        >>> with scheduler.slot():
+        ...     resp = session.get(url)
+        >>> scheduler.stats()["interactive"]["requests"]
+        1
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_LIMIT,
+        burst: int = DEFAULT_BURST,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        background_concurrency: int = DEFAULT_BACKGROUND_CONCURRENCY
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rate: Sustained requests per second (0 or less for no rate limit)
+            burst: Requests that may be made back to back after a quiet period
+            max_concurrency: Maximum number of requests in flight
+            background_concurrency: Maximum number of background requests in flight
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.class_concurrency = {
+            Priority.INTERACTIVE: self.max_concurrency,
+            Priority.BACKGROUND: max(1, min(background_concurrency, self.max_concurrency)),
+        }
+        self.background_reserve = max(1, self.burst // 2)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._in_flight = {priority: 0 for priority in Priority}
+        self._waiting = {priority: 0 for priority in Priority}
+        self._requests = {priority: 0 for priority in Priority}
+        self._waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in Priority
+        }
+        self._max_wait = {priority: 0.0 for priority in Priority}
+
+    def _may_start(self, priority: Priority) -> bool:
+        """Whether a request of this class may start, ignoring tokens. Caller holds the lock."""
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return False
+        if self._in_flight[priority] >= self.class_concurrency[priority]:
+            return False
+        return not any(self._waiting[other] for other in Priority if other < priority)
+
+    def _take_token(self, priority: Priority) -> float:
+        """Take a token if one is available; otherwise return the seconds to wait. Caller holds the lock."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Background requests leave a reserve of tokens for interactive requests
+        needed = 1 if priority == Priority.INTERACTIVE else 1 + self.background_reserve
+        if self._tokens >= needed:
+            self._tokens -= 1
+            return 0.0
+        return (needed - self._tokens) / self.rate
+
+    def acquire(self, priority: Optional[Priority] = None, deadline: Optional[float] = None):
+        """
+        Block until a request may be sent. Must be paired with release().
+
+        Args:
+            priority: Priority class (defaults to the current request_priority())
+            deadline: time.monotonic() by which the request must be sent
+                (defaults to the current request_deadline())
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the request may be sent
+        """
+        if priority is None:
+            priority = current_priority()
+        if deadline is None:
+            deadline = _deadline.get()
+        start = time.monotonic()
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    left = deadline - time.monotonic() if deadline is not None else None
+                    if left is not None and left <= 0:
+                        raise DeadlineExceeded(
+                            f"Deadline passed after {time.monotonic() - start:.2f}s in the upstream queue"
+                        )
+                    if not self._may_start(priority):
+                        self._condition.wait(left)
+                        continue
+                    wait = self._take_token(priority)
+                    if not wait:
+                        break
+                    self._condition.wait(wait if left is None else min(wait, left))
+            finally:
+                self._waiting[priority] -= 1
+                # Lower-priority waiters may have been held back by this one
+                self._condition.notify_all()
+            self._in_flight[priority] += 1
+
+            waited = time.monotonic() - start
+            self._requests[priority] += 1
+            self._waits[priority].append(waited)
+            self._max_wait[priority] = max(self._max_wait[priority], waited)
+        if waited >= 1:
+            logger.info(f"Upstream {priority.name.lower()} request waited {waited:.2f}s in the queue")
+
+    def release(self, priority: Optional[Priority] = None):
+        """
+        Mark a request started with acquire() as finished.
+
+        Args:
+            priority: Priority class passed to acquire() (defaults to the current request_priority())
+        """
+        if priority is None:
+            priority = current_priority()
+        with self._condition:
+            self._in_flight[priority] -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Optional[Priority] = None) -> Iterator[None]:
+        """Context manager holding a request slot for the duration of a request."""
+        if priority is None:
+            priority = current_priority()
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Get request counts and queue-wait times per priority class.
+
+        Returns:
+            Dictionary keyed by class name ("interactive", "background") with
+            requests, in_flight, waiting, and p50/p95/max queue waits in
+            milliseconds (over the most recent requests)
+        """
+        with self._condition:
+            stats = {}
+            for priority in Priority:
+                waits = sorted(self._waits[priority])
+
+                def percentile(fraction: float) -> float:
+                    if not waits:
+                        return 0.0
+                    return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 1)
+
+                stats[priority.name.lower()] = {
+                    "requests": self._requests[priority],
+                    "in_flight": self._in_flight[priority],
+                    "waiting": self._waiting[priority],
+                    "p50_wait_ms": percentile(0.5),
+                    "p95_wait_ms": percentile(0.95),
+                    "max_wait_ms": round(self._max_wait[priority] * 1000, 1),
+                }
+            return stats
+
+
+def get_scheduler() -> UpstreamScheduler:
+    """
+    Get the process-wide scheduler used for all AllTrails requests.
+
+    Returns:
+        UpstreamScheduler configured from ALLTRAILS_RATE_LIMIT,
+        ALLTRAILS_MAX_CONCURRENCY and ALLTRAILS_BACKGROUND_CONCURRENCY
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                rate = float(os.getenv("ALLTRAILS_RATE_LIMIT", str(DEFAULT_RATE_LIMIT)))
+                max_concurrency = int(os.getenv("ALLTRAILS_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+                background_concurrency = int(os.getenv(
+                    "ALLTRAILS_BACKGROUND_CONCURRENCY", str(DEFAULT_BACKGROUND_CONCURRENCY)
+                ))
+                _default_scheduler = UpstreamScheduler(
+                    rate=rate,
+                    max_concurrency=max_concurrency,
+                    background_concurrency=background_concurrency
+                )
+                logger.info(
+                    f"Upstream rate limit: {rate} requests/s, {max_concurrency} concurrent "
+                    f"({background_concurrency} background)"
+                )
+    return _default_scheduler
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker for requests to AllTrails.
+    
+    The circuit opens after failure_threshold consecutive failures and stays
+    open for cooldown seconds. After the cool-down the next request is let
+    through; a success closes the circuit, another failure re-opens it.
+    
+    Example:
+        >>> breaker = CircuitBreaker(failure_threshold=5, cooldown=60)
+        >>> if not breaker.is_open:
+        ...     fetch_more_pages()
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN_SECONDS
+    ):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown: Seconds the circuit stays open
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while the circuit is open (inside the cool-down period)."""
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.cooldown
+
+    def record_success(self):
+        """Record a request that AllTrails answered normally."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Upstream circuit closed")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        """Record a blocked or failed request."""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Upstream circuit opened after {self._failures} failed requests; "
+                        f"pausing background fetches for {self.cooldown:.0f}s"
+                    )
+                self._opened_at = time.monotonic()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for AllTrails requests.
+
+    Returns:
+        CircuitBreaker shared by the scraper and background workers
+    """
+    global _default_breaker
+    if _default_breaker is None:
+        with _default_lock:
+            if _default_breaker is None:
+                _default_breaker = CircuitBreaker()
+    return _default_breaker
@@ -0,0 +1,30 @@
+"""Shared fixtures: every test gets its own empty cache and home directory."""
+
+import pytest
+
+from alltrails_mcp import scraper
+from alltrails_mcp.cache import TrailCache, _get_default_cache_dir
+from helpers import FakeListing
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Keep the config file and default cache out of the real home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    _get_default_cache_dir.cache_clear()
+    yield tmp_path
+    _get_default_cache_dir.cache_clear()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """An empty cache database with the default expiry."""
+    return TrailCache(db_path=tmp_path / "cache.db", cache_days=7)
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    """A fake park listing that scraper.fetch_park_page serves from."""
+    fake = FakeListing()
+    monkeypatch.setattr(scraper, "fetch_park_page", fake.fetch_park_page)
+    return fake
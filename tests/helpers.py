@@ -0,0 +1,67 @@
+"""Test data and a fake AllTrails park listing."""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from alltrails_mcp.scraper import ParkPage, park_url
+
+PARK = "us/test/test-park"
+
+
+def listing_trail(name: str, rating: str = "4.5", length: str = "2.0 mi") -> Dict:
+    """A trail as parsed from a park listing page."""
+    slug = name.lower().replace(" ", "-")
+    return {
+        "name": name,
+        "url": f"https://www.alltrails.com/trail/{PARK}/{slug}",
+        "summary": f"{name} summary",
+        "difficulty": "Moderate",
+        "length": length,
+        "rating": rating,
+    }
+
+
+class FakeListing:
+    """Listing pages served in place of scraper.fetch_park_page, recording every fetch."""
+
+    # Stop runaway crawls instead of hanging the test run
+    MAX_FETCHES = 50
+
+    def __init__(self):
+        self.pages: Dict[str, Tuple[List[Dict], Optional[str]]] = {}
+        self.fetched: List[str] = []
+        # Seconds each fetch takes, to let concurrent crawls overlap
+        self.delay = 0.0
+        # ETag served with every page; a request revalidating it is answered 304 Not Modified
+        self.etag: Optional[str] = None
+        self.not_modified: List[str] = []
+
+    def add_page(self, url: str, names: List[str], next_url: Optional[str] = None):
+        self.pages[url] = ([listing_trail(name) for name in names], next_url)
+
+    def add_park(self, trail_count: int, per_page: int = 10, park_slug: str = PARK):
+        """Add a park with trails "Trail 0".."Trail N-1"; trail i is rated higher the larger i is."""
+        first = park_url(park_slug)
+        pages = range(0, trail_count, per_page)
+        for number, start in enumerate(pages, 1):
+            url = first if number == 1 else f"{first}?page={number}"
+            next_url = f"{first}?page={number + 1}" if start + per_page < trail_count else None
+            self.pages[url] = (
+                [
+                    listing_trail(f"Trail {i}", rating=f"{1 + 4 * i / trail_count:.2f}")
+                    for i in range(start, min(start + per_page, trail_count))
+                ],
+                next_url,
+            )
+
+    def fetch_park_page(self, park_slug, number=1, url=None, etag=None, last_modified=None) -> Optional[ParkPage]:
+        url = url or park_url(park_slug)
+        self.fetched.append(url)
+        if len(self.fetched) > self.MAX_FETCHES:
+            raise AssertionError("crawl did not stop")
+        time.sleep(self.delay)
+        if etag is not None and etag == self.etag:
+            self.not_modified.append(url)
+            return None
+        trails, next_url = self.pages[url]
+        return ParkPage(number, url, trails, next_url, etag=self.etag)
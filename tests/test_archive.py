@@ -0,0 +1,64 @@
+"""Tests for rebuilding the cache from the raw-page archive."""
+
+from datetime import datetime, timedelta
+
+from alltrails_mcp.archive import PageArchive, reparse_archive
+from alltrails_mcp.scraper import park_url, trail_url
+
+from helpers import PARK
+
+LISTING_HTML = """
+<html><body>
+  <a href="/trail/us/test/first-trail">First Trail</a>
+  <a href="/trail/us/test/second-trail">Second Trail</a>
+</body></html>
+"""
+
+TRAIL_HTML = "<html><body><h1>First Trail</h1></body></html>"
+
+
+def test_reparse_rebuilds_listing_and_details(cache, tmp_path):
+    archive = PageArchive(db_path=tmp_path / "archive.db")
+    fetched_at = datetime.now() - timedelta(days=1)
+    archive.store(park_url(PARK), LISTING_HTML, fetched_at=fetched_at)
+    archive.store(trail_url("us/test/first-trail"), TRAIL_HTML, fetched_at=fetched_at)
+
+    counts = reparse_archive(cache=cache, archive=archive)
+
+    assert counts == {"parks": 1, "pages": 1, "details": 1}
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == ["First Trail", "Second Trail"]
+    assert cache.is_crawl_complete(PARK)
+    assert cache.get_cached_trail_details("us/test/first-trail").title == "First Trail"
+
+
+def test_reparse_follows_next_page_links_through_the_archive(cache, tmp_path):
+    archive = PageArchive(db_path=tmp_path / "archive.db")
+    archive.store(park_url(PARK), LISTING_HTML.replace("<body>", '<body><a rel="next" href="?page=2">Next</a>'))
+    archive.store(park_url(PARK) + "?page=2", '<a href="/trail/us/test/third-trail">Third Trail</a>')
+
+    counts = reparse_archive(cache=cache, archive=archive, park_slug=PARK)
+
+    assert counts == {"parks": 1, "pages": 2, "details": 0}
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == ["First Trail", "Second Trail", "Third Trail"]
+    assert cache.is_crawl_complete(PARK)
+
+
+def test_reparse_of_an_unfinished_chain_is_partial(cache, tmp_path):
+    archive = PageArchive(db_path=tmp_path / "archive.db")
+    archive.store(park_url(PARK), LISTING_HTML.replace("<body>", '<body><a rel="next" href="?page=2">Next</a>'))
+
+    reparse_archive(cache=cache, archive=archive)
+
+    assert len(cache.get_cached_trails(PARK)) == 2
+    assert not cache.is_crawl_complete(PARK)
+
+
+def test_reparse_keeps_http_validators(cache, tmp_path):
+    archive = PageArchive(db_path=tmp_path / "archive.db")
+    archive.store(park_url(PARK), LISTING_HTML, etag='"listing-v1"', last_modified="Mon, 05 Oct 2026 10:00:00 GMT")
+    archive.store(trail_url("us/test/first-trail"), TRAIL_HTML, etag='"trail-v1"')
+
+    reparse_archive(cache=cache, archive=archive)
+
+    assert cache.get_page_validators(PARK, 1) == ('"listing-v1"', "Mon, 05 Oct 2026 10:00:00 GMT")
+    assert cache.get_trail_details_validators("us/test/first-trail") == ('"trail-v1"', None)
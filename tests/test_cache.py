@@ -0,0 +1,243 @@
+"""Tests for the SQLite trail cache and the cached crawl."""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import pytest
+
+from alltrails_mcp import cache as cache_module
+from alltrails_mcp import scraper
+from alltrails_mcp.cache import get_trail_details_with_cache, search_trails_with_cache
+from alltrails_mcp.models import TrailDetail
+from alltrails_mcp.scraper import TrailPage, park_url, trail_url
+from alltrails_mcp.upstream import request_deadline
+
+from helpers import PARK, listing_trail
+
+
+def test_crawl_stops_when_next_page_links_cycle(cache, listing):
+    first, second = park_url(PARK), park_url(PARK) + "?page=2"
+    listing.add_page(first, ["Trail A"], next_url=second)
+    listing.add_page(second, ["Trail B"], next_url=first)
+
+    trails = search_trails_with_cache(PARK, cache=cache, limit=15)
+
+    assert [trail.name for trail in trails] == ["Trail A", "Trail B"]
+    assert listing.fetched == [first, second]
+    assert cache.is_crawl_complete(PARK)
+
+
+def count_trail_updates(cache) -> Callable[[], int]:
+    """Count UPDATEs of trail rows from now on, with a trigger in the cache database."""
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS test_trail_updates (trail_id INTEGER);
+            CREATE TRIGGER IF NOT EXISTS test_count_trail_updates AFTER UPDATE ON trails
+            BEGIN INSERT INTO test_trail_updates VALUES (NEW.id); END;
+        """)
+
+    def count() -> int:
+        with sqlite3.connect(cache.db_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM test_trail_updates").fetchone()[0]
+
+    return count
+
+
+def test_save_trails_skips_unchanged_trails(cache):
+    trails = [listing_trail(f"Trail {i}") for i in range(5)]
+    cache.save_trails(PARK, trails, complete=True)
+    updates = count_trail_updates(cache)
+    since = datetime.now()
+
+    cache.save_trails(PARK, trails, complete=True)
+
+    assert updates() == 0
+    assert cache.get_changes_since(since) == []
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == [f"Trail {i}" for i in range(5)]
+
+
+def test_save_trails_only_moves_reordered_trails(cache):
+    trails = [listing_trail(f"Trail {i}") for i in range(5)]
+    cache.save_trails(PARK, trails, complete=True)
+    updates = count_trail_updates(cache)
+
+    trails[0], trails[1] = trails[1], trails[0]
+    cache.save_trails(PARK, trails, complete=True)
+
+    assert updates() == 2
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == [
+        "Trail 1", "Trail 0", "Trail 2", "Trail 3", "Trail 4"
+    ]
+
+
+def test_save_trails_logs_added_changed_and_removed_trails(cache):
+    cache.save_trails(PARK, [listing_trail("Kept"), listing_trail("Changed"), listing_trail("Removed")],
+                      complete=True)
+    since = datetime.now()
+
+    cache.save_trails(
+        PARK,
+        [listing_trail("Kept"), listing_trail("Changed", rating="3.0"), listing_trail("Added")],
+        complete=True
+    )
+
+    changes = {change["trail_url"].rsplit("/", 1)[-1]: change for change in cache.get_changes_since(since)}
+    assert {name: change["change"] for name, change in changes.items()} == {
+        "changed": "changed", "added": "added", "removed": "removed"
+    }
+    assert changes["changed"]["fields"]["rating"] == "3.0"
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == ["Kept", "Changed", "Added"]
+
+
+def test_save_trails_keeps_unreached_trails_on_partial_crawl(cache):
+    cache.save_trails(PARK, [listing_trail(f"Trail {i}") for i in range(4)], complete=True)
+    since = datetime.now()
+
+    cache.save_trails(PARK, [listing_trail("Trail 2"), listing_trail("Trail 3")], complete=False)
+
+    assert cache.get_changes_since(since) == []
+    assert not cache.is_crawl_complete(PARK)
+    assert [trail.name for trail in cache.get_cached_trails(PARK)] == ["Trail 2", "Trail 3", "Trail 0", "Trail 1"]
+
+
+@pytest.fixture
+def fast_lease_polls(monkeypatch):
+    monkeypatch.setattr(cache_module, "LEASE_POLL_SECONDS", 0.01)
+
+
+def test_concurrent_crawls_fetch_each_page_once(cache, listing, fast_lease_polls):
+    listing.add_park(30)
+    listing.delay = 0.2
+    results = {}
+
+    def search(name: str, limit: int):
+        results[name] = search_trails_with_cache(PARK, cache=cache, limit=limit)
+
+    # The first crawl holds the lease but only needs the first page, so the
+    # other two still miss after waiting for it; only one of them may crawl on
+    first = threading.Thread(target=search, args=("first", 10))
+    first.start()
+    while not listing.fetched:
+        time.sleep(0.005)
+    others = [threading.Thread(target=search, args=(name, 30)) for name in ("second", "third")]
+    for thread in others:
+        thread.start()
+    for thread in [first] + others:
+        thread.join(10)
+
+    assert sorted(listing.fetched) == sorted(listing.pages)
+    assert {name: len(trails) for name, trails in results.items()} == {"first": 10, "second": 30, "third": 30}
+
+
+def test_crawl_waiting_for_a_lease_stops_at_the_deadline(cache, listing, fast_lease_polls):
+    listing.add_park(30)
+    cache.save_trails(PARK, [listing_trail(f"Trail {i}") for i in range(5)], complete=False)
+    assert cache.acquire_lease(f"park:{PARK}") is not None
+
+    with request_deadline(0.1):
+        trails = search_trails_with_cache(PARK, cache=cache, limit=15)
+
+    assert [trail.name for trail in trails] == [f"Trail {i}" for i in range(5)]
+    assert listing.fetched == []
+
+
+def test_details_waiting_for_a_lease_stop_at_the_deadline(cache, monkeypatch, fast_lease_polls):
+    def fetch_trail_page(*args):
+        raise AssertionError("fetched without the lease")
+
+    monkeypatch.setattr(scraper, "fetch_trail_page", fetch_trail_page)
+    assert cache.acquire_lease("trail:us/test/first-trail") is not None
+
+    with request_deadline(0.1):
+        details = get_trail_details_with_cache("us/test/first-trail", cache=cache)
+
+    assert details.title == ""
+    assert "Deadline passed" in details.summary
+
+
+def expire(cache, *tables: str):
+    """Make every row of the given tables older than the cache expiry."""
+    old = (datetime.now() - timedelta(days=30)).isoformat()
+    with sqlite3.connect(cache.db_path) as conn:
+        for table in tables:
+            conn.execute(f"UPDATE {table} SET last_updated = ?", (old,))
+
+
+def test_not_modified_listing_pages_are_extended_not_refetched(cache, listing):
+    listing.add_park(20)
+    listing.etag = '"v1"'
+    search_trails_with_cache(PARK, cache=cache, limit=None)
+    expire(cache, "parks", "park_pages")
+    assert cache.get_cached_page(PARK, 1) is None
+
+    trails = search_trails_with_cache(PARK, cache=cache, limit=None)
+
+    assert listing.not_modified == [park_url(PARK), park_url(PARK) + "?page=2"]
+    assert [trail.name for trail in trails] == [f"Trail {i}" for i in range(20)]
+    assert cache.get_cached_page(PARK, 1).trails == listing.pages[park_url(PARK)][0]
+    assert cache.is_crawl_complete(PARK)
+
+
+class FakeTrailPages:
+    """Trail pages served in place of scraper.fetch_trail_page, answering 304 to a matching ETag."""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+        self.requests = []
+
+    def fetch_trail_page(self, slug, etag=None, last_modified=None):
+        self.requests.append(etag)
+        if etag == self.etag:
+            return None
+        details = TrailDetail(title=f"Title of {slug}", url=trail_url(slug))
+        return TrailPage(slug=slug, url=trail_url(slug), details=details, etag=self.etag)
+
+
+def test_not_modified_trail_details_are_extended(cache, monkeypatch):
+    pages = FakeTrailPages('"v1"')
+    monkeypatch.setattr(scraper, "fetch_trail_page", pages.fetch_trail_page)
+    cache.save_trail_details("us/test/first-trail", {"title": "Cached title"}, etag='"v1"')
+    expire(cache, "trail_details")
+
+    details = get_trail_details_with_cache("us/test/first-trail", cache=cache)
+
+    assert pages.requests == ['"v1"']
+    assert details.title == "Cached title"
+    assert cache.get_cached_trail_details("us/test/first-trail").title == "Cached title"
+
+
+def test_not_modified_without_a_cached_copy_fetches_in_full(cache, monkeypatch):
+    pages = FakeTrailPages('"v1"')
+    monkeypatch.setattr(scraper, "fetch_trail_page", pages.fetch_trail_page)
+    # Validators left over without usable details, e.g. cleared by another process
+    monkeypatch.setattr(cache, "get_trail_details_validators", lambda slug: ('"v1"', None))
+
+    details = get_trail_details_with_cache("us/test/first-trail", cache=cache)
+
+    assert pages.requests == ['"v1"', None]
+    assert details.title == "Title of us/test/first-trail"
+
+
+def test_lease_is_held_until_released(cache):
+    token = cache.acquire_lease("park:a")
+
+    assert token is not None
+    assert cache.acquire_lease("park:a") is None
+    assert cache.acquire_lease("park:b") is not None
+    # Only the holder's token releases the lease
+    cache.release_lease("park:a", "someone-else")
+    assert cache.acquire_lease("park:a") is None
+    cache.release_lease("park:a", token)
+    assert cache.acquire_lease("park:a") is not None
+
+
+def test_abandoned_lease_expires(cache, fast_lease_polls):
+    assert cache.acquire_lease("park:a", seconds=0.1) is not None
+
+    assert not cache.wait_for_lease("park:a", timeout=0.02)
+    assert cache.acquire_lease("park:a") is None
+    assert cache.wait_for_lease("park:a", timeout=5)
+    assert cache.acquire_lease("park:a") is not None
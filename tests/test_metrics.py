@@ -0,0 +1,63 @@
+"""Tests for the Prometheus text exposition of metrics."""
+
+import pytest
+
+from alltrails_mcp.metrics import MetricsRegistry
+
+
+def test_counter_renders_one_sample_per_label_combination():
+    registry = MetricsRegistry()
+    calls = registry.counter("test_calls_total", "Calls by tool", ["tool"])
+
+    calls.labels("search").inc()
+    calls.labels("search").inc(2)
+    calls.labels('say "hi"\n').inc(0.5)
+
+    assert registry.render() == (
+        "# HELP test_calls_total Calls by tool\n"
+        "# TYPE test_calls_total counter\n"
+        'test_calls_total{tool="search"} 3\n'
+        'test_calls_total{tool="say \\"hi\\"\\n"} 0.5\n'
+    )
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    seconds = registry.histogram("test_seconds", "Durations", buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 2.0):
+        seconds.observe(value)
+
+    assert registry.render() == (
+        "# HELP test_seconds Durations\n"
+        "# TYPE test_seconds histogram\n"
+        'test_seconds_bucket{le="0.1"} 2\n'
+        'test_seconds_bucket{le="1"} 3\n'
+        'test_seconds_bucket{le="+Inf"} 4\n'
+        "test_seconds_sum 2.65\n"
+        "test_seconds_count 4\n"
+    )
+
+
+def test_gauge_drops_collectors_with_nothing_to_report():
+    registry = MetricsRegistry()
+    queue = registry.gauge("test_queue", "Queue depth", ["class"])
+    reports = [{("interactive",): 2, ("background",): 5}, None]
+    queue.add_collector(lambda: reports.pop(0))
+
+    assert registry.render().splitlines()[2:] == [
+        'test_queue{class="interactive"} 2',
+        'test_queue{class="background"} 5',
+    ]
+    assert registry.render().splitlines()[2:] == []
+    assert registry.render().splitlines()[2:] == []
+
+
+def test_labels_must_match_the_label_names():
+    registry = MetricsRegistry()
+    calls = registry.counter("test_calls_total", "Calls", ["tool", "outcome"])
+
+    with pytest.raises(ValueError):
+        calls.labels("search")
+    with pytest.raises(ValueError):
+        registry.counter("test_calls_total", "Calls again")
@@ -0,0 +1,81 @@
+"""Tests for response rendering helpers."""
+
+import json
+
+import pytest
+
+from alltrails_mcp.models import Trail
+from alltrails_mcp.render import decode_cursor, encode_cursor, render_trail_list, render_trail_list_json
+
+from helpers import listing_trail
+
+
+def trails(count: int) -> list:
+    return [Trail.from_dict(listing_trail(f"Trail {i}")) for i in range(count)]
+
+
+def test_cursor_round_trip():
+    state = {
+        "park": "Zion",
+        "park_slug": "us/utah/zion-national-park",
+        "query": {"min_rating": 4.5, "sort_by": "rating"},
+        "offset": 40,
+        "page_size": 20,
+    }
+
+    cursor = encode_cursor(state)
+
+    assert decode_cursor(cursor) == state
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor!", encode_cursor({"page_size": 20}), encode_cursor([1, 2])])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_trail_list_stops_at_the_character_budget():
+    cursor = encode_cursor({"park": "Test Park", "query": {"min_rating": 4.5}, "offset": 40, "page_size": 20})
+
+    text, count = render_trail_list(
+        "Test Park", trails(20), offset=20, has_more=True, max_chars=1000,
+        make_cursor=lambda offset: cursor, freshness="stale"
+    )
+
+    assert 0 < count < 20
+    assert len(text) <= 1000
+    assert text.startswith("> **Note:**")
+    assert f"Trails 21-{20 + count} in Test Park:" in text
+    assert f"{20 + count}. **Trail {count - 1}**" in text
+    assert f"**Trail {count}**" not in text
+    assert text.endswith(f'call again with cursor "{cursor}".\n')
+
+
+def test_trail_list_without_budget_renders_every_trail():
+    text, count = render_trail_list("Test Park", trails(20), max_chars=None)
+
+    assert count == 20
+    assert text.startswith("Found 20 trails in Test Park:")
+
+
+def test_trail_list_always_renders_the_first_trail():
+    text, count = render_trail_list("Test Park", trails(3), offset=10, max_chars=10)
+
+    assert count == 1
+    assert text.startswith("Trails 11-11 in Test Park:")
+    assert "11. **Trail 0**" in text
+
+
+def test_json_trail_list_fits_the_budget_and_continues_with_a_cursor():
+    items = [json.dumps(listing_trail(f"Trail {i}")) for i in range(50)]
+
+    text, count = render_trail_list_json(
+        "Test Park", items, make_cursor=lambda offset: f"next-{offset}", offset=5, max_chars=2000
+    )
+
+    assert len(text) <= 2000
+    response = json.loads(text)
+    assert len(response["trails"]) == count
+    assert response["offset"] == 5
+    assert response["next_cursor"] == f"next-{5 + count}"
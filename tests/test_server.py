@@ -0,0 +1,110 @@
+"""Tests for the search_trails tool: crawl depth, filters and cursor paging."""
+
+import asyncio
+import json
+
+import pytest
+
+from alltrails_mcp import server
+
+from helpers import PARK
+
+
+@pytest.fixture
+def tool_cache(cache, monkeypatch):
+    """Make the MCP server use the test cache."""
+    monkeypatch.setattr(server, "_cache", cache)
+    return cache
+
+
+def call(name: str, arguments: dict) -> str:
+    """Call a tool and return the text of its response."""
+    result = asyncio.run(server.handle_call_tool(name, arguments))
+    content = result.content if isinstance(result, server.types.CallToolResult) else result
+    return content[0].text
+
+
+def search(**arguments) -> dict:
+    """Call search_trails with JSON output and return the decoded response."""
+    return json.loads(call("search_trails", dict(arguments, format="json")))
+
+
+def names(response: dict) -> list:
+    return [trail["name"] for trail in response["trails"]]
+
+
+def test_search_returns_more_than_the_default_crawl(tool_cache, listing):
+    listing.add_park(60)
+
+    response = search(park=PARK, limit=40, page_size=40, max_chars=100000)
+
+    assert names(response) == [f"Trail {i}" for i in range(40)]
+
+
+def test_sorted_search_ranks_the_whole_park(tool_cache, listing):
+    listing.add_park(60)
+    # A plain search first caches only the start of the listing
+    search(park=PARK, page_size=5)
+
+    response = search(park=PARK, sort_by="rating", limit=3)
+
+    assert names(response) == ["Trail 59", "Trail 58", "Trail 57"]
+    assert tool_cache.is_crawl_complete(PARK)
+
+
+def test_filtered_search_covers_the_whole_park(tool_cache, listing):
+    listing.add_park(60)
+
+    response = search(park=PARK, min_rating=4.8, page_size=50)
+
+    assert names(response) == [f"Trail {i}" for i in range(57, 60)]
+
+
+def test_short_cached_crawl_counts_as_a_miss(tool_cache, listing):
+    listing.add_park(60)
+    search(park=PARK, page_size=5)
+    fetched = len(listing.fetched)
+
+    response = search(park=PARK, page_size=40, max_chars=100000)
+
+    assert names(response) == [f"Trail {i}" for i in range(40)]
+    assert len(listing.fetched) > fetched
+
+
+def test_cursors_page_through_the_whole_park(tool_cache, listing):
+    listing.add_park(60)
+
+    response = search(park=PARK, page_size=25)
+    seen = names(response)
+    while response["next_cursor"]:
+        response = search(cursor=response["next_cursor"])
+        seen += names(response)
+
+    assert seen == [f"Trail {i}" for i in range(60)]
+
+
+def test_offset_past_the_cached_crawl_extends_it(tool_cache, listing):
+    listing.add_park(60)
+    search(park=PARK, page_size=5)
+
+    response = search(park=PARK, offset=30, page_size=10)
+
+    assert names(response) == [f"Trail {i}" for i in range(30, 40)]
+    assert response["next_cursor"]
+
+
+@pytest.mark.parametrize("fmt", ["markdown", "json"])
+def test_paged_responses_stay_within_the_character_budget(tool_cache, listing, fmt):
+    listing.add_park(60)
+
+    text = call("search_trails", {"park": PARK, "page_size": 50, "max_chars": 1500, "format": fmt})
+
+    assert len(text) <= 1500
+    assert "cursor" in text
+
+
+def test_park_list_stays_within_the_character_budget():
+    text = call("list_parks", {"max_chars": 600})
+
+    assert len(text) <= 600
+    assert "call again with cursor" in text
@@ -0,0 +1,181 @@
+"""Tests for the upstream scheduler, request deadlines and circuit breaker."""
+
+import threading
+import time
+
+import pytest
+
+from alltrails_mcp import upstream
+from alltrails_mcp.upstream import (
+    CircuitBreaker,
+    DeadlineExceeded,
+    Priority,
+    UpstreamScheduler,
+    deadline_remaining,
+    request_deadline,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake time.monotonic() for the upstream module, advanced by hand."""
+    class Clock:
+        now = 1000.0
+
+        def advance(self, seconds: float):
+            self.now += seconds
+
+    fake = Clock()
+    monkeypatch.setattr(upstream.time, "monotonic", lambda: fake.now)
+    return fake
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+
+    assert breaker.is_open
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert not breaker.is_open
+
+
+def test_circuit_lets_a_request_through_after_the_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+
+    clock.advance(59)
+    assert breaker.is_open
+    clock.advance(1)
+    assert not breaker.is_open
+
+    # The request let through fails: the circuit re-opens straight away
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_success_after_the_cooldown_closes_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.advance(60)
+
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert not breaker.is_open
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll until condition() is true."""
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.005)
+
+
+def test_scheduler_allows_a_burst_then_the_rate():
+    scheduler = UpstreamScheduler(rate=20, burst=3, max_concurrency=10)
+
+    for _ in range(3):
+        with scheduler.slot():
+            pass
+    assert scheduler.stats()["interactive"]["max_wait_ms"] < 25
+    with scheduler.slot():
+        pass
+
+    stats = scheduler.stats()["interactive"]
+    assert stats["requests"] == 4
+    assert stats["max_wait_ms"] >= 25
+
+
+def test_background_requests_leave_tokens_for_interactive_ones():
+    scheduler = UpstreamScheduler(rate=0.01, burst=4, max_concurrency=10)
+    assert scheduler.background_reserve == 2
+    for _ in range(2):
+        with scheduler.slot(Priority.INTERACTIVE):
+            pass
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(Priority.BACKGROUND, deadline=time.monotonic() + 0.05)
+    # The reserve stays available to interactive requests
+    for _ in range(2):
+        with scheduler.slot(Priority.INTERACTIVE):
+            pass
+
+
+def test_background_concurrency_is_limited_separately():
+    scheduler = UpstreamScheduler(rate=0, max_concurrency=4, background_concurrency=1)
+    scheduler.acquire(Priority.BACKGROUND)
+
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(Priority.BACKGROUND, deadline=time.monotonic() + 0.05)
+    with scheduler.slot(Priority.INTERACTIVE):
+        assert scheduler.stats()["interactive"]["in_flight"] == 1
+
+    scheduler.release(Priority.BACKGROUND)
+    stats = scheduler.stats()["background"]
+    assert (stats["in_flight"], stats["waiting"]) == (0, 0)
+
+
+def test_waiting_interactive_requests_go_before_background_ones():
+    scheduler = UpstreamScheduler(rate=0, max_concurrency=1)
+    started = []
+
+    def request(priority: Priority):
+        with scheduler.slot(priority):
+            started.append(priority)
+
+    scheduler.acquire(Priority.INTERACTIVE)
+    background = threading.Thread(target=request, args=(Priority.BACKGROUND,))
+    background.start()
+    wait_for(lambda: scheduler.stats()["background"]["waiting"] == 1)
+    interactive = threading.Thread(target=request, args=(Priority.INTERACTIVE,))
+    interactive.start()
+    wait_for(lambda: scheduler.stats()["interactive"]["waiting"] == 1)
+
+    scheduler.release(Priority.INTERACTIVE)
+    background.join(5)
+    interactive.join(5)
+
+    assert started == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+
+def test_nested_deadlines_only_shorten_the_current_one():
+    assert deadline_remaining() is None
+
+    with request_deadline(10):
+        with request_deadline(60):
+            assert deadline_remaining() <= 10
+        with request_deadline(1):
+            assert deadline_remaining() <= 1
+        with request_deadline(None):
+            assert 1 < deadline_remaining() <= 10
+
+    assert deadline_remaining() is None
+
+
+def test_queued_request_gives_up_at_the_deadline():
+    scheduler = UpstreamScheduler(rate=0, max_concurrency=1)
+    scheduler.acquire()
+
+    with request_deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            scheduler.acquire()
+
+    assert scheduler.stats()["interactive"]["waiting"] == 0
+    scheduler.release()
+    with request_deadline(0.05):
+        with scheduler.slot():
+            pass